@@ -2,49 +2,299 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
 
 from src.config import PATHS
-from src.experiments.run_all import run_suite
-from src.experiments.summarize import summarize_results
-from src.experiments.plot import plot_runtime, plot_success_rate, plot_failure_threshold
 
+# Every subcommand's code is imported inside its handler, so an invocation only pays for the
+# path it uses (pandas, pyarrow, matplotlib and the QUBO solvers load on demand).
+
+# src.qubo.encodings.ENCODINGS, spelled out to keep numpy out of argument parsing
+QUBO_ENCODINGS = ["penalty", "one_hot", "domain_wall", "pruned"]
 
-def main():
-    parser = argparse.ArgumentParser()
-    sub = parser.add_subparsers(dest="cmd", required=True)
 
-    # run
-    runp = sub.add_parser("run")
-    runp.add_argument("--ns", nargs="+", type=int, required=True)
+def _run_args(runp: argparse.ArgumentParser) -> None:
+    runp.add_argument("--ns", nargs="+", type=int, default=None, help="N values (with --search threshold: the starting N, default 4)")
     runp.add_argument("--out", type=str, default=str(PATHS.results / "results.csv"))
+    runp.add_argument("--qubo-solver", choices=["amplify_ae", "local_sa"], default="amplify_ae")
+    runp.add_argument("--qubo-encoding", choices=QUBO_ENCODINGS, default="penalty", help="QUBO formulation (see the encodings subcommand)")
+    runp.add_argument("--seed", type=int, default=None, help="Base seed for local QUBO trials and the heuristic")
+    runp.add_argument("--warm-start", action="store_true", help="Hint cp_integer and local QUBO with the explicit construction")
+    runp.add_argument("--fzn-cache", action="store_true", help="Cache compiled FlatZinc under data/cache/fzn")
+    runp.add_argument("--qubo-disk-cache", action="store_true", help="Persist built QUBO models under data/cache/qubo")
+    runp.add_argument("--jobs", type=int, default=1, help="Worker processes for independent (approach, N, trial) units")
+    runp.add_argument("--qubo-in-flight", type=int, default=0, help="Send each N's QUBO trials concurrently, this many at once")
+    cache_mode = runp.add_mutually_exclusive_group()
+    cache_mode.add_argument("--no-cache", action="store_true", help="Always run MiniZinc; don't read or write the CP result cache")
+    cache_mode.add_argument("--refresh", action="store_true", help="Re-run CP instances and overwrite their cached results")
+    runp.add_argument("--resume", action="store_true", help="Continue the run recorded in --out and its manifest")
+    runp.add_argument("--run-id", type=str, default=None, help="Partition name in the results store (default: start timestamp)")
+    runp.add_argument("--cp-concurrency", type=int, default=0, help="Run CP units from one event loop, this many MiniZinc processes at once")
+    runp.add_argument("--cp-max-memory-mb", type=int, default=None, help="Address-space cap per MiniZinc process; over-limit runs fail as memory_limit")
+    runp.add_argument("--trace-memory", action="store_true", help="Record peak Python allocation of in-process approaches (tracemalloc; slower)")
+    runp.add_argument("--search", choices=["grid", "threshold"], default="grid", help="grid: every --ns value; threshold: bracket and bisect each approach's first failing N")
+    runp.add_argument("--n-max", type=int, default=512, help="Largest N probed by --search threshold")
+    runp.add_argument("--growth", type=float, default=2.0, help="N growth factor while --search threshold brackets the failure")
+    runp.add_argument("--qubo-trials", type=int, default=10, help="QUBO trials per N (per probe with --search threshold)")
+    weights = runp.add_mutually_exclusive_group()
+    weights.add_argument("--weight-table", type=str, default=None, help="Per-N QUBO weights from tune-weights (default: data/results/qubo_weights.json if present)")
+    weights.add_argument("--no-weight-table", action="store_true", help="Use the fixed default QUBO weights for every N")
+
+
+def _run(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    if args.ns is None and args.search == "grid":
+        parser.error("run: --ns is required unless --search threshold")
+
+    from src.cp.compile_cache import FznCache
+    from src.cp.result_cache import CpResultCache
+    from src.experiments.run_all import run_suite
+    from src.experiments.tune_weights import DEFAULT_WEIGHT_TABLE
+    from src.qubo.cache import DEFAULT_DISK_DIR, QuboModelCache
+
+    qubo_cache = QuboModelCache(disk_dir=DEFAULT_DISK_DIR if args.qubo_disk_cache else None)
+    df = run_suite(
+        args.ns or [4],
+        Path(args.out),
+        qubo_solver=args.qubo_solver,
+        qubo_seed=args.seed,
+        heuristic_seed=args.seed,
+        warm_start=args.warm_start,
+        fzn_cache=FznCache() if args.fzn_cache else None,
+        result_cache=None if args.no_cache else CpResultCache(refresh=args.refresh),
+        qubo_cache=qubo_cache,
+        qubo_in_flight=args.qubo_in_flight,
+        jobs=args.jobs,
+        cp_concurrency=args.cp_concurrency,
+        resume=args.resume,
+        run_id=args.run_id,
+        cp_max_memory_mb=args.cp_max_memory_mb,
+        trace_memory=args.trace_memory,
+        qubo_trials=args.qubo_trials,
+        search=args.search,
+        n_max=args.n_max,
+        growth=args.growth,
+        qubo_encoding=args.qubo_encoding,
+        weight_table=None if args.no_weight_table else Path(args.weight_table or DEFAULT_WEIGHT_TABLE),
+    )
+    print(df)
 
-    # summarize
-    sump = sub.add_parser("summarize")
-    sump.add_argument("--in", dest="inp", type=str, default=str(PATHS.results / "results.csv"))
+
+def _summarize_args(sump: argparse.ArgumentParser) -> None:
+    sump.add_argument("--in", dest="inp", type=str, default=None, help="Results store, .parquet or CSV (default: the store if present, else results.csv)")
     sump.add_argument("--out", type=str, default=str(PATHS.results / "summary.csv"))
+    sump.add_argument("--runs", nargs="+", default=None, help="Store runs to include (default: the latest)")
+    sump.add_argument("--all-runs", action="store_true", help="Summarize every run in the store")
+
+
+def _summarize(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.experiments.store import DEFAULT_STORE_DIR, list_runs
+    from src.experiments.summarize import summarize_results
+
+    runs = list_runs(DEFAULT_STORE_DIR)
+    inp = Path(args.inp) if args.inp else (DEFAULT_STORE_DIR if runs else PATHS.results / "results.csv")
+    selected = None
+    if inp.is_dir() and not args.all_runs:
+        selected = args.runs or list_runs(inp)[-1:]
+    df = summarize_results(inp, Path(args.out), runs=selected)
+    print(df)
 
-    # plot
-    plotp = sub.add_parser("plot")
-    plotp.add_argument("--summary", type=str, default=str(PATHS.results / "summary.csv"))
+
+def _plot_args(plotp: argparse.ArgumentParser) -> None:
+    plotp.add_argument("--summary", type=str, default=None, help="Summary .parquet or CSV (default: summary.parquet if present)")
     plotp.add_argument("--outdir", type=str, default=str(PATHS.results))
 
-    args = parser.parse_args()
 
-    if args.cmd == "run":
-        df = run_suite(args.ns, Path(args.out))
-        print(df)
-
-    elif args.cmd == "summarize":
-        df = summarize_results(Path(args.inp), Path(args.out))
-        print(df)
-
-    elif args.cmd == "plot":
-        outdir = Path(args.outdir)
-        outdir.mkdir(parents=True, exist_ok=True)
-        plot_runtime(Path(args.summary), outdir / "runtime_vs_n.png")
-        plot_success_rate(Path(args.summary), outdir / "valid_rate_vs_n.png")
-        plot_failure_threshold(Path(args.summary), outdir / "failure_threshold.png")
-        print(f"Wrote plots to: {outdir}")
+def _plot(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)  # writes files only, never needs a display
+    from src.experiments.plot import plot_failure_threshold, plot_phase_breakdown, plot_runtime, plot_success_rate
+
+    outdir = Path(args.outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    summary = Path(args.summary) if args.summary else PATHS.results / "summary.parquet"
+    if not args.summary and not summary.exists():
+        summary = PATHS.results / "summary.csv"
+    plot_runtime(summary, outdir / "runtime_vs_n.png")
+    plot_success_rate(summary, outdir / "valid_rate_vs_n.png")
+    plot_failure_threshold(summary, outdir / "failure_threshold.png")
+    plot_phase_breakdown(summary, outdir / "phase_breakdown.png")
+    print(f"Wrote plots to: {outdir}")
+
+
+def _export_args(expp: argparse.ArgumentParser) -> None:
+    expp.add_argument("--out", type=str, default=str(PATHS.results / "results_all.csv"))
+    expp.add_argument("--runs", nargs="+", default=None)
+
+
+def _export(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.experiments.store import DEFAULT_STORE_DIR, export_csv
+
+    df = export_csv(DEFAULT_STORE_DIR, Path(args.out), runs=args.runs)
+    print(f"Wrote {len(df)} rows to: {args.out}")
+
+
+def _count_args(countp: argparse.ArgumentParser) -> None:
+    countp.add_argument("--ns", nargs="+", type=int, required=True)
+    countp.add_argument("--jobs", type=int, default=None, help="Worker processes (default: all cores)")
+
+
+def _count(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.enumerate.bitboard import count_solutions
+
+    print(f"{'N':>4} {'solutions':>12} {'nodes':>14} {'nodes/s':>12} {'time_s':>9}  known")
+    for n in args.ns:
+        r = count_solutions(n, jobs=args.jobs)
+        check = "-" if r["matches_known"] is None else ("ok" if r["matches_known"] else "MISMATCH")
+        nps = r["nodes_per_s"] or 0.0
+        print(f"{n:>4} {r['solutions']:>12} {r['nodes']:>14} {nps:>12.0f} {r['time_s']:>9.3f}  {check}")
+
+
+def _encodings_args(encp: argparse.ArgumentParser) -> None:
+    encp.add_argument("--ns", nargs="+", type=int, required=True)
+    encp.add_argument("--encodings", nargs="+", choices=QUBO_ENCODINGS, default=None)
+
+
+def _encodings(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.qubo.encodings import encoding_report
+
+    print(f"{'N':>4} {'encoding':<12} {'native':<10} {'variables':>10} {'terms':>12} {'MiB':>9} {'peak MiB':>9} {'build_s':>8}")
+    for n in args.ns:
+        for r in encoding_report(n, encodings=args.encodings):
+            print(
+                f"{n:>4} {r['encoding']:<12} {r['native_one_hot'] or '-':<10} {r['num_variables']:>10} {r['num_terms']:>12} "
+                f"{r['matrix_bytes'] / 2**20:>9.2f} {r['build_peak_kb'] / 1024:>9.2f} {r['build_time_s']:>8.3f}"
+            )
+
+
+def _export_qubo_args(qp: argparse.ArgumentParser) -> None:
+    qp.add_argument("--n", type=int, required=True)
+    qp.add_argument("--encoding", choices=QUBO_ENCODINGS, default="penalty")
+    qp.add_argument("--weights", nargs=3, type=float, metavar=("W_ROW", "W_COL", "W_DIAG"), default=(5.0, 5.0, 1.0))
+    qp.add_argument("--format", choices=["binary", "qbsolv", "coo"], default="binary", help="binary: memory-mappable (load_qubo); qbsolv: .qubo text; coo: dimod BQM COO text")
+    qp.add_argument("--out", type=str, default=None, help="Output file (default: data/cache/qubo_export/n<N>_<encoding>.<ext>)")
+
+
+def _export_qubo(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.qubo.encodings import build_encoded_matrix
+    from src.qubo.export import write_coo, write_qbsolv, write_qubo
+
+    writer, ext = {"binary": (write_qubo, "bin"), "qbsolv": (write_qbsolv, "qubo"), "coo": (write_coo, "coo")}[args.format]
+    w_row, w_col, w_diag = args.weights
+    matrix = build_encoded_matrix(args.n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=args.encoding)
+    out = Path(args.out or PATHS.cache / "qubo_export" / f"n{args.n}_{args.encoding}.{ext}")
+    writer(matrix, out)
+    print(f"N={args.n} {args.encoding}: {matrix.num_variables} variables, {matrix.num_terms} terms -> {out} ({out.stat().st_size / 2**20:.2f} MiB)")
+
+
+def _solve_args(solvep: argparse.ArgumentParser) -> None:
+    solvep.add_argument("--n", type=int, required=True)
+    solvep.add_argument("--portfolio", nargs="*", default=None, help="Engines to race: cp_boolean:<solver>, cp_integer:<solver>, qubo_local_sa, heuristic, explicit (default: both CP models on each installed gecode/chuffed/cp-sat, qubo_local_sa, heuristic)")
+    solvep.add_argument("--timeout", type=float, default=60.0, help="Give up (and kill every engine) after this many seconds")
+    solvep.add_argument("--seed", type=int, default=None)
+    solvep.add_argument("--out", type=str, default=None, help="Write the winning placement as JSON")
+    solvep.add_argument("--no-log", action="store_true", help="Don't append the race to data/results/portfolio_wins.jsonl")
+
+
+def _solve(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    import json
+
+    from src.experiments.portfolio import DEFAULT_WIN_LOG, solve_portfolio, win_stats
+
+    try:
+        r = solve_portfolio(
+            args.n, args.portfolio, timeout_s=args.timeout, seed=args.seed,
+            log_path=None if args.no_log else DEFAULT_WIN_LOG,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    if r["winner"] is None:
+        print(f"N={args.n}: no valid solution within {args.timeout} s")
+    else:
+        print(f"N={args.n}: {r['winner']} won in {r['time_s']:.3f} s")
+    for engine, o in r["engines"].items():
+        t = "" if o["time_s"] is None else f"{o['time_s']:.3f}"
+        print(f"  {engine:<22} {o['status']:<10} {t}")
+    if not args.no_log:
+        print(f"Wins at N={args.n} so far:")
+        for engine, s in sorted(win_stats(DEFAULT_WIN_LOG, n=args.n).items(), key=lambda kv: -kv[1]["wins"]):
+            print(f"  {engine:<22} {s['wins']}/{s['races']}")
+    if args.out and r["solution"] is not None:
+        Path(args.out).write_text(json.dumps({"n": args.n, "engine": r["winner"], "q": r["solution"].to_q1()}) + "\n")
+    if r["winner"] is None:
+        raise SystemExit(1)
+
+
+def _tune_args(tunep: argparse.ArgumentParser) -> None:
+    tunep.add_argument("--ns", nargs="+", type=int, required=True)
+    tunep.add_argument("--qubo-solver", choices=["amplify_ae", "local_sa"], default="local_sa")
+    tunep.add_argument("--qubo-encoding", choices=QUBO_ENCODINGS, default="penalty")
+    tunep.add_argument("--row-col-grid", nargs="+", type=float, default=None, help="Values tried for w_row and for w_col (default: 1 2 5 10)")
+    tunep.add_argument("--diag-grid", nargs="+", type=float, default=None, help="Values tried for w_diag (default: 0.5 1 2)")
+    tunep.add_argument("--min-reads", type=int, default=8, help="Reads every configuration gets in the first rung")
+    tunep.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta per rung, with eta x the reads")
+    tunep.add_argument("--max-reads", type=int, default=512, help="Largest per-rung read budget")
+    tunep.add_argument("--timeout", type=float, default=1.0, help="Solver timeout per call (s)")
+    tunep.add_argument("--jobs", type=int, default=1, help="Worker processes")
+    tunep.add_argument("--seed", type=int, default=None)
+    tunep.add_argument("--out", type=str, default=None, help="Weight table to merge into (default: data/results/qubo_weights.json)")
+
+
+def _tune(args: argparse.Namespace, parser: argparse.ArgumentParser) -> None:
+    from src.experiments.tune_weights import DEFAULT_DIAG_GRID, DEFAULT_ROW_COL_GRID, DEFAULT_WEIGHT_TABLE, tune_weights, weight_grid
+
+    def on_rung(n, reads, arms):
+        best = max(arms, key=lambda a: a.rank_key())
+        print(f"  N={n:<4} {reads:>5} reads x {len(arms):>3} configs  best {best.weights}: {best.valid_per_s:.1f} valid/s")
+
+    out = Path(args.out or DEFAULT_WEIGHT_TABLE)
+    tuned = tune_weights(
+        args.ns,
+        weight_grid(args.row_col_grid or DEFAULT_ROW_COL_GRID, args.diag_grid or DEFAULT_DIAG_GRID),
+        solver=args.qubo_solver,
+        encoding=args.qubo_encoding,
+        min_reads=args.min_reads,
+        eta=args.eta,
+        max_reads=args.max_reads,
+        timeout_s=args.timeout,
+        jobs=args.jobs,
+        seed=args.seed,
+        out=out,
+        on_rung=on_rung,
+    )
+    for n in args.ns:
+        e = tuned.get(n)
+        if e is None:
+            print(f"N={n}: no configuration produced a valid read; table unchanged")
+        else:
+            print(f"N={n}: w_row={e['w_row']:g} w_col={e['w_col']:g} w_diag={e['w_diag']:g}  {e['valid_per_s']:.1f} valid/s, success {e['success_rate']:.2f}")
+    print(f"Weight table: {out}")
+
+
+Handler = Callable[[argparse.Namespace, argparse.ArgumentParser], None]
+
+# subcommand -> (help, add its arguments, handler)
+COMMANDS: Dict[str, Tuple[Optional[str], Callable[[argparse.ArgumentParser], None], Handler]] = {
+    "run": (None, _run_args, _run),
+    "summarize": (None, _summarize_args, _summarize),
+    "plot": (None, _plot_args, _plot),
+    "export": ("Write the results store as one CSV", _export_args, _export),
+    "count": (None, _count_args, _count),
+    "encodings": ("Variables, terms and build memory of each QUBO encoding", _encodings_args, _encodings),
+    "export-qubo": ("Write an N-queens QUBO to a file (binary, qbsolv or COO)", _export_qubo_args, _export_qubo),
+    "tune-weights": ("Tune QUBO penalty weights per N (valid solutions/s)", _tune_args, _tune),
+    "solve": ("Race a portfolio of engines on one N; first valid solution wins", _solve_args, _solve),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name, (help_text, add_args, _) in COMMANDS.items():
+        add_args(sub.add_parser(name, help=help_text))
+
+    args = parser.parse_args()
+    COMMANDS[args.cmd][2](args, parser)
 
 if __name__ == "__main__":
     main()
@@ -8,5 +8,6 @@ class Paths:
     data: Path = root / "data"
     instances: Path = data / "instances"
     results: Path = data / "results"
+    cache: Path = data / "cache"
 
 PATHS = Paths()
\ No newline at end of file
@@ -0,0 +1,175 @@
+from __future__ import annotations
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.config import PATHS
+from src.cp.run_minizinc import HARD_TIMEOUT_GRACE_S, run_minizinc_streaming
+from src.utils.resources import combine_usage, hit_memory_limit, run_with_usage
+from src.utils.timing import timer
+
+DEFAULT_FZN_DIR = PATHS.cache / "fzn"
+
+
+@functools.lru_cache(maxsize=None)
+def minizinc_version() -> str:
+    """First line of `minizinc --version` (part of every compilation key)"""
+    try:
+        proc = subprocess.run(["minizinc", "--version"], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+    return (proc.stdout.splitlines() or ["unknown"])[0].strip()
+
+
+class FznCache:
+    """
+    Content-addressed cache of compiled FlatZinc.
+
+    Key: sha256 of model text, instance data (N and any hint), solver and MiniZinc version.
+    Each entry is a directory holding model.fzn/model.ozn; entries are touched on use and the
+    least recently used ones are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_FZN_DIR, max_bytes: int = 2 * 1024 ** 3) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, model_path: Path, dzn_path: Path, solver: Optional[str]) -> str:
+        h = hashlib.sha256()
+        for part in (
+            model_path.read_bytes(),
+            dzn_path.read_bytes(),
+            (solver or "").encode(),
+            minizinc_version().encode(),
+        ):
+            h.update(len(part).to_bytes(8, "little"))
+            h.update(part)
+        return h.hexdigest()
+
+    def compile(
+        self,
+        model_path: Path,
+        dzn_path: Path,
+        solver: Optional[str] = "gecode",
+        timeout_s: Optional[float] = None,
+        max_memory_mb: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return {"fzn", "ozn", "hit", "flatten_time_s", "ok", "stderr", "usage", "memory_limit_hit"},
+        flattening only on a miss (usage: the flattener's rusage, empty on a hit)
+        """
+        entry = self.cache_dir / self.key(model_path, dzn_path, solver)
+        fzn, ozn = entry / "model.fzn", entry / "model.ozn"
+        if fzn.exists():
+            os.utime(entry)
+            return {
+                "fzn": fzn, "ozn": ozn, "hit": True, "flatten_time_s": 0.0, "ok": True, "stderr": "",
+                "usage": {}, "memory_limit_hit": False,
+            }
+
+        tmp = entry.with_name(entry.name + f".tmp{os.getpid()}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        cmd = ["minizinc", "-c"]
+        if solver:
+            cmd += ["--solver", solver]
+        cmd += [str(model_path), str(dzn_path), "--fzn", str(tmp / "model.fzn"), "--ozn", str(tmp / "model.ozn")]
+
+        with timer() as t:
+            returncode, _, stderr, expired, usage = run_with_usage(cmd, timeout_s=timeout_s, max_memory_mb=max_memory_mb)
+            elapsed = t()
+        ok = returncode == 0 and not expired
+        if expired:
+            stderr = f"flattening exceeded {timeout_s} s"
+
+        if not ok:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return {
+                "fzn": None, "ozn": None, "hit": False, "flatten_time_s": elapsed, "ok": False, "stderr": stderr,
+                "usage": usage, "memory_limit_hit": hit_memory_limit(max_memory_mb, returncode, stderr, expired),
+            }
+
+        try:
+            tmp.rename(entry)
+        except OSError:
+            # another worker published the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return {
+            "fzn": fzn, "ozn": ozn, "hit": False, "flatten_time_s": elapsed, "ok": True, "stderr": stderr,
+            "usage": usage, "memory_limit_hit": False,
+        }
+
+    def size_bytes(self) -> int:
+        if not self.cache_dir.exists():
+            return 0
+        return sum(f.stat().st_size for f in self.cache_dir.glob("*/*") if f.is_file())
+
+    def evict(self) -> None:
+        if not self.cache_dir.exists():
+            return
+        entries = [d for d in self.cache_dir.iterdir() if d.is_dir() and ".tmp" not in d.name]
+        sizes = {d: sum(f.stat().st_size for f in d.iterdir()) for d in entries}
+        total = sum(sizes.values())
+        for d in sorted(entries, key=lambda d: d.stat().st_mtime)[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            total -= sizes[d]
+
+
+def run_minizinc_cached(
+    model_path: Path,
+    dzn_path: Path,
+    cache: FznCache,
+    solver: Optional[str] = "gecode",
+    timeout_s: Optional[float] = None,
+    max_memory_mb: Optional[int] = None,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    Flatten through the cache, then run the solver on the .fzn directly.
+
+    Same result dict as run_minizinc_streaming plus flatten_time_s, solve_time_s and fzn_cache_hit;
+    time_s is flatten + solve so it stays comparable to an uncached run, and the resource usage
+    covers both processes. max_memory_mb caps the flattener and the solver alike.
+    """
+    hard = None if timeout_s is None else timeout_s + HARD_TIMEOUT_GRACE_S
+    compiled = cache.compile(model_path, dzn_path, solver=solver, timeout_s=hard, max_memory_mb=max_memory_mb)
+    if not compiled["ok"]:
+        return {
+            "ok": False,
+            "returncode": None,
+            "stdout": "",
+            "stderr": compiled["stderr"],
+            "time_s": compiled["flatten_time_s"],
+            "time_to_first_s": None,
+            "cmd": f"minizinc -c {model_path} {dzn_path}",
+            "solution": None,
+            "num_solutions": 0,
+            "status": "ERROR",
+            "stopped_early": False,
+            "timed_out": compiled["stderr"].startswith("flattening exceeded"),
+            "flatten_time_s": compiled["flatten_time_s"],
+            "solve_time_s": None,
+            "fzn_cache_hit": False,
+            "stats": {},
+            "memory_limit_hit": compiled["memory_limit_hit"],
+            **compiled["usage"],
+        }
+
+    run = run_minizinc_streaming(
+        compiled["fzn"], None, solver=solver, timeout_s=timeout_s, max_memory_mb=max_memory_mb, **kwargs
+    )
+    run.update(combine_usage(compiled["usage"], run))
+    run["stderr"] = compiled["stderr"] + run["stderr"]
+    run["flatten_time_s"] = compiled["flatten_time_s"]
+    run["solve_time_s"] = run["time_s"]
+    run["fzn_cache_hit"] = compiled["hit"]
+    run["time_s"] = compiled["flatten_time_s"] + run["time_s"]
+    if run["time_to_first_s"] is not None:
+        run["time_to_first_s"] += compiled["flatten_time_s"]
+    return run
@@ -29,4 +29,5 @@ def write_run_logs(
         "cmd": run.get("cmd"),
         "parsed": parsed,
     }
-    (log_file.with_suffix(".json")).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    # compact separators: the q-vector is O(n) but one line per entry would still bloat large-N logs
+    (log_file.with_suffix(".json")).write_text(json.dumps(meta, separators=(",", ":")), encoding="utf-8")
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+
+from src.utils.solution import Solution
 
 _Q_RE = re.compile(r"\bq\s*=\s*\[(.*?)\]", re.DOTALL)
+# Raw FlatZinc output (solver run on a cached .fzn): `q = array1d(1..n, [...]);`, `x = array2d(..., [...]);`
+_FZN_ARRAY_RE = re.compile(r"^(q|x)\s*=\s*array[12]d\(.*\[(.*)\]\);$")
 
 def parse_q_from_stdout(stdout: str) -> Optional[List[int]]:
     """Function to parse queen columns (q=[1,3,4,...]) from MiniZinc stdout"""
@@ -20,36 +24,101 @@ def parse_q_from_stdout(stdout: str) -> Optional[List[int]]:
     except ValueError:
         return None
 
-def parse_board_from_stdout(stdout: str, n: int):
-    """Function to parse the 'board=' section from boolean_cp.mzn stdout"""
-    idx = stdout.find("board=")
-    if idx == -1:
+def parse_solution_from_stdout(stdout: str) -> Optional[Solution]:
+    """Function to parse the q=[...] line of either model into a compact Solution"""
+    q = parse_q_from_stdout(stdout)
+    return Solution.from_q1(q) if q is not None else None
+
+def parse_fzn_array(name: str, inner: str) -> Optional[Solution]:
+    """Solution from a raw FlatZinc output array: q (1-indexed columns) or the flat 0/1 board x"""
+    try:
+        values = [1 if v == "true" else 0 if v == "false" else int(v) for v in (p.strip() for p in inner.split(",")) if v]
+    except ValueError:
+        return None
+    if name == "q":
+        return Solution.from_q1(values)
+    n = int(round(len(values) ** 0.5))
+    if n * n != len(values):
         return None
+    return Solution.from_board(values[r * n:(r + 1) * n] for r in range(n))
 
-    after = stdout[idx:]
-    lines = after.splitlines()
-    start = None
+_STAT_RE = re.compile(r"^%%%mzn-stat:\s*(\w+)=(.*)$")
+_ELAPSED_RE = re.compile(r"^%\s*time elapsed:\s*([0-9.eE+-]+)\s*s")
 
-    for i, line in enumerate(lines):
-        if "board=" in line:
-            start = i + 1
-            break
 
-    if start is None:
-        return None
+def _stat_value(text: str) -> Any:
+    text = text.strip().strip('"')
+    for conv in (int, float):
+        try:
+            return conv(text)
+        except ValueError:
+            pass
+    return text
 
-    board_lines = [ln.strip() for ln in lines[start:] if ln.strip() != ""]
-    if len(board_lines) < n:
-        return None
 
-    board_lines = board_lines[:n]
-    x: List[List[int]] = []
+SOLUTION_SEP = "----------"
+STATUS_LINES = {
+    "==========": "ALL_SOLUTIONS",
+    "=====UNSATISFIABLE=====": "UNSATISFIABLE",
+    "=====UNKNOWN=====": "UNKNOWN",
+    "=====ERROR=====": "ERROR",
+}
 
-    for ln in board_lines:
-        tokens = [t for t in ln.split() if t]
-        if len(tokens) != n:
-            return None
-        row = [1 if t.upper() == "Q" else 0 for t in tokens]
-        x.append(row)
+class SolutionStreamParser:
+    """
+    Line-fed parser for MiniZinc stdout.
+
+    Only the q=[...] text of the solution being printed is buffered; feed() returns a
+    Solution when its '----------' separator arrives, so K solutions never sit in memory.
+    `%%%mzn-stat: key=value` lines (--statistics) and `% time elapsed:` (--output-time)
+    go to `stats`; other lines (n=, warnings) are kept in `extra_lines`, bounded by `max_extra`.
+    """
+
+    def __init__(self, max_extra: int = 200) -> None:
+        self.status: Optional[str] = None
+        self.num_solutions = 0
+        self.extra_lines: List[str] = []
+        self._max_extra = max_extra
+        self._q_text: Optional[str] = None
+        self._in_q = False
+        self._fzn: Optional[Solution] = None
+        self.stats: Dict[str, Any] = {}
 
-    return x
+    def feed(self, line: str) -> Optional[Solution]:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+
+        if self._in_q:
+            self._q_text += stripped
+            self._in_q = "]" not in stripped
+            return None
+        fzn = _FZN_ARRAY_RE.match(stripped)
+        if fzn is not None:
+            self._fzn = parse_fzn_array(fzn.group(1), fzn.group(2))
+            return None
+        if stripped.startswith("q=") or stripped.startswith("q ="):
+            self._q_text = stripped
+            self._in_q = "]" not in stripped
+            return None
+        if stripped == SOLUTION_SEP:
+            self.num_solutions += 1
+            sol = self._fzn if self._fzn is not None else parse_solution_from_stdout(self._q_text or "")
+            self._q_text = None
+            self._fzn = None
+            return sol
+        if stripped in STATUS_LINES:
+            self.status = STATUS_LINES[stripped]
+            return None
+        stat = _STAT_RE.match(stripped)
+        if stat is not None:
+            self.stats[stat.group(1)] = _stat_value(stat.group(2))
+            return None
+        elapsed = _ELAPSED_RE.match(stripped)
+        if elapsed is not None:
+            self.stats["timeElapsed"] = float(elapsed.group(1))
+            return None
+        if stripped.startswith("%%%mzn-stat"):
+            return None
+        if stripped and len(self.extra_lines) < self._max_extra:
+            self.extra_lines.append(line)
+        return None
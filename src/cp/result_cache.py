@@ -0,0 +1,145 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from src.config import PATHS
+from src.cp.compile_cache import minizinc_version
+from src.utils.solution import Solution
+
+DEFAULT_RESULT_DB = PATHS.cache / "cp_results.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    run TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    used REAL NOT NULL
+)
+"""
+
+
+# A run without a solution that used this fraction of its time limit is taken to have hit it
+_LIMIT_FRACTION = 0.95
+
+
+def cacheable(run: Dict[str, Any], timeout_s: Optional[float] = None) -> bool:
+    """False for runs whose outcome depends on machine load: timeouts of either kind and memory-cap kills"""
+    if run.get("timed_out") or run.get("memory_limit_hit") or run.get("status") == "UNKNOWN":
+        return False
+    if run.get("solution") is None and timeout_s is not None:
+        return float(run.get("time_s") or 0.0) < _LIMIT_FRACTION * timeout_s
+    return True
+
+
+class CpResultCache:
+    """
+    SQLite store of finished MiniZinc runs keyed by sha256 of model text, instance data,
+    solver, MiniZinc version, time limit and memory cap (if any).
+
+    Runs killed by the Python-side hard timeout or by the memory cap, and runs MiniZinc stopped
+    on its own time limit (status UNKNOWN, or no solution at the limit), are not stored (their
+    outcome depends on machine load, not on the inputs). Entries older than max_age_s are dropped and the
+    least recently used ones go once the stored runs exceed max_bytes. refresh=True skips
+    lookups but still stores the new results. Connections are opened per call, so the
+    cache can be shipped to worker processes.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = DEFAULT_RESULT_DB,
+        max_bytes: int = 256 * 1024 ** 2,
+        max_age_s: float = 30 * 24 * 3600,
+        refresh: bool = False,
+    ) -> None:
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.refresh = refresh
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction on a fresh connection (committed on success, always closed)"""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        con = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with con:
+                con.execute(_SCHEMA)
+                yield con
+        finally:
+            con.close()
+
+    def key(
+        self,
+        model_path: Path,
+        dzn_path: Path,
+        solver: Optional[str],
+        timeout_s: Optional[float],
+        max_memory_mb: Optional[int] = None,
+    ) -> str:
+        h = hashlib.sha256()
+        parts = [
+            model_path.read_bytes(),
+            dzn_path.read_bytes(),
+            (solver or "").encode(),
+            minizinc_version().encode(),
+            repr(timeout_s).encode(),
+        ]
+        if max_memory_mb is not None:
+            # uncapped keys stay as they were
+            parts.append(f"max_memory_mb={int(max_memory_mb)}".encode())
+        for part in parts:
+            h.update(len(part).to_bytes(8, "little"))
+            h.update(part)
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.refresh:
+            return None
+        now = time.time()
+        with self._connect() as con:
+            row = con.execute("SELECT run FROM results WHERE key = ? AND created >= ?", (key, now - self.max_age_s)).fetchone()
+            if row is None:
+                return None
+            con.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+        run = json.loads(row[0])
+        if run.get("solution") is not None:
+            run["solution"] = Solution(run["solution"])
+        return run
+
+    def put(self, key: str, run: Dict[str, Any], timeout_s: Optional[float] = None) -> bool:
+        """Store a run; returns False when it isn't cacheable (timeout_s: the limit it ran under)"""
+        if not cacheable(run, timeout_s):
+            return False
+        payload = dict(run)
+        if payload.get("solution") is not None:
+            payload["solution"] = payload["solution"].to_list()
+        text = json.dumps(payload, separators=(",", ":"))
+        now = time.time()
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO results (key, run, size, created, used) VALUES (?, ?, ?, ?, ?)",
+                (key, text, len(text), now, now),
+            )
+            self._evict(con, now)
+        return True
+
+    def _evict(self, con: sqlite3.Connection, now: float) -> None:
+        con.execute("DELETE FROM results WHERE created < ?", (now - self.max_age_s,))
+        total = con.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in con.execute("SELECT key, size FROM results ORDER BY used").fetchall()[:-1]:
+            con.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._connect() as con:
+            con.execute("DELETE FROM results")
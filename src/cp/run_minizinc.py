@@ -1,13 +1,29 @@
 from __future__ import annotations
+import codecs
+import os
+import selectors
 import subprocess
+import threading
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Iterable, List
 
+from src.cp.parse_minizinc import SolutionStreamParser
+from src.utils.resources import RssWatch, hit_memory_limit, kill_group, memory_limited, wait_with_usage
+from src.utils.solution import Solution
 from src.utils.timing import timer
 from src.utils.io import write_text
 
-def write_dzn(dzn_path: Path, n: int) -> None:
-    write_text(dzn_path, f"n = {n};\n")
+# Extra wall-clock time granted past MiniZinc's own --time-limit before the group is killed
+HARD_TIMEOUT_GRACE_S = 10.0
+# After the first valid solution of a single-solution run, how long to wait for the solver's statistics block
+STATS_GRACE_S = 2.0
+
+def write_dzn(dzn_path: Path, n: int, hint: Optional[Iterable[int]] = None) -> None:
+    """Instance data; `hint` (1-indexed q-vector) feeds the warm_start of integer_alldiff_warm_cp.mzn"""
+    content = f"n = {n};\n"
+    if hint is not None:
+        content += "hint = [" + ", ".join(str(int(c)) for c in hint) + "];\n"
+    write_text(dzn_path, content)
 
 def run_minizinc(
     model_path: Path,
@@ -33,4 +49,158 @@ def run_minizinc(
         "stderr": proc.stderr,
         "time_s": elapsed,
         "cmd": " ".join(cmd),
-    }
\ No newline at end of file
+    }
+
+def minizinc_cmd(
+    model_path: Path,
+    dzn_path: Optional[Path],
+    solver: Optional[str] = "gecode",
+    timeout_s: Optional[float] = None,
+    all_solutions: bool = False,
+    num_solutions: Optional[int] = None,
+    statistics: bool = True,
+) -> List[str]:
+    cmd = ["minizinc"]
+    if solver:
+        cmd += ["--solver", solver]
+    if statistics:
+        cmd += ["--statistics", "--output-time"]
+    if timeout_s is not None:
+        cmd += ["--time-limit", str(int(timeout_s * 1000))]  # ms
+    if all_solutions:
+        cmd += ["--all-solutions"]
+    elif num_solutions is not None:
+        cmd += ["-n", str(int(num_solutions))]
+    cmd += [str(model_path)]
+    if dzn_path is not None:
+        cmd += [str(dzn_path)]
+    return cmd
+
+
+def run_minizinc_streaming(
+    model_path: Path,
+    dzn_path: Optional[Path],
+    solver: Optional[str] = "gecode",
+    timeout_s: Optional[float] = None,
+    *,
+    all_solutions: bool = False,
+    num_solutions: Optional[int] = None,
+    stop_on_first_valid: bool = True,
+    hard_timeout_s: Optional[float] = None,
+    on_solution: Optional[Callable[[Solution], None]] = None,
+    statistics: bool = True,
+    max_memory_mb: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run MiniZinc with Popen and parse stdout line by line as it is produced.
+    `model_path` may also be a compiled .fzn (dzn_path=None), whose raw output is parsed too.
+
+    Records time-to-first-solution separately from total process time. With
+    stop_on_first_valid the process group is killed as soon as a valid placement arrives.
+    A Python-side hard timeout (default: time limit + 10 s grace) kills the group if the
+    flattener or solver ignores --time-limit.
+
+    With statistics, MiniZinc's --statistics/--output-time lines are parsed into `stats`
+    (flatTime, solveTime, nodes, failures, propagations, ...). A single-solution run is then
+    given up to STATS_GRACE_S after its first valid solution to print them before the kill.
+
+    The child is reaped with wait4, so the result carries its peak RSS, user/system CPU time
+    and context switches. max_memory_mb caps its address space (memory_limited); a run that dies
+    on the cap has memory_limit_hit=True.
+    """
+    cmd = minizinc_cmd(model_path, dzn_path, solver, timeout_s, all_solutions, num_solutions, statistics)
+    drain_for_stats = statistics and not all_solutions and num_solutions in (None, 1)
+    drain_until: Optional[float] = None
+    if hard_timeout_s is None and timeout_s is not None:
+        hard_timeout_s = timeout_s + HARD_TIMEOUT_GRACE_S
+
+    parser = SolutionStreamParser()
+    first: Optional[Solution] = None
+    last: Optional[Solution] = None
+    time_to_first: Optional[float] = None
+    stopped = timed_out = False
+    stderr_chunks: List[str] = []
+
+    with timer() as t:
+        proc = subprocess.Popen(
+            memory_limited(cmd, max_memory_mb),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        watch = RssWatch(proc.pid)
+        err_thread = threading.Thread(
+            target=lambda: stderr_chunks.append(proc.stderr.read().decode("utf-8", "replace")),
+            daemon=True,
+        )
+        err_thread.start()
+
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        pending = ""
+        fd = proc.stdout.fileno()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            eof = False
+            while not eof and not stopped:
+                wait = None if hard_timeout_s is None else hard_timeout_s - t()
+                if wait is not None and wait <= 0:
+                    timed_out = True
+                    break
+                if drain_until is not None:
+                    wait = drain_until - t() if wait is None else min(wait, drain_until - t())
+                    if wait <= 0:
+                        stopped = True
+                        break
+                if not sel.select(wait):
+                    continue
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    eof = True
+                    chunk_text = decoder.decode(b"", final=True)
+                else:
+                    chunk_text = decoder.decode(chunk)
+                pending += chunk_text
+                *lines, pending = pending.split("\n")
+                if eof and pending:
+                    lines.append(pending)
+                for line in lines:
+                    sol = parser.feed(line)
+                    if sol is None:
+                        continue
+                    last = sol
+                    if on_solution is not None:
+                        on_solution(sol)
+                    if first is None and sol.is_valid():
+                        first = sol
+                        time_to_first = t()
+                        if stop_on_first_valid and drain_for_stats:
+                            drain_until = t() + STATS_GRACE_S
+                        elif stop_on_first_valid:
+                            stopped = True
+                            break
+
+        if stopped or timed_out:
+            kill_group(proc, watch)
+        usage = wait_with_usage(proc, watch)
+        err_thread.join(timeout=5)
+        elapsed = t()
+
+    solution = first or last
+    stderr = "".join(stderr_chunks)
+    return {
+        "ok": proc.returncode == 0 or first is not None,
+        "returncode": proc.returncode,
+        "stdout": "\n".join(parser.extra_lines),
+        "stderr": stderr,
+        "time_s": elapsed,
+        "time_to_first_s": time_to_first,
+        "cmd": " ".join(cmd),
+        "solution": solution,
+        "num_solutions": parser.num_solutions,
+        "status": parser.status,
+        "stopped_early": stopped,
+        "timed_out": timed_out,
+        "stats": parser.stats,
+        "memory_limit_hit": first is None and hit_memory_limit(max_memory_mb, proc.returncode, stderr, stopped or timed_out),
+        **usage,
+    }
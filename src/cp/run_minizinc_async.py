@@ -0,0 +1,181 @@
+from __future__ import annotations
+import asyncio
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.cp.parse_minizinc import SolutionStreamParser
+from src.cp.run_minizinc import HARD_TIMEOUT_GRACE_S, STATS_GRACE_S, minizinc_cmd
+from src.utils.resources import RssWatch, hit_memory_limit, kill_group, memory_limited, wait_with_usage
+from src.utils.solution import Solution
+from src.utils.timing import timer
+
+# StreamReader line limit: one solution line is O(N) characters (asyncio's default is 64 KiB)
+STREAM_LIMIT = 1 << 26
+
+
+def _reap(proc: subprocess.Popen, watch: RssWatch) -> "asyncio.Future[Dict[str, Any]]":
+    """Resource usage of `proc` once it exits, from a wait4 in a helper thread"""
+    loop = asyncio.get_running_loop()
+    fut: "asyncio.Future[Dict[str, Any]]" = loop.create_future()
+
+    def wait() -> None:
+        usage = wait_with_usage(proc, watch)
+        loop.call_soon_threadsafe(lambda: fut.done() or fut.set_result(usage))
+
+    threading.Thread(target=wait, daemon=True).start()
+    return fut
+
+
+async def _pipe_reader(pipe: Any) -> Tuple[asyncio.StreamReader, asyncio.BaseTransport]:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=STREAM_LIMIT)
+    transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader, transport
+
+
+async def run_minizinc_async(
+    model_path: Path,
+    dzn_path: Optional[Path],
+    solver: Optional[str] = "gecode",
+    timeout_s: Optional[float] = None,
+    *,
+    all_solutions: bool = False,
+    num_solutions: Optional[int] = None,
+    stop_on_first_valid: bool = True,
+    hard_timeout_s: Optional[float] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+    statistics: bool = True,
+    max_memory_mb: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    asyncio counterpart of run_minizinc_streaming, with the same result dict (so it feeds
+    write_run_logs and the suite rows unchanged).
+
+    With statistics, a single-solution run gets up to STATS_GRACE_S after its first valid
+    solution to print MiniZinc's statistics before the kill.
+
+    `semaphore` bounds how many MiniZinc processes run at once; time_s starts once a slot is
+    acquired. The wall-clock hard timeout (default: time limit + 10 s grace) kills the whole
+    process group, so a hung flattener or solver can't stall the event loop's other runs.
+
+    The child is spawned with Popen and reaped with wait4 on a helper thread (asyncio's child
+    watcher would reap it first and drop its rusage), so resource usage and max_memory_mb
+    work as in run_minizinc_streaming.
+    """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(1)
+    cmd = minizinc_cmd(model_path, dzn_path, solver, timeout_s, all_solutions, num_solutions, statistics)
+    drain_for_stats = statistics and not all_solutions and num_solutions in (None, 1)
+    if hard_timeout_s is None and timeout_s is not None:
+        hard_timeout_s = timeout_s + HARD_TIMEOUT_GRACE_S
+
+    parser = SolutionStreamParser()
+    first: Optional[Solution] = None
+    last: Optional[Solution] = None
+    time_to_first: Optional[float] = None
+    stopped = timed_out = False
+
+    async with semaphore:
+        with timer() as t:
+            proc = subprocess.Popen(
+                memory_limited(cmd, max_memory_mb),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+            )
+            watch = RssWatch(proc.pid)
+            exited = _reap(proc, watch)
+            stdout, out_transport = await _pipe_reader(proc.stdout)
+            stderr_reader, err_transport = await _pipe_reader(proc.stderr)
+            err_task = asyncio.ensure_future(stderr_reader.read())
+
+            async def read_stdout() -> None:
+                nonlocal first, last, time_to_first
+                async for raw in stdout:
+                    sol = parser.feed(raw.decode("utf-8", "replace").rstrip("\r\n"))
+                    if sol is None:
+                        continue
+                    last = sol
+                    if first is None and sol.is_valid():
+                        first = sol
+                        time_to_first = t()
+                        if stop_on_first_valid:
+                            return
+
+            try:
+                await asyncio.wait_for(read_stdout(), hard_timeout_s)
+                if first is not None and stop_on_first_valid:
+                    stopped = True
+                    if drain_for_stats:
+                        # give a single-solution run a moment to print its statistics block
+                        grace = STATS_GRACE_S if hard_timeout_s is None else min(STATS_GRACE_S, max(0.0, hard_timeout_s - t()))
+                        stopped = not await _drain(stdout, parser, grace)
+            except asyncio.TimeoutError:
+                timed_out = True
+            except asyncio.CancelledError:
+                kill_group(proc, watch)
+                await asyncio.shield(exited)
+                out_transport.close()
+                err_transport.close()
+                raise
+
+            if stopped or timed_out:
+                kill_group(proc, watch)
+            usage = await exited
+            try:
+                stderr = (await asyncio.wait_for(err_task, 5)).decode("utf-8", "replace")
+            except asyncio.TimeoutError:
+                stderr = ""
+            out_transport.close()
+            err_transport.close()
+            elapsed = t()
+
+    solution = first or last
+    return {
+        "ok": proc.returncode == 0 or first is not None,
+        "returncode": proc.returncode,
+        "stdout": "\n".join(parser.extra_lines),
+        "stderr": stderr,
+        "time_s": elapsed,
+        "time_to_first_s": time_to_first,
+        "cmd": " ".join(cmd),
+        "solution": solution,
+        "num_solutions": parser.num_solutions,
+        "status": parser.status,
+        "stopped_early": stopped,
+        "timed_out": timed_out,
+        "stats": parser.stats,
+        "memory_limit_hit": first is None and hit_memory_limit(max_memory_mb, proc.returncode, stderr, stopped or timed_out),
+        **usage,
+    }
+
+
+async def _drain(stdout: asyncio.StreamReader, parser: SolutionStreamParser, grace_s: float) -> bool:
+    """Keep feeding stdout lines to the parser until EOF (True) or grace_s passes (False)"""
+    async def rest() -> None:
+        async for raw in stdout:
+            parser.feed(raw.decode("utf-8", "replace").rstrip("\r\n"))
+
+    try:
+        await asyncio.wait_for(rest(), grace_s)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+async def _gather(
+    runs: Sequence[Tuple[Path, Optional[Path]]], max_concurrency: int, kwargs: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    sem = asyncio.Semaphore(max_concurrency)
+    return list(await asyncio.gather(*(run_minizinc_async(m, d, semaphore=sem, **kwargs) for m, d in runs)))
+
+
+def run_minizinc_many(
+    runs: Sequence[Tuple[Path, Optional[Path]]],
+    max_concurrency: int = 4,
+    **kwargs: Any,
+) -> List[Dict[str, Any]]:
+    """Run (model, dzn) pairs from one event loop, at most max_concurrency at a time; results in input order"""
+    return asyncio.run(_gather(runs, max_concurrency, kwargs))
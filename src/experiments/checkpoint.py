@@ -0,0 +1,167 @@
+from __future__ import annotations
+import csv
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+
+# (approach, solver, n, trial) as written in the results
+RowKey = Tuple[str, str, int, int]
+
+
+def row_key(row: Dict[str, Any]) -> RowKey:
+    return (str(row["approach"]), str(row["solver"]), int(row["n"]), int(row["trial"]))
+
+
+def manifest_path(out_csv: Path) -> Path:
+    return out_csv.with_name(out_csv.stem + ".manifest.json")
+
+
+def manifest_log_path(out_csv: Path) -> Path:
+    return out_csv.with_name(out_csv.stem + ".manifest.log")
+
+
+class RunCheckpoint:
+    """
+    Incremental persistence of a suite run: every row is appended to the CSV and flushed as soon
+    as it is produced, and a manifest next to it records the run config, the completed
+    (approach, solver, N, trial) keys and the first failing N per approach.
+
+    Rows finished during the run go to a line log next to the manifest (one fsynced JSON line
+    each, so the cost per row doesn't grow with the run); the log is folded into the manifest
+    on close and on resume.
+
+    With resume=True an existing manifest/CSV pair is picked up instead of being truncated;
+    the config must match the one recorded (N values may differ, so a resumed run can extend
+    the sweep) and the recorded run_id is kept.
+    """
+
+    def __init__(
+        self,
+        out_csv: Path,
+        columns: Sequence[str],
+        config: Dict[str, Any],
+        resume: bool = False,
+        run_id: Optional[str] = None,
+    ) -> None:
+        self.out_csv = out_csv
+        self.path = manifest_path(out_csv)
+        self.log_path = manifest_log_path(out_csv)
+        self.columns = list(columns)
+        self._lock = threading.Lock()
+        self.completed: Set[RowKey] = set()
+        self.failed_at: Dict[str, int] = {}
+        self.previous_rows: List[Dict[str, Any]] = []
+        self.run_id = run_id
+
+        out_csv.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            manifest = json.loads(self.path.read_text(encoding="utf-8"))
+            if manifest["config"] != config:
+                raise ValueError(
+                    f"Cannot resume {out_csv}: run config differs from the manifest "
+                    f"({manifest['config']} vs {config})"
+                )
+            self.completed = {tuple(k) for k in manifest["completed"]}  # type: ignore[misc]
+            self.failed_at = dict(manifest["failed_at"])
+            self.run_id = manifest.get("run_id") or run_id
+            self._replay_log()
+            if out_csv.exists() and out_csv.stat().st_size > 0:
+                df = pd.read_csv(out_csv)
+                # keep only rows the manifest vouches for (a crash can leave a half-written line)
+                self.previous_rows = [r for r in df.to_dict("records") if row_key(r) in self.completed]
+        self.config = config
+        self._fh = _CsvAppender(out_csv, self.columns, self.previous_rows)
+        self._save()
+        self._log = self.log_path.open("w", encoding="utf-8")
+
+    def is_done(self, keys: Iterable[RowKey]) -> bool:
+        return all(k in self.completed for k in keys)
+
+    def append(self, row: Dict[str, Any]) -> None:
+        """Persist one finished row (thread-safe: pool and event-loop callbacks may interleave)"""
+        with self._lock:
+            self._fh.write_row(row)
+            key = row_key(row)
+            self._log.write(json.dumps([*key, bool(row.get("valid"))]) + "\n")
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._record(key, bool(row.get("valid")))
+
+    def _record(self, key: RowKey, valid: bool) -> None:
+        self.completed.add(key)
+        if not valid:
+            name, n = key[0], key[2]
+            self.failed_at[name] = min(n, self.failed_at.get(name, n))
+
+    def _replay_log(self) -> None:
+        """Fold the rows logged since the manifest was last written back in (a torn last line is skipped)"""
+        if not self.log_path.exists():
+            return
+        for line in self.log_path.read_text(encoding="utf-8").splitlines():
+            try:
+                approach, solver, n, trial, valid = json.loads(line)
+            except ValueError:
+                continue
+            self._record((str(approach), str(solver), int(n), int(trial)), bool(valid))
+
+    def beyond_failure(self, row: Dict[str, Any]) -> bool:
+        name = str(row["approach"])
+        return name in self.failed_at and int(row["n"]) > self.failed_at[name]
+
+    def close(self) -> None:
+        """Compact: write the manifest with every logged row and drop the log"""
+        with self._lock:
+            self._fh.close()
+            if self._log.closed:
+                return
+            self._log.close()
+            self._save()
+            self.log_path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        manifest = {
+            "run_id": self.run_id,
+            "config": self.config,
+            "completed": sorted(list(k) for k in self.completed),
+            "failed_at": self.failed_at,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class _CsvAppender:
+    """CSV writer that flushes (and fsyncs) after every row"""
+
+    def __init__(self, path: Path, columns: List[str], rows: List[Dict[str, Any]]) -> None:
+        # header + carried-over rows go to a temp file that atomically replaces the old CSV
+        tmp = path.with_name(path.name + ".tmp")
+        self._f = tmp.open("w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=columns, extrasaction="ignore")
+        self._w.writeheader()
+        for row in rows:
+            self._w.writerow({k: _cell(v) for k, v in row.items()})
+        self._flush()
+        os.replace(tmp, path)
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        self._w.writerow({k: _cell(v) for k, v in row.items()})
+        self._flush()
+
+    def _flush(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _cell(value: Any) -> Optional[Any]:
+    # NaN from a resumed CSV and None both become empty cells
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return value
@@ -1,17 +1,25 @@
 from __future__ import annotations
 
 from pathlib import Path
+from typing import List
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from src.experiments.store import read_table
 
-def plot_runtime(summary_csv: Path, out_png: Path) -> None:
-    s = pd.read_csv(summary_csv)
 
-    # Ensure numeric
-    s["n"] = pd.to_numeric(s["n"], errors="coerce")
-    s["time_median"] = pd.to_numeric(s["time_median"], errors="coerce")
-    s["time_p90"] = pd.to_numeric(s["time_p90"], errors="coerce")
+def load_summary(summary: Path, columns: List[str]) -> pd.DataFrame:
+    """Only the columns a plot needs; summary.parquet is already typed, a CSV gets coerced"""
+    s = read_table(summary, columns)
+    if summary.suffix != ".parquet":
+        for c in s.columns:
+            if c != "approach":
+                s[c] = pd.to_numeric(s[c], errors="coerce")
+    return s
+
+
+def plot_runtime(summary_csv: Path, out_png: Path) -> None:
+    s = load_summary(summary_csv, ["approach", "n", "time_median"])
 
     # Plot one line per approach
     plt.figure(figsize=(12, 6))
@@ -27,11 +35,41 @@ def plot_runtime(summary_csv: Path, out_png: Path) -> None:
     plt.savefig(out_png, dpi=200, bbox_inches="tight")
     plt.close()
 
-def plot_success_rate(summary_csv: Path, out_png: Path) -> None:
-    s = pd.read_csv(summary_csv)
+# Phase means stacked in the breakdown plot (summary column -> legend label)
+PHASES = {
+    "build_time_mean": "build",
+    "flatten_time_mean": "flatten",
+    "solve_time_mean": "solve",
+    "decode_time_mean": "decode",
+    "validate_time_mean": "validate",
+}
+
+
+def plot_phase_breakdown(summary_csv: Path, out_png: Path) -> None:
+    """Mean time per phase vs N, one stacked panel per approach"""
+    s = load_summary(summary_csv, ["approach", "n"] + list(PHASES))
+    phases = [c for c in PHASES if c in s.columns]
+    approaches = sorted(s["approach"].dropna().unique())
+    if not phases or not approaches:
+        return
+
+    fig, axes = plt.subplots(len(approaches), 1, figsize=(12, 2.8 * len(approaches)), squeeze=False)
+    for ax, approach in zip(axes[:, 0], approaches):
+        sub = s[s["approach"] == approach].sort_values("n")
+        ax.stackplot(sub["n"], *(sub[c].fillna(0.0) for c in phases), labels=[PHASES[c] for c in phases])
+        ax.set_title(approach, fontsize=11)
+        ax.set_ylabel("Mean time (s)")
+    axes[-1, 0].set_xlabel("N", fontsize=12)
+    axes[0, 0].legend(loc="upper left", fontsize=9, ncol=len(phases))
+    fig.suptitle("Where the time goes: per-phase breakdown vs N", fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    out_png.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(out_png, dpi=200, bbox_inches="tight")
+    plt.close(fig)
 
-    s["n"] = pd.to_numeric(s["n"], errors="coerce")
-    s["valid_rate"] = pd.to_numeric(s["valid_rate"], errors="coerce")
+
+def plot_success_rate(summary_csv: Path, out_png: Path) -> None:
+    s = load_summary(summary_csv, ["approach", "n", "valid_rate"])
 
     plt.figure()
     for approach in sorted(s["approach"].dropna().unique()):
@@ -53,17 +91,16 @@ def plot_failure_threshold(summary_csv: Path, out_png: Path) -> None:
     Plot success/failure for each tested N value per approach.
     Shows discrete tested N values with clear success/failure indicators.
     """
-    s = pd.read_csv(summary_csv)
-
-    # Ensure numeric
-    s["n"] = pd.to_numeric(s["n"], errors="coerce")
-    s["valid_rate"] = pd.to_numeric(s["valid_rate"], errors="coerce")
+    s = load_summary(summary_csv, ["approach", "n", "valid_rate"])
 
     # Create readable labels
     label_map = {
         "cp_boolean": "CP Boolean",
         "cp_integer_alldiff": "CP Integer",
         "qubo_amplify": "QUBO Amplify",
+        "qubo_local_sa": "QUBO Local SA",
+        "heuristic_minconflicts": "Min-conflicts",
+        "explicit_construction": "Explicit",
     }
 
     # Get all tested N values (sorted, unique)
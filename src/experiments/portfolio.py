@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import multiprocessing as mp
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config import PATHS
+from src.cp.run_minizinc import write_dzn
+from src.cp.run_minizinc_async import run_minizinc_async
+from src.utils.solution import Solution
+from src.utils.timing import timer
+from src.utils.validate import is_valid_q
+
+# CP engines are "<model>:<solver>"
+CP_MODELS = {
+    "cp_boolean": "boolean_cp.mzn",
+    "cp_integer": "integer_alldiff_cp.mzn",
+}
+# MiniZinc solvers a default portfolio races when installed
+CP_SOLVERS = ("gecode", "chuffed", "cp-sat")
+# Engines that run as Python code in a child process (killed when another engine wins)
+PROCESS_ENGINES = ("qubo_local_sa", "heuristic", "explicit")
+
+DEFAULT_WIN_LOG = PATHS.results / "portfolio_wins.jsonl"
+
+
+@functools.lru_cache(maxsize=None)
+def installed_solvers() -> Tuple[str, ...]:
+    """The CP_SOLVERS that `minizinc --solvers-json` reports (empty without MiniZinc)"""
+    try:
+        proc = subprocess.run(["minizinc", "--solvers-json"], capture_output=True, text=True, timeout=30)
+        solvers = json.loads(proc.stdout)
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return ()
+    names = set()
+    for s in solvers:
+        names.update(str(t).lower() for t in s.get("tags", []))
+        names.add(str(s.get("id", "")).rsplit(".", 1)[-1].lower())
+    return tuple(name for name in CP_SOLVERS if name in names)
+
+
+def default_portfolio() -> List[str]:
+    """Both CP models on every installed solver, the local QUBO annealer and min-conflicts"""
+    return [f"{model}:{solver}" for model in CP_MODELS for solver in installed_solvers()] + ["qubo_local_sa", "heuristic"]
+
+
+def check_engine(engine: str) -> None:
+    model, _, solver = engine.partition(":")
+    if engine in PROCESS_ENGINES or (model in CP_MODELS and solver):
+        return
+    raise ValueError(
+        f"Unknown engine {engine!r} (expected <{'|'.join(CP_MODELS)}>:<solver> or one of {list(PROCESS_ENGINES)})"
+    )
+
+
+def _solve_in_process(engine: str, n: int, timeout_s: float, seed: Optional[int]) -> Optional[List[int]]:
+    """Run a Python engine; returns its 0-indexed q-vector (or None)"""
+    if engine == "qubo_local_sa":
+        from src.qubo.solve_local import solve_with_local_sa
+        r = solve_with_local_sa(n=n, timeout_s=timeout_s, seed=seed)
+    elif engine == "heuristic":
+        from src.heuristic.min_conflicts import min_conflicts
+        r = min_conflicts(n, seed=seed)
+    else:
+        from src.heuristic.explicit import solve_explicit
+        r = solve_explicit(n)
+    return r["solution"].to_list() if r.get("solution") is not None else None
+
+
+def _child(conn: Any, engine: str, n: int, timeout_s: float, seed: Optional[int]) -> None:
+    try:
+        conn.send(_solve_in_process(engine, n, timeout_s, seed))
+    finally:
+        conn.close()
+
+
+def _receive(conn: Any) -> Optional[List[int]]:
+    """Blocking read of a child's answer; EOF (child killed or crashed) reads as no answer"""
+    try:
+        return conn.recv()
+    except EOFError:
+        return None
+    finally:
+        conn.close()
+
+
+async def _run_process_engine(engine: str, n: int, timeout_s: float, seed: Optional[int]) -> Optional[Solution]:
+    ctx = mp.get_context()
+    recv_end, send_end = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(send_end, engine, n, timeout_s, seed), daemon=True)
+    proc.start()
+    send_end.close()
+    try:
+        q = await asyncio.to_thread(_receive, recv_end)
+    finally:
+        if proc.is_alive():
+            proc.kill()
+        await asyncio.to_thread(proc.join)
+    return Solution(q) if q is not None else None
+
+
+async def _run_cp_engine(engine: str, n: int, timeout_s: float, dzn: Path) -> Optional[Solution]:
+    model, _, solver = engine.partition(":")
+    r = await run_minizinc_async(
+        PATHS.models / CP_MODELS[model], dzn, solver=solver, timeout_s=timeout_s, statistics=False,
+    )
+    return r["solution"]
+
+
+async def race(
+    n: int,
+    engines: Sequence[str],
+    timeout_s: float = 60.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Start every engine on N at once and return the first answer that passes validation.
+
+    Each answer is checked with is_valid_q as it arrives; invalid or empty answers just drop
+    that engine out. Once one is valid (or timeout_s passes) the others are cancelled: CP
+    runs get their MiniZinc process group killed, Python engines their child process.
+    Returns {"n", "winner", "solution", "time_s", "engines": {engine: {"status", "time_s"}}}
+    with status won / valid (finished valid in the same instant) / invalid / error / cancelled.
+    """
+    for engine in engines:
+        check_engine(engine)
+    dzn = PATHS.instances / f"nqueens_portfolio_{n}.dzn"
+    if any(e not in PROCESS_ENGINES for e in engines):
+        write_dzn(dzn, n)
+
+    def start(engine: str) -> "asyncio.Future[Optional[Solution]]":
+        if engine in PROCESS_ENGINES:
+            return asyncio.ensure_future(_run_process_engine(engine, n, timeout_s, seed))
+        return asyncio.ensure_future(_run_cp_engine(engine, n, timeout_s, dzn))
+
+    outcome: Dict[str, Dict[str, Any]] = {e: {"status": "cancelled", "time_s": None} for e in engines}
+    winner: Optional[str] = None
+    solution: Optional[Solution] = None
+    with timer() as t:
+        tasks = {start(e): e for e in engines}
+        pending = set(tasks)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, timeout_s - t()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    engine = tasks[task]
+                    if task.exception() is not None:
+                        outcome[engine] = {"status": "error", "time_s": t()}
+                        continue
+                    sol = task.result()
+                    valid = sol is not None and len(sol) == n and is_valid_q(sol.to_list(), base=0)
+                    status = ("won" if winner is None else "valid") if valid else "invalid"
+                    outcome[engine] = {"status": status, "time_s": t()}
+                    if status == "won":
+                        winner, solution = engine, sol
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        elapsed = t()
+
+    return {
+        "n": n,
+        "winner": winner,
+        "solution": solution,
+        "time_s": outcome[winner]["time_s"] if winner is not None else elapsed,
+        "engines": outcome,
+    }
+
+
+def solve_portfolio(
+    n: int,
+    engines: Optional[Sequence[str]] = None,
+    timeout_s: float = 60.0,
+    seed: Optional[int] = None,
+    log_path: Optional[Path] = DEFAULT_WIN_LOG,
+) -> Dict[str, Any]:
+    """race() with the default portfolio unless `engines` is given; appends the outcome to log_path"""
+    result = asyncio.run(race(n, list(engines) if engines else default_portfolio(), timeout_s=timeout_s, seed=seed))
+    if log_path is not None:
+        log_race(result, log_path)
+    return result
+
+
+def log_race(result: Dict[str, Any], log_path: Path = DEFAULT_WIN_LOG) -> None:
+    """One JSON line per race: N, winner, its time and every engine's outcome"""
+    entry = {
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "n": result["n"],
+        "winner": result["winner"],
+        "time_s": result["time_s"],
+        "engines": result["engines"],
+    }
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with log_path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+
+
+def win_stats(log_path: Path = DEFAULT_WIN_LOG, n: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Per engine: races entered, wins and mean winning time, over every logged race (or those
+    for one N). Engines that never win at the N values you care about can be dropped.
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    if not log_path.exists():
+        return stats
+    with log_path.open(encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if n is not None and entry["n"] != n:
+                continue
+            for engine in entry["engines"]:
+                s = stats.setdefault(engine, {"races": 0, "wins": 0, "win_time_s": 0.0})
+                s["races"] += 1
+                if entry["winner"] == engine:
+                    s["wins"] += 1
+                    s["win_time_s"] += entry["time_s"]
+    for s in stats.values():
+        s["win_time_s"] = s["win_time_s"] / s["wins"] if s["wins"] else None
+    return stats
@@ -1,16 +1,496 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
 
 import pandas as pd
 
 from src.config import PATHS
-from src.cp.run_minizinc import run_minizinc, write_dzn
-from src.cp.parse_minizinc import parse_q_from_stdout, parse_board_from_stdout
+from src.cp.compile_cache import FznCache, run_minizinc_cached
+from src.cp.result_cache import CpResultCache
+from src.cp.run_minizinc import run_minizinc_streaming, write_dzn
+from src.cp.run_minizinc_async import run_minizinc_async
 from src.cp.logging import write_run_logs
-from src.utils.validate import board_from_q, is_valid_positions, is_valid_board_x
-from src.qubo.solve_amplify import solve_with_amplify
+from src.experiments.checkpoint import RowKey, RunCheckpoint, row_key
+from src.experiments.store import DEFAULT_STORE_DIR, RESULT_SCHEMA, write_run
+from src.experiments.scheduler import Unit, run_units, run_units_async
+from src.experiments.threshold import ThresholdSearch, search_thresholds
+from src.experiments.tune_weights import DEFAULT_WEIGHT_TABLE, load_weight_table, weight_table_key, weights_for
+from src.qubo.cache import QuboModelCache, cached_matrix
+from src.qubo.encodings import check_encoding
+from src.qubo.trials import run_trials
+from src.heuristic.explicit import explicit_q, solve_explicit
+from src.heuristic.min_conflicts import min_conflicts
+from src.utils.resources import USAGE_COLUMNS, traced_peak
+from src.utils.solution import Solution
+from src.utils.timing import PhaseTimer, timer
+
+
+QUBO_APPROACHES = {
+    "amplify_ae": "qubo_amplify",
+    "local_sa": "qubo_local_sa",
+}
+
+# Column order of the raw results; approaches leave columns they don't produce as None
+RESULT_COLUMNS = RESULT_SCHEMA.names
+
+# Approach keys in per-N execution order
+APPROACH_KEYS = ["cp_boolean", "cp_integer", "qubo", "explicit", "heuristic"]
+CP_KEYS = ("cp_boolean", "cp_integer")
+
+
+def _row(**fields: Any) -> Dict[str, Any]:
+    """
+    Result row with every column present so the schema stays aligned across approaches.
+
+    failure_reason is None for valid rows; approaches that can tell more (CP: memory_limit,
+    timeout, unsatisfiable, error) set it, otherwise it is "invalid" (an answer that fails
+    validation) or "no_solution".
+    """
+    row: Dict[str, Any] = dict.fromkeys(RESULT_COLUMNS)
+    row.update(fields)
+    if row["failure_reason"] is None and row["valid"] is False:
+        row["failure_reason"] = "invalid" if row["ok"] else "no_solution"
+    return row
+
+
+def _parsed(solution: Optional[Solution], valid: bool) -> Dict[str, Any]:
+    """Parsed part of a run log: the 1-indexed q-vector instead of a dense board"""
+    return {"q": solution.to_q1() if solution is not None else None, "valid": bool(valid)}
+
+
+def _qubo_solver(name: str):
+    """Resolve a QUBO solver lazily so local runs don't need the amplify SDK installed"""
+    if name == "amplify_ae":
+        from src.qubo.solve_amplify import solve_with_amplify
+        return solve_with_amplify
+    if name == "local_sa":
+        from src.qubo.solve_local import solve_with_local_sa
+        return solve_with_local_sa
+    raise ValueError(f"Unknown QUBO solver: {name!r} (expected one of {sorted(QUBO_APPROACHES)})")
+
+
+@dataclass
+class SuiteConfig:
+    """Settings shared by every unit of a suite run (shipped to worker processes as-is)"""
+    cp_timeout_s: int = 60
+    solver_cp: str = "gecode"
+    qubo_solver: str = "amplify_ae"
+    qubo_seed: Optional[int] = None
+    qubo_trials: int = 10
+    qubo_num_reads: int = 100
+    qubo_timeout_s: float = 1.0
+    w_row: float = 5.0
+    w_col: float = 5.0
+    w_diag: float = 1.0
+    # tuned {str(N): {w_row, w_col, w_diag}}; N values it doesn't cover use their nearest tuned N
+    qubo_weights: Optional[Dict[str, Dict[str, float]]] = None
+    qubo_encoding: str = "penalty"
+    qubo_cache: Optional[QuboModelCache] = None
+    qubo_disk_dir: Optional[Path] = None
+    qubo_in_flight: int = 0
+    heuristic_seed: Optional[int] = None
+    warm_start: bool = False
+    fzn_cache: Optional[FznCache] = None
+    result_cache: Optional[CpResultCache] = None
+    cp_max_memory_mb: Optional[int] = None
+    trace_memory: bool = False
+    logs_dir: Path = PATHS.results / "logs"
+
+
+def approach_name(key: str, cfg: SuiteConfig) -> str:
+    """Approach label written to the results for an approach key"""
+    return {
+        "cp_boolean": "cp_boolean",
+        "cp_integer": "cp_integer_alldiff",
+        "qubo": QUBO_APPROACHES[cfg.qubo_solver] + ("" if cfg.qubo_encoding == "penalty" else f"_{cfg.qubo_encoding}"),
+        "explicit": "explicit_construction",
+        "heuristic": "heuristic_minconflicts",
+    }[key]
+
+
+def approach_solver(key: str, cfg: SuiteConfig) -> str:
+    """Solver column written for an approach key"""
+    return {
+        "cp_boolean": cfg.solver_cp,
+        "cp_integer": cfg.solver_cp,
+        "qubo": cfg.qubo_solver,
+        "explicit": "explicit",
+        "heuristic": "min_conflicts",
+    }[key]
+
+
+def unit_keys(unit: Unit, cfg: SuiteConfig) -> List[RowKey]:
+    """(approach, solver, N, trial) keys of the rows a unit produces"""
+    batched = unit.approach == "qubo" and cfg.qubo_in_flight > 0
+    trials = range(int(cfg.qubo_trials)) if batched else [unit.trial]
+    return [(approach_name(unit.approach, cfg), approach_solver(unit.approach, cfg), unit.n, t) for t in trials]
+
+
+# SuiteConfig fields that change results; a run can only be resumed with the same values
+RESUME_FIELDS = (
+    "cp_timeout_s", "solver_cp", "qubo_solver", "qubo_seed", "qubo_trials", "qubo_num_reads",
+    "qubo_timeout_s", "w_row", "w_col", "w_diag", "qubo_weights", "qubo_encoding", "heuristic_seed", "warm_start", "cp_max_memory_mb",
+)
+
+
+# Per-process QUBO model cache used when the config doesn't carry one (pool workers)
+_PROCESS_QUBO_CACHE: Optional[QuboModelCache] = None
+
+
+def _process_qubo_cache(disk_dir: Optional[Path]) -> QuboModelCache:
+    global _PROCESS_QUBO_CACHE
+    if _PROCESS_QUBO_CACHE is None:
+        _PROCESS_QUBO_CACHE = QuboModelCache(disk_dir=disk_dir)
+    return _PROCESS_QUBO_CACHE
+
+
+def _instance(unit: Unit, hint: Optional[Any] = None) -> Path:
+    """Per-task instance file, so concurrent units never share a .dzn"""
+    dzn = PATHS.instances / f"nqueens_{unit.approach}_{unit.n}_{unit.trial}.dzn"
+    write_dzn(dzn, unit.n, hint=hint)
+    return dzn
+
+
+def _cp_inputs(unit: Unit, cfg: SuiteConfig) -> Tuple[Path, Path, Optional[Any], float]:
+    """(model, instance file, warm-start hint, instance build time)"""
+    with timer() as t:
+        if unit.approach == "cp_boolean":
+            model, hint = PATHS.models / "boolean_cp.mzn", None
+        else:
+            hint = explicit_q(unit.n) if cfg.warm_start and unit.n >= 4 else None
+            model = PATHS.models / ("integer_alldiff_warm_cp.mzn" if hint is not None else "integer_alldiff_cp.mzn")
+        dzn = _instance(unit, hint)
+        return model, dzn, hint, t()
+
+
+def _cp_failure(r: Dict[str, Any], valid: bool) -> Optional[str]:
+    if valid:
+        return None
+    if r.get("memory_limit_hit"):
+        return "memory_limit"
+    if r["timed_out"] or r.get("status") == "UNKNOWN":
+        return "timeout"
+    if r.get("status") == "UNSATISFIABLE":
+        return "unsatisfiable"
+    return "invalid" if r["ok"] else "error"
+
+
+def _cp_row(
+    unit: Unit,
+    cfg: SuiteConfig,
+    r: Dict[str, Any],
+    hint: Optional[Any],
+    build_time: float,
+    result_cache_hit: Optional[bool] = None,
+) -> Dict[str, Any]:
+    phases = PhaseTimer()
+    with phases.phase("validate"):
+        sol = r["solution"] if r["ok"] else None
+        valid = sol is not None and sol.is_valid()
+    # MiniZinc's own flatTime/solveTime; the FlatZinc cache measures flattening itself
+    stats = r.get("stats") or {}
+    flatten_time = r.get("flatten_time_s")
+
+    approach = approach_name(unit.approach, cfg)
+    write_run_logs(approach, unit.n, r, parsed=_parsed(sol, valid), logs_directory=cfg.logs_dir)
+
+    return _row(
+        approach=approach,
+        solver=cfg.solver_cp,
+        n=unit.n,
+        trial=0,
+        ok=bool(r["ok"]),
+        valid=bool(valid),
+        time_s=float(r["time_s"]),
+        returncode=r["returncode"],
+        timeout_s=cfg.cp_timeout_s,
+        time_to_first_s=r["time_to_first_s"],
+        timed_out=r["timed_out"],
+        build_time_s=build_time,
+        flatten_time_s=flatten_time if flatten_time is not None else stats.get("flatTime"),
+        solve_time_s=stats.get("solveTime", r.get("solve_time_s")),
+        validate_time_s=phases.get("validate"),
+        nodes=stats.get("nodes"),
+        failures=stats.get("failures"),
+        propagations=stats.get("propagations"),
+        fzn_cache_hit=r.get("fzn_cache_hit"),
+        warm_start=hint is not None if unit.approach == "cp_integer" else None,
+        result_cache_hit=result_cache_hit,
+        max_memory_mb=cfg.cp_max_memory_mb,
+        failure_reason=_cp_failure(r, valid),
+        **{k: r.get(k) for k in USAGE_COLUMNS},
+    )
+
+
+def _cached_cp_run(cfg: SuiteConfig, model: Path, dzn: Path) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """(result cache key, cached run or None); key is None when the result cache is off"""
+    if cfg.result_cache is None:
+        return None, None
+    key = cfg.result_cache.key(model, dzn, cfg.solver_cp, cfg.cp_timeout_s, cfg.cp_max_memory_mb)
+    return key, cfg.result_cache.get(key)
+
+
+def _run_cp(unit: Unit, cfg: SuiteConfig) -> Dict[str, Any]:
+    model, dzn, hint, build_time = _cp_inputs(unit, cfg)
+    key, r = _cached_cp_run(cfg, model, dzn)
+    if r is not None:
+        return _cp_row(unit, cfg, r, hint, build_time, result_cache_hit=True)
+    limits = dict(solver=cfg.solver_cp, timeout_s=cfg.cp_timeout_s, max_memory_mb=cfg.cp_max_memory_mb)
+    if cfg.fzn_cache is not None:
+        r = run_minizinc_cached(model, dzn, cfg.fzn_cache, **limits)
+    else:
+        r = run_minizinc_streaming(model, dzn, **limits)
+    if key is not None:
+        cfg.result_cache.put(key, r, cfg.cp_timeout_s)
+    return _cp_row(unit, cfg, r, hint, build_time, result_cache_hit=False if key is not None else None)
+
+
+async def _run_cp_async(unit: Unit, cfg: SuiteConfig, sem: asyncio.Semaphore) -> Dict[str, Any]:
+    try:
+        model, dzn, hint, build_time = _cp_inputs(unit, cfg)
+        key, r = _cached_cp_run(cfg, model, dzn)
+        if r is not None:
+            return _cp_row(unit, cfg, r, hint, build_time, result_cache_hit=True)
+        limits = dict(solver=cfg.solver_cp, timeout_s=cfg.cp_timeout_s, max_memory_mb=cfg.cp_max_memory_mb)
+        if cfg.fzn_cache is not None:
+            # flattening goes through the blocking cache; keep it off the loop but inside the limit
+            async with sem:
+                r = await asyncio.to_thread(run_minizinc_cached, model, dzn, cfg.fzn_cache, **limits)
+        else:
+            r = await run_minizinc_async(model, dzn, semaphore=sem, **limits)
+        if key is not None:
+            cfg.result_cache.put(key, r, cfg.cp_timeout_s)
+        return _cp_row(unit, cfg, r, hint, build_time, result_cache_hit=False if key is not None else None)
+    except Exception:
+        return _error_row(unit, cfg)
+
+
+async def _run_cp_units(
+    units: List[Unit],
+    cfg: SuiteConfig,
+    max_concurrency: int,
+    on_done: Callable[[Unit, Dict[str, Any]], None],
+    failed_at: Dict[str, int],
+) -> List[Dict[str, Any]]:
+    sem = asyncio.Semaphore(max_concurrency)
+    return await run_units_async(units, partial(_run_cp_async, cfg=cfg, sem=sem), on_done=on_done, failed_at=failed_at)
+
+
+def _qubo_kwargs(n: int, trial: int, cfg: SuiteConfig) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {"encoding": cfg.qubo_encoding}
+    if cfg.qubo_solver == "local_sa" and cfg.qubo_seed is not None:
+        kwargs["seed"] = cfg.qubo_seed + trial
+    if cfg.qubo_solver == "local_sa" and cfg.warm_start and n >= 4:
+        kwargs["initial_q"] = explicit_q(n)
+    return kwargs
+
+
+def _weights(n: int, cfg: SuiteConfig) -> Dict[str, float]:
+    return weights_for(cfg.qubo_weights, n, dict(w_row=cfg.w_row, w_col=cfg.w_col, w_diag=cfg.w_diag))
+
+
+def _run_qubo(unit: Unit, cfg: SuiteConfig) -> Dict[str, Any]:
+    n, trial = unit.n, unit.trial
+    cache = cfg.qubo_cache if cfg.qubo_cache is not None else _process_qubo_cache(cfg.qubo_disk_dir)
+    kwargs = _qubo_kwargs(n, trial, cfg)
+
+    r3 = _qubo_solver(cfg.qubo_solver)(
+        n=n,
+        num_reads=cfg.qubo_num_reads,
+        timeout_s=cfg.qubo_timeout_s,
+        cache=cache,
+        **_weights(n, cfg),
+        **kwargs,
+    )
+    return _qubo_row(n, trial, r3, cfg, cache, warm_start="initial_q" in kwargs)
+
+
+def _run_qubo_batch(unit: Unit, cfg: SuiteConfig) -> List[Dict[str, Any]]:
+    """All trials of one N in flight together (at most cfg.qubo_in_flight), sharing one model"""
+    n = unit.n
+    cache = cfg.qubo_cache if cfg.qubo_cache is not None else _process_qubo_cache(cfg.qubo_disk_dir)
+    weights = _weights(n, cfg)
+
+    if cfg.qubo_solver == "amplify_ae":
+        from src.qubo.solve_amplify import solve_trials_with_amplify
+
+        results = solve_trials_with_amplify(
+            n, cfg.qubo_trials, num_reads=cfg.qubo_num_reads, timeout_s=cfg.qubo_timeout_s,
+            cache=cache, max_in_flight=cfg.qubo_in_flight, encoding=cfg.qubo_encoding, **weights,
+        )
+    else:
+        cached_matrix(cache, n, encoding=cfg.qubo_encoding, **weights)  # build once before the threads race for it
+        solve = _qubo_solver(cfg.qubo_solver)
+        results = run_trials(
+            cfg.qubo_trials,
+            lambda trial: solve(
+                n=n, num_reads=cfg.qubo_num_reads, timeout_s=cfg.qubo_timeout_s,
+                cache=cache, **weights, **_qubo_kwargs(n, trial, cfg),
+            ),
+            lambda trial, r: r,
+            max_in_flight=cfg.qubo_in_flight,
+        )
+
+    warm = "initial_q" in _qubo_kwargs(n, 0, cfg)
+    return [_qubo_row(n, trial, r3, cfg, cache, warm_start=warm) for trial, r3 in enumerate(results)]
+
+
+def _qubo_row(
+    n: int, trial: int, r3: Dict[str, Any], cfg: SuiteConfig, cache: QuboModelCache, warm_start: bool
+) -> Dict[str, Any]:
+    stats = cache.stats()
+    weights = r3.get("weights") or _weights(n, cfg)
+    return _row(
+        approach=approach_name("qubo", cfg),
+        solver=cfg.qubo_solver,
+        n=n,
+        trial=trial,
+        ok=bool(r3.get("ok", False)),
+        valid=bool(r3.get("valid", False)),
+        time_s=r3.get("time_s"),
+        energy=r3.get("energy"),
+        success_rate=r3.get("success_rate"),
+        num_reads=r3.get("num_reads", cfg.qubo_num_reads),
+        timeout_s=r3.get("timeout_s", cfg.qubo_timeout_s),
+        w_row=weights.get("w_row"),
+        w_col=weights.get("w_col"),
+        w_diag=weights.get("w_diag"),
+        build_time_s=r3.get("build_time_s"),
+        cache_hit=r3.get("cache_hit"),
+        warm_start=warm_start,
+        time_to_first_s=r3.get("time_to_first_s"),
+        cache_hits=stats.get("cache_hits"),
+        cache_misses=stats.get("cache_misses"),
+        cache_time_saved_s=stats.get("cache_time_saved_s"),
+        solve_time_s=r3.get("time_s"),
+        decode_time_s=r3.get("decode_time_s"),
+        num_terms=r3.get("num_terms"),
+        num_variables=r3.get("num_variables"),
+        qubo_encoding=cfg.qubo_encoding,
+        client_time_s=r3.get("client_time_s"),
+        num_samples=r3.get("num_samples"),
+        energy_mean=r3.get("energy_mean"),
+        energy_median=r3.get("energy_median"),
+        energy_max=r3.get("energy_max"),
+        violations_min=r3.get("violations_min"),
+        violations_median=r3.get("violations_median"),
+        violation_hist=json.dumps(r3["violation_hist"]) if r3.get("violation_hist") else None,
+        error=r3.get("error"),
+    )
+
+
+def _run_explicit(unit: Unit, cfg: SuiteConfig) -> Dict[str, Any]:
+    r5 = solve_explicit(unit.n)
+    phases = PhaseTimer()
+    with phases.phase("validate"):
+        valid = r5["solution"] is not None and r5["solution"].is_valid()
+    return _row(
+        approach=approach_name("explicit", cfg),
+        solver="explicit",
+        n=unit.n,
+        trial=0,
+        ok=bool(r5["ok"]),
+        valid=valid,
+        time_s=float(r5["time_s"]),
+        build_time_s=float(r5["time_s"]),
+        validate_time_s=phases.get("validate"),
+    )
+
+
+def _run_heuristic(unit: Unit, cfg: SuiteConfig) -> Dict[str, Any]:
+    r4 = min_conflicts(unit.n, seed=cfg.heuristic_seed)
+    phases = PhaseTimer()
+    with phases.phase("validate"):
+        valid = bool(r4["ok"]) and r4["solution"].is_valid()
+    return _row(
+        approach=approach_name("heuristic", cfg),
+        solver="min_conflicts",
+        n=unit.n,
+        trial=0,
+        ok=bool(r4["ok"]),
+        valid=valid,
+        time_s=float(r4["time_s"]),
+        build_time_s=r4["init_time_s"],
+        solve_time_s=float(r4["time_s"]) - r4["init_time_s"],
+        validate_time_s=phases.get("validate"),
+        iterations=r4["iterations"],
+        restarts=r4["restarts"],
+        conflicts_trace=json.dumps(r4["conflicts_trace"]),
+    )
+
+
+def _error_row(unit: Unit, cfg: SuiteConfig) -> Dict[str, Any]:
+    return _row(
+        approach=approach_name(unit.approach, cfg),
+        solver=approach_solver(unit.approach, cfg),
+        n=unit.n,
+        trial=unit.trial,
+        ok=False,
+        valid=False,
+        error=traceback.format_exc(limit=5),
+        failure_reason="error",
+    )
+
+
+_RUNNERS = {
+    "cp_boolean": _run_cp,
+    "cp_integer": _run_cp,
+    "qubo": _run_qubo,
+    "explicit": _run_explicit,
+    "heuristic": _run_heuristic,
+}
+
+
+def _in_process(unit: Unit, cfg: SuiteConfig) -> bool:
+    """Units whose solver runs as Python code in this process (one unit at a time)"""
+    if unit.approach == "qubo":
+        return cfg.qubo_solver == "local_sa" and cfg.qubo_in_flight <= 0
+    return unit.approach in ("explicit", "heuristic")
+
+
+def run_unit(unit: Unit, cfg: SuiteConfig) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Run one (approach, N, trial) unit; errors become a failed row instead of killing the suite.
+
+    With cfg.trace_memory, in-process units record their peak Python allocation (py_peak_kb)
+    via tracemalloc, which also slows them down.
+    """
+    try:
+        if unit.approach == "qubo" and cfg.qubo_in_flight > 0:
+            return _run_qubo_batch(unit, cfg)
+        if not (cfg.trace_memory and _in_process(unit, cfg)):
+            return _RUNNERS[unit.approach](unit, cfg)
+        with traced_peak() as peak:
+            row = _RUNNERS[unit.approach](unit, cfg)
+        row["py_peak_kb"] = peak()
+        return row
+    except Exception:
+        return _error_row(unit, cfg)
+
+
+def suite_units(ns: List[int], cfg: SuiteConfig, approaches: Optional[List[str]] = None) -> List[Unit]:
+    """Units in serial execution order: by N, then approach, then trial (one batched QUBO unit per N with qubo_in_flight)"""
+    keys = [k for k in APPROACH_KEYS if approaches is None or k in approaches]
+    units: List[Unit] = []
+    for n in ns:
+        for key in keys:
+            trials = int(cfg.qubo_trials) if key == "qubo" and cfg.qubo_in_flight <= 0 else 1
+            units.extend(Unit(key, n, trial) for trial in range(trials))
+    return units
+
+
+def _print_done(unit: Unit, row: Dict[str, Any]) -> None:
+    trial = f" trial={row.get('trial')}" if unit.approach == "qubo" else ""
+    status = "OK" if row.get("valid") else "FAILED"
+    print(f"  N={unit.n:<6} {row['approach']:<24}{trial} {status} ({row.get('time_s') or 0.0:.3f}s)", flush=True)
 
 
 def run_suite(
@@ -20,12 +500,46 @@ def run_suite(
     cp_timeout_s: int = 60,
     solver_cp: str = "gecode",
     # QUBO settings
+    qubo_solver: str = "amplify_ae",
+    qubo_seed: Optional[int] = None,
     qubo_trials: int = 10,
     qubo_num_reads: int = 100,
     qubo_timeout_s: float = 1.0,
     w_row: float = 5.0,
     w_col: float = 5.0,
     w_diag: float = 1.0,
+    # Per-N weights from `tune-weights` (entries for qubo_solver override w_row/w_col/w_diag; None: don't load)
+    weight_table: Optional[Path] = DEFAULT_WEIGHT_TABLE,
+    # QUBO formulation (src.qubo.encodings.ENCODINGS); non-default ones get their own approach label
+    qubo_encoding: str = "penalty",
+    qubo_cache: Optional[QuboModelCache] = None,
+    # >0: send the trials of each N together, this many requests in flight
+    qubo_in_flight: int = 0,
+    # Heuristic settings
+    heuristic_seed: Optional[int] = None,
+    # Seed cp_integer and local QUBO reads with the explicit construction
+    warm_start: bool = False,
+    # Reuse compiled FlatZinc across runs (None: let MiniZinc flatten every time)
+    fzn_cache: Optional[FznCache] = None,
+    # Reuse finished CP runs with identical inputs (None: always run MiniZinc)
+    result_cache: Optional[CpResultCache] = None,
+    # Address-space cap per MiniZinc process (flattener and solver); over-limit runs fail as "memory_limit"
+    cp_max_memory_mb: Optional[int] = None,
+    # Record peak Python allocation of in-process approaches with tracemalloc (slows them down)
+    trace_memory: bool = False,
+    # Worker processes for independent (approach, N, trial) units
+    jobs: int = 1,
+    # >0: run the CP units from one asyncio event loop, this many MiniZinc processes at once
+    cp_concurrency: int = 0,
+    # Pick up out_csv and its manifest instead of starting over
+    resume: bool = False,
+    # Columnar store the finished run is written to (None: CSV only)
+    store_dir: Optional[Path] = DEFAULT_STORE_DIR,
+    run_id: Optional[str] = None,
+    # "grid": every N in `ns`; "threshold": search each approach's first failing N in [min(ns), n_max]
+    search: str = "grid",
+    n_max: int = 512,
+    growth: float = 2.0,
 ) -> pd.DataFrame:
     """
     Function to run all experiments until failure.
@@ -33,170 +547,164 @@ def run_suite(
     A model fails at N if:
     - CP: no valid solution within time limit
     - QUBO: valid_rate < 1.0 over trials
+    - Heuristic: min-conflicts did not reach zero conflicts within its iteration budget
+
+    Units run serially (jobs=1) or on a process pool; either way an approach stops at its
+    first failing N and the CSV is written in (N, approach, trial) order. With cp_concurrency > 0
+    the CP units instead run as asyncio subprocesses on a background event loop, overlapping
+    the other approaches.
+
+    Rows are appended to out_csv as they finish, with a manifest of completed
+    (approach, solver, N, trial) keys next to it; resume=True skips those units and restores
+    each approach's first failing N. The final CSV is rewritten in sorted order and the run
+    is written to the Parquet store under `run_id` (default: start timestamp).
+
+    With search="threshold" `ns` only sets the starting N: each approach grows N by `growth`
+    until it fails (or passes n_max), then bisects to its first failing N, independently of
+    the others. A probe's QUBO trials (qubo_trials) stop at the first invalid one.
+    QUBO models are memoized across trials in `qubo_cache` (one per worker process when jobs > 1).
+    If `weight_table` has entries for qubo_solver, each N uses the weights tuned for it (or for
+    the nearest tuned N) instead of w_row/w_col/w_diag.
     """
     PATHS.results.mkdir(parents=True, exist_ok=True)
+    _qubo_solver(qubo_solver)  # fail fast on an unknown solver name
+    check_encoding(qubo_encoding)
+    if search not in ("grid", "threshold"):
+        raise ValueError(f"Unknown search mode: {search!r} (expected 'grid' or 'threshold')")
+    if search == "threshold" and cp_concurrency > 0:
+        raise ValueError("cp_concurrency is not supported with search='threshold'")
 
-    logs_dir = PATHS.results / "logs"
-    dzn = PATHS.models / "nqueens.dzn"
+    cfg = SuiteConfig(
+        cp_timeout_s=cp_timeout_s,
+        solver_cp=solver_cp,
+        qubo_solver=qubo_solver,
+        qubo_seed=qubo_seed,
+        qubo_trials=qubo_trials,
+        qubo_num_reads=qubo_num_reads,
+        qubo_timeout_s=qubo_timeout_s,
+        w_row=w_row,
+        w_col=w_col,
+        w_diag=w_diag,
+        qubo_weights=load_weight_table(weight_table, weight_table_key(qubo_solver, qubo_encoding)),
+        qubo_encoding=qubo_encoding,
+        qubo_cache=qubo_cache if qubo_cache is not None else QuboModelCache(),
+        qubo_in_flight=qubo_in_flight,
+        heuristic_seed=heuristic_seed,
+        warm_start=warm_start,
+        fzn_cache=fzn_cache,
+        result_cache=result_cache,
+        cp_max_memory_mb=cp_max_memory_mb,
+        trace_memory=trace_memory,
+    )
+    if cfg.qubo_weights:
+        print(f"QUBO weights: tuned for N = {', '.join(cfg.qubo_weights)} ({weight_table})")
+    if jobs > 1:
+        # caches don't cross process boundaries; each worker keeps its own
+        cfg = replace(cfg, qubo_cache=None, qubo_disk_dir=cfg.qubo_cache.disk_dir)
 
-    boolean_mzn = PATHS.models / "boolean_cp.mzn"
-    int_mzn = PATHS.models / "integer_alldiff_cp.mzn"
+    config = {f: getattr(cfg, f) for f in RESUME_FIELDS}
+    if search == "threshold":
+        config.update(search=search, n_min=min(ns), n_max=n_max, growth=growth)
+    checkpoint = RunCheckpoint(
+        out_csv, RESULT_COLUMNS, config,
+        resume=resume, run_id=run_id or time.strftime("%Y%m%dT%H%M%S"),
+    )
+    label_to_key = {approach_name(k, cfg): k for k in APPROACH_KEYS}
+    if search == "threshold":
+        return _threshold_suite(ns, cfg, checkpoint, out_csv, store_dir, n_max, growth, jobs)
 
-    rows: List[Dict[str, Any]] = []
-    
-    # Track which models have failed
-    failed = {
-        "cp_boolean": False,
-        "cp_integer": False,
-        "qubo": False,
-    }
-
-    total_ns = len(ns)
-    print(f"Starting experiment suite with {total_ns} N values: {ns[0]} to {ns[-1]}")
+    failed_at = {label_to_key[a]: n for a, n in checkpoint.failed_at.items() if a in label_to_key}
+    units = [u for u in suite_units(ns, cfg) if not checkpoint.is_done(unit_keys(u, cfg))]
+
+    def on_done(unit: Unit, row: Dict[str, Any]) -> None:
+        checkpoint.append(row)
+        _print_done(unit, row)
+
+    resumed = f", {len(checkpoint.previous_rows)} rows resumed" if resume else ""
+    print(f"Starting experiment suite with {len(ns)} N values: {ns[0]} to {ns[-1]} ({len(units)} units, jobs={jobs}{resumed})")
     print("-" * 60)
 
-    for idx, n in enumerate(ns, start=1):
-        progress_pct = (idx / total_ns) * 100
-        print(f"\n[{progress_pct:.1f}%] Processing N={n} ({idx}/{total_ns})")
-        write_dzn(dzn, n)
-
-        # CP Boolean model
-        if not failed["cp_boolean"]:
-            print("  Running cp_boolean...", end=" ", flush=True)
-            r1 = run_minizinc(boolean_mzn, dzn, solver=solver_cp, timeout_s=cp_timeout_s)
-            x = parse_board_from_stdout(r1["stdout"], n=n) if r1["ok"] else None
-            valid = is_valid_board_x(x) if x is not None else False
-
-            parsed1 = {"solution_x": x, "valid": valid} if x is not None else {"solution_x": None, "valid": False}
-            write_run_logs("cp_boolean", n, r1, parsed=parsed1, logs_directory=logs_dir)
-
-            rows.append({
-                "approach": "cp_boolean",
-                "solver": solver_cp,
-                "n": n,
-                "trial": 0,
-                "ok": bool(r1["ok"]),
-                "valid": bool(valid),
-                "time_s": float(r1["time_s"]),
-                "returncode": r1["returncode"],
-                # keep schema aligned across approaches
-                "energy": None,
-                "success_rate": None,
-                "num_reads": None,
-                "timeout_s": cp_timeout_s,
-                "w_row": None,
-                "w_col": None,
-                "w_diag": None,
-            })
-            
-            if not valid:
-                failed["cp_boolean"] = True
-                print("FAILED")
-            else:
-                print("OK")
-        else:
-            print("  cp_boolean: SKIPPED (already failed)")
-
-        # CP Integer + alldifferent
-        if not failed["cp_integer"]:
-            print("  Running cp_integer...", end=" ", flush=True)
-            r2 = run_minizinc(int_mzn, dzn, solver=solver_cp, timeout_s=cp_timeout_s)
-            q = parse_q_from_stdout(r2["stdout"]) if r2["ok"] else None
-
-            if q is not None:
-                pos = board_from_q(q)
-                valid2 = is_valid_positions(pos)
-            else:
-                valid2 = False
-
-            parsed2 = {"q": q, "valid": valid2}
-            write_run_logs("cp_integer_alldiff", n, r2, parsed=parsed2, logs_directory=logs_dir)
-
-            rows.append({
-                "approach": "cp_integer_alldiff",
-                "solver": solver_cp,
-                "n": n,
-                "trial": 0,
-                "ok": bool(r2["ok"]),
-                "valid": bool(valid2),
-                "time_s": float(r2["time_s"]),
-                "returncode": r2["returncode"],
-                "energy": None,
-                "success_rate": None,
-                "num_reads": None,
-                "timeout_s": cp_timeout_s,
-                "w_row": None,
-                "w_col": None,
-                "w_diag": None,
-            })
-            
-            if not valid2:
-                failed["cp_integer"] = True
-                print("FAILED")
-            else:
-                print("OK")
-        else:
-            print("  cp_integer: SKIPPED (already failed)")
-
-        # QUBO Amplify
-        if not failed["qubo"]:
-            print(f"  Running qubo ({qubo_trials} trials)...", end=" ", flush=True)
-            qubo_valid_count = 0
-            for trial in range(int(qubo_trials)):
-                r3 = solve_with_amplify(
-                    n=n,
-                    num_reads=qubo_num_reads,
-                    timeout_s=qubo_timeout_s,
-                    w_row=w_row,
-                    w_col=w_col,
-                    w_diag=w_diag,
-                )
-
-                is_valid_trial = bool(r3.get("valid", False))
-                if is_valid_trial:
-                    qubo_valid_count += 1
-
-                rows.append({
-                    "approach": "qubo_amplify",
-                    "solver": "amplify_ae",
-                    "n": n,
-                    "trial": trial,
-                    "ok": bool(r3.get("ok", False)),
-                    "valid": is_valid_trial,
-                    "time_s": r3.get("time_s"),
-                    "returncode": None,
-                    "energy": r3.get("energy"),
-                    "success_rate": r3.get("success_rate"),
-                    "num_reads": r3.get("num_reads", qubo_num_reads),
-                    "timeout_s": r3.get("timeout_s", qubo_timeout_s),
-                    "w_row": (r3.get("weights") or {}).get("w_row", w_row),
-                    "w_col": (r3.get("weights") or {}).get("w_col", w_col),
-                    "w_diag": (r3.get("weights") or {}).get("w_diag", w_diag),
-                })
-            
-            # Calculate valid_rate and check if QUBO failed
-            valid_rate = qubo_valid_count / qubo_trials if qubo_trials > 0 else 0.0
-            if valid_rate < 1.0:
-                failed["qubo"] = True
-                print(f"FAILED (valid_rate={valid_rate:.2%})")
-            else:
-                print(f"OK (valid_rate={valid_rate:.2%})")
+    try:
+        if cp_concurrency > 0:
+            cp_units = [u for u in units if u.approach in CP_KEYS]
+            other_units = [u for u in units if u.approach not in CP_KEYS]
+            with ThreadPoolExecutor(max_workers=1) as loop_thread:
+                cp_rows = loop_thread.submit(asyncio.run, _run_cp_units(cp_units, cfg, cp_concurrency, on_done, failed_at))
+                other_rows = run_units(other_units, partial(run_unit, cfg=cfg), jobs=jobs, on_done=on_done, failed_at=failed_at)
+                rows = cp_rows.result() + other_rows
         else:
-            print("  qubo: SKIPPED (already failed)")
+            rows = run_units(units, partial(run_unit, cfg=cfg), jobs=jobs, on_done=on_done, failed_at=failed_at)
+    finally:
+        checkpoint.close()
 
-        # If all models have failed, break early
-        if all(failed.values()):
-            print(f"\nAll models have failed. Stopping at N={n} ({idx}/{total_ns})")
-            break
+    rows = [r for r in checkpoint.previous_rows + rows if not checkpoint.beyond_failure(r)]
+    return _finish_suite(rows, cfg, checkpoint, out_csv, store_dir)
+
+
+def _finish_suite(
+    rows: List[Dict[str, Any]], cfg: SuiteConfig, checkpoint: RunCheckpoint, out_csv: Path, store_dir: Optional[Path]
+) -> pd.DataFrame:
+    """Sort the rows, write the run to the store and rewrite the CSV in order"""
+    order = {approach_name(k, cfg): i for i, k in enumerate(APPROACH_KEYS)}
+    rows.sort(key=lambda r: (int(r["n"]), order[r["approach"]], int(r["trial"])))
 
     print("\n" + "=" * 60)
     print(f"Experiment suite completed!")
-    print(f"  Processed {idx}/{total_ns} N values")
     print(f"  Results: {len(rows)} total rows")
     print(f"  Output: {out_csv}")
+    if store_dir is not None:
+        print(f"  Store: {write_run(rows, checkpoint.run_id, store_dir)}")
     print("=" * 60)
 
-    df = pd.DataFrame(rows)
+    df = pd.DataFrame(rows, columns=RESULT_COLUMNS)
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(out_csv, index=False)
     return df
+
+
+def _threshold_suite(
+    ns: List[int],
+    cfg: SuiteConfig,
+    checkpoint: RunCheckpoint,
+    out_csv: Path,
+    store_dir: Optional[Path],
+    n_max: int,
+    growth: float,
+    jobs: int,
+) -> pd.DataFrame:
+    """run_suite(search="threshold"): bracket and bisect each approach's first failing N"""
+    previous = {row_key(r): r for r in checkpoint.previous_rows}
+
+    def probe_units(key: str, n: int) -> List[Unit]:
+        return suite_units([n], cfg, approaches=[key])
+
+    def reuse(unit: Unit) -> Optional[List[Dict[str, Any]]]:
+        keys = unit_keys(unit, cfg)
+        return [previous[k] for k in keys] if all(k in previous for k in keys) else None
+
+    def on_done(unit: Unit, row: Dict[str, Any]) -> None:
+        checkpoint.append(row)
+        _print_done(unit, row)
+
+    print(f"Searching failure thresholds from N={min(ns)} up to N={n_max} (growth x{growth}, jobs={jobs})")
+    print("-" * 60)
+    try:
+        rows, searches = search_thresholds(
+            APPROACH_KEYS, probe_units, partial(run_unit, cfg=cfg), min(ns), n_max,
+            growth=growth, jobs=jobs, on_done=on_done, previous=reuse,
+        )
+    finally:
+        checkpoint.close()
+
+    print("\nFailure thresholds:")
+    for key, found in searches.items():
+        print(f"  {approach_name(key, cfg):<24} {_threshold_text(found)}")
+    return _finish_suite(checkpoint.previous_rows + rows, cfg, checkpoint, out_csv, store_dir)
+
+
+def _threshold_text(found: ThresholdSearch) -> str:
+    if found.failed is None:
+        return f"no failure up to N={found.passed}"
+    if found.passed is None:
+        return f"fails at N={found.failed} (first probe)"
+    return f"first failure at N={found.failed} (passes at N={found.passed})"
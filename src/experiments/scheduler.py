@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+Row = Dict[str, Any]
+# A unit may produce several rows (e.g. all QUBO trials of one N sent as a batch)
+Rows = Union[Row, List[Row]]
+
+
+@dataclass(frozen=True)
+class Unit:
+    """One independent piece of work: approach key (as in run_suite's `failed` map), N and trial"""
+    approach: str
+    n: int
+    trial: int = 0
+
+
+def _beyond_failure(unit: Unit, failed_at: Dict[str, int]) -> bool:
+    return unit.approach in failed_at and unit.n > failed_at[unit.approach]
+
+
+def _as_list(rows: Rows) -> List[Row]:
+    return rows if isinstance(rows, list) else [rows]
+
+
+def _collect(units: List[Unit], results: Dict[int, Rows], failed_at: Dict[str, int]) -> List[Row]:
+    out: List[Row] = []
+    for idx in sorted(results):
+        if not _beyond_failure(units[idx], failed_at):
+            out.extend(_as_list(results[idx]))
+    return out
+
+
+def run_units(
+    units: List[Unit],
+    run: Callable[[Unit], Rows],
+    jobs: int = 1,
+    on_done: Optional[Callable[[Unit, Row], None]] = None,
+    failed_at: Optional[Dict[str, int]] = None,
+) -> List[Row]:
+    """
+    Run units serially (jobs=1) or on a process pool, stopping each approach after its first failing N.
+
+    A unit fails if any of its rows is not valid. Once an approach fails at N, its pending units with
+    larger N are cancelled; rows past the failure that had already finished are dropped, so the
+    output is the same as the serial run regardless of completion order. Rows come back in
+    `units` order. `failed_at` seeds the first failing N per approach (e.g. from a resumed run).
+    """
+    failed_at = dict(failed_at or {})
+    results: Dict[int, Rows] = {}
+
+    def record(idx: int, rows: Rows) -> None:
+        unit = units[idx]
+        results[idx] = rows
+        for row in _as_list(rows):
+            if not row.get("valid"):
+                failed_at[unit.approach] = min(unit.n, failed_at.get(unit.approach, unit.n))
+            if on_done is not None:
+                on_done(unit, row)
+
+    if jobs <= 1:
+        for idx, unit in enumerate(units):
+            if _beyond_failure(unit, failed_at):
+                continue
+            record(idx, run(unit))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pending: Dict[Future, int] = {
+                pool.submit(run, unit): idx
+                for idx, unit in enumerate(units)
+                if not _beyond_failure(unit, failed_at)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    idx = pending.pop(fut)
+                    if fut.cancelled():
+                        continue
+                    record(idx, fut.result())
+                for fut, idx in list(pending.items()):
+                    if _beyond_failure(units[idx], failed_at) and fut.cancel():
+                        pending.pop(fut)
+
+    return _collect(units, results, failed_at)
+
+
+async def run_units_async(
+    units: List[Unit],
+    run: Callable[[Unit], Awaitable[Rows]],
+    on_done: Optional[Callable[[Unit, Row], None]] = None,
+    failed_at: Optional[Dict[str, int]] = None,
+) -> List[Row]:
+    """
+    Event-loop version of run_units: every unit becomes a task (`run` bounds its own concurrency).
+
+    Same failure semantics: tasks of an approach beyond its first failing N are cancelled
+    (a running MiniZinc gets its process group killed) and rows come back in `units` order.
+    """
+    failed_at = dict(failed_at or {})
+    results: Dict[int, Rows] = {}
+    pending: Dict[asyncio.Task, int] = {
+        asyncio.ensure_future(run(unit)): idx
+        for idx, unit in enumerate(units)
+        if not _beyond_failure(unit, failed_at)
+    }
+
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                idx = pending.pop(task)
+                if task.cancelled():
+                    continue
+                unit = units[idx]
+                results[idx] = task.result()
+                for row in _as_list(results[idx]):
+                    if not row.get("valid"):
+                        failed_at[unit.approach] = min(unit.n, failed_at.get(unit.approach, unit.n))
+                    if on_done is not None:
+                        on_done(unit, row)
+            for task, idx in list(pending.items()):
+                if _beyond_failure(units[idx], failed_at):
+                    task.cancel()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    return _collect(units, results, failed_at)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+import math
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+
+class KllSketch:
+    """
+    Mergeable quantile sketch (KLL, Karnin-Lang-Liberty) with deterministic compaction.
+
+    Level h holds items of weight 2**h; a full level is sorted and every other item is
+    promoted, alternating the offset between compactions. While nothing has been compacted
+    the sketch is exact and quantile() interpolates like numpy/pandas; afterwards the rank
+    error is about 1.7/k. Serializes to a small JSON-able dict.
+    """
+
+    def __init__(self, k: int = 200) -> None:
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._offset = 0
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        while sum(map(len, self.levels)) > sum(self._capacity(h) for h in range(len(self.levels))):
+            for h, items in enumerate(self.levels):
+                if len(items) < self._capacity(h):
+                    continue
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                keep = [items.pop()] if len(items) % 2 else []
+                self.levels[h + 1].extend(items[self._offset::2])
+                self._offset ^= 1
+                self.levels[h] = keep
+                break
+
+    def update(self, x: float) -> None:
+        self.levels[0].append(float(x))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def extend(self, xs: Iterable[float]) -> None:
+        for x in xs:
+            self.update(x)
+
+    def merge(self, other: "KllSketch") -> "KllSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return float("nan")
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate([np.asarray(l, dtype=np.float64) for l in self.levels])
+        weights = np.concatenate([np.full(len(l), 2 ** h, dtype=np.float64) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cum = np.cumsum(weights[order])
+        idx = int(np.searchsorted(cum, q * cum[-1], side="left"))
+        return float(items[order][min(idx, len(items) - 1)])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "levels": self.levels, "offset": self._offset}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "KllSketch":
+        sk = cls(d["k"])
+        sk.n = d["n"]
+        sk.levels = [list(l) for l in d["levels"]]
+        sk._offset = d.get("offset", 0)
+        return sk
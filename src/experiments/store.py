@@ -0,0 +1,183 @@
+from __future__ import annotations
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.config import PATHS
+
+DEFAULT_STORE_DIR = PATHS.results / "store"
+
+# Fixed schema of the raw results; column order is the CSV column order
+RESULT_SCHEMA = pa.schema([
+    ("approach", pa.string()),
+    ("solver", pa.string()),
+    ("n", pa.int64()),
+    ("trial", pa.int64()),
+    ("ok", pa.bool_()),
+    ("valid", pa.bool_()),
+    ("time_s", pa.float64()),
+    ("returncode", pa.int64()),
+    ("energy", pa.float64()),
+    ("success_rate", pa.float64()),
+    ("num_reads", pa.int64()),
+    ("timeout_s", pa.float64()),
+    ("w_row", pa.float64()),
+    ("w_col", pa.float64()),
+    ("w_diag", pa.float64()),
+    ("build_time_s", pa.float64()),
+    ("cache_hit", pa.bool_()),
+    ("cache_hits", pa.int64()),
+    ("cache_misses", pa.int64()),
+    ("cache_time_saved_s", pa.float64()),
+    ("decode_time_s", pa.float64()),
+    ("num_samples", pa.int64()),
+    ("energy_mean", pa.float64()),
+    ("energy_median", pa.float64()),
+    ("energy_max", pa.float64()),
+    ("violations_min", pa.int64()),
+    ("violations_median", pa.float64()),
+    ("violation_hist", pa.string()),
+    ("iterations", pa.int64()),
+    ("restarts", pa.int64()),
+    ("peak_rss_kb", pa.int64()),
+    ("conflicts_trace", pa.string()),
+    ("warm_start", pa.bool_()),
+    ("time_to_first_s", pa.float64()),
+    ("timed_out", pa.bool_()),
+    ("flatten_time_s", pa.float64()),
+    ("solve_time_s", pa.float64()),
+    ("fzn_cache_hit", pa.bool_()),
+    ("error", pa.string()),
+    ("result_cache_hit", pa.bool_()),
+    ("validate_time_s", pa.float64()),
+    ("nodes", pa.int64()),
+    ("failures", pa.int64()),
+    ("propagations", pa.int64()),
+    ("num_terms", pa.int64()),
+    ("client_time_s", pa.float64()),
+    ("user_time_s", pa.float64()),
+    ("sys_time_s", pa.float64()),
+    ("ctx_switches_vol", pa.int64()),
+    ("ctx_switches_invol", pa.int64()),
+    ("py_peak_kb", pa.int64()),
+    ("max_memory_mb", pa.int64()),
+    ("failure_reason", pa.string()),
+    ("qubo_encoding", pa.string()),
+    ("num_variables", pa.int64()),
+])
+
+# Partition keys, hive style: <store>/run=<run_id>/approach=<approach>/part-0.parquet
+PARTITIONING = ds.partitioning(pa.schema([("run", pa.string()), ("approach", pa.string())]), flavor="hive")
+# Read schema: runs written before a column existed read it as null
+DATASET_SCHEMA = RESULT_SCHEMA.append(pa.field("run", pa.string()))
+
+
+def _coerce(value: Any, typ: pa.DataType) -> Any:
+    """Python value for a typed column; NaN / None / "" become null (rows may come back from a CSV)"""
+    if value is None or (isinstance(value, float) and value != value) or value == "":
+        return None
+    if pa.types.is_boolean(typ):
+        return value if isinstance(value, bool) else str(value).lower() in ("true", "1", "yes")
+    if pa.types.is_integer(typ):
+        return int(value)
+    if pa.types.is_floating(typ):
+        return float(value)
+    return str(value)
+
+
+def to_table(rows: Iterable[Dict[str, Any]]) -> pa.Table:
+    cols: Dict[str, List[Any]] = {f.name: [] for f in RESULT_SCHEMA}
+    for row in rows:
+        for f in RESULT_SCHEMA:
+            cols[f.name].append(_coerce(row.get(f.name), f.type))
+    return pa.table(cols, schema=RESULT_SCHEMA)
+
+
+def write_run(rows: Sequence[Dict[str, Any]], run_id: str, store_dir: Path = DEFAULT_STORE_DIR) -> Path:
+    """Write one run's rows as Parquet partitioned by approach, replacing any earlier write of that run"""
+    run_dir = store_dir / f"run={run_id}"
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    table = to_table(rows)
+    for approach in sorted(set(table.column("approach").to_pylist())):
+        part = table.filter(pc.equal(table.column("approach"), approach)).drop_columns(["approach"])
+        out = run_dir / f"approach={approach}"
+        out.mkdir(parents=True, exist_ok=True)
+        pq.write_table(part, out / "part-0.parquet")
+    return run_dir
+
+
+def list_runs(store_dir: Path = DEFAULT_STORE_DIR) -> List[str]:
+    """Run ids in the store, oldest first (default ids are timestamps)"""
+    if not store_dir.exists():
+        return []
+    return sorted(d.name.split("=", 1)[1] for d in store_dir.glob("run=*") if d.is_dir())
+
+
+def run_fingerprint(run_id: str, store_dir: Path = DEFAULT_STORE_DIR) -> str:
+    """Changes whenever a run's files are rewritten (e.g. after --resume)"""
+    h = hashlib.sha256()
+    for f in sorted((store_dir / f"run={run_id}").rglob("*.parquet")):
+        st = f.stat()
+        h.update(f"{f.relative_to(store_dir)}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def iter_run_batches(
+    run_id: str,
+    columns: Sequence[str],
+    store_dir: Path = DEFAULT_STORE_DIR,
+    batch_size: int = 65536,
+) -> Iterator[pd.DataFrame]:
+    """One run's rows in bounded-size chunks, projected to `columns`"""
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING, schema=DATASET_SCHEMA)
+    for batch in dataset.to_batches(columns=list(columns), filter=ds.field("run") == run_id, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def read_results(
+    store_dir: Path = DEFAULT_STORE_DIR,
+    columns: Optional[Sequence[str]] = None,
+    runs: Optional[Sequence[str]] = None,
+    approaches: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    Load results from the store, reading only `columns` from disk (all columns plus `run` if None).
+
+    `runs` / `approaches` prune whole partitions before any file is opened.
+    """
+    dataset = ds.dataset(store_dir, format="parquet", partitioning=PARTITIONING, schema=DATASET_SCHEMA)
+    expr = None
+    if runs:
+        expr = ds.field("run").isin(list(runs))
+    if approaches:
+        sel = ds.field("approach").isin(list(approaches))
+        expr = sel if expr is None else expr & sel
+    return dataset.to_table(columns=list(columns) if columns else None, filter=expr).to_pandas()
+
+
+def read_table(path: Path, columns: Sequence[str]) -> pd.DataFrame:
+    """Read only `columns` from a Parquet file, a results store directory or a CSV"""
+    if path.is_dir():
+        return read_results(path, columns)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=list(columns))
+    return pd.read_csv(path, usecols=lambda c: c in set(columns))
+
+
+def export_csv(store_dir: Path, out_csv: Path, runs: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Flat CSV of the store (all columns plus `run`) for tools that only read CSV"""
+    df = read_results(store_dir, runs=runs)
+    cols = ["run"] + RESULT_SCHEMA.names
+    df = df[cols].sort_values(["run", "n", "approach", "trial"], kind="stable")
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(out_csv, index=False)
+    return df
@@ -1,52 +1,251 @@
 from __future__ import annotations
 
+import json
+import os
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 import pandas as pd
+import pyarrow.parquet as pq
+
+from src.experiments.sketch import KllSketch
+from src.experiments.store import iter_run_batches, list_runs, run_fingerprint
+
+# Per-phase timings and solver statistics averaged per group as "<name>_mean"
+PHASE_COLUMNS = ["build_time_s", "flatten_time_s", "solve_time_s", "decode_time_s", "validate_time_s", "client_time_s"]
+STAT_COLUMNS = ["nodes", "failures", "propagations", "num_terms", "num_variables"]
+# Resource usage (MiniZinc child rusage, tracemalloc peak of in-process approaches)
+RESOURCE_COLUMNS = ["peak_rss_kb", "user_time_s", "sys_time_s", "py_peak_kb"]
+MEAN_COLUMNS = PHASE_COLUMNS + STAT_COLUMNS + RESOURCE_COLUMNS
+
+# Raw columns the summary needs; typed sources read nothing else
+SUMMARY_INPUT_COLUMNS = ["approach", "solver", "n", "ok", "valid", "time_s", "energy"] + MEAN_COLUMNS
+
+# Per-run summary state kept inside the store (the leading "_" hides it from dataset scans)
+SUMMARY_STATE_FILE = "_summary_state.json"
+
+# Bump when GroupState changes so persisted per-run state is rebuilt
+STATE_VERSION = 4
+
+CHUNK_ROWS = 65536
+
+# (approach, solver, n)
+GroupKey = Tuple[str, Optional[str], int]
 
 
 def _to_numeric_safe(s: pd.Series) -> pd.Series:
     return pd.to_numeric(s, errors="coerce")
 
 
-def summarize_results(raw_csv: Path, out_csv: Path) -> pd.DataFrame:
-    """Reads raw results (long format) and outputs grouped summary by (approach, n)"""
-    df = pd.read_csv(raw_csv)
-
-    # Normalize dtypes
-    if df["ok"].dtype == object:
-        df["ok"] = df["ok"].astype(str).str.lower().isin(["true", "1", "yes"])
-    if df["valid"].dtype == object:
-        df["valid"] = df["valid"].astype(str).str.lower().isin(["true", "1", "yes"])
-
-    df["time_s"] = _to_numeric_safe(df["time_s"])
-    if "energy" in df.columns:
-        df["energy"] = _to_numeric_safe(df["energy"])
-
-    def p90(x: pd.Series) -> float:
-        x = x.dropna()
-        if len(x) == 0:
-            return float("nan")
-        return float(x.quantile(0.90))
-
-    summary = (
-        df.groupby(["approach", "solver", "n"], dropna=False)
-          .agg(
-              runs=("valid", "count"),
-              ok_rate=("ok", "mean"),
-              valid_rate=("valid", "mean"),
-              time_mean=("time_s", "mean"),
-              time_median=("time_s", "median"),
-              time_p90=("time_s", p90),
-              energy_min=("energy", "min") if "energy" in df.columns else ("time_s", "size"),
-              energy_median=("energy", "median") if "energy" in df.columns else ("time_s", "size"),
-          )
-          .reset_index()
-    )
-
-    # If energy columns were faked when missing, remove them
-    if "energy" not in df.columns:
-        summary = summary.drop(columns=["energy_min", "energy_median"], errors="ignore")
+@dataclass
+class GroupState:
+    """Mergeable aggregates of one (approach, solver, n) group"""
+    ok_n: int = 0
+    ok_sum: int = 0
+    valid_n: int = 0
+    valid_sum: int = 0
+    time_n: int = 0
+    time_sum: float = 0.0
+    time_sketch: KllSketch = field(default_factory=KllSketch)
+    energy_min: float = float("inf")
+    energy_sketch: KllSketch = field(default_factory=KllSketch)
+    # column -> [non-null count, sum]
+    means: Dict[str, List[float]] = field(default_factory=dict)
+
+    def fold(self, g: pd.DataFrame) -> None:
+        ok, valid, t = g["ok"].dropna(), g["valid"].dropna(), g["time_s"].dropna()
+        self.ok_n += len(ok)
+        self.ok_sum += int(ok.astype(bool).sum())
+        self.valid_n += len(valid)
+        self.valid_sum += int(valid.astype(bool).sum())
+        self.time_n += len(t)
+        self.time_sum += float(t.sum())
+        self.time_sketch.extend(t.to_numpy())
+        if "energy" in g.columns:
+            e = g["energy"].dropna()
+            if len(e):
+                self.energy_min = min(self.energy_min, float(e.min()))
+                self.energy_sketch.extend(e.to_numpy())
+        for col in MEAN_COLUMNS:
+            if col in g.columns:
+                v = g[col].dropna()
+                if len(v):
+                    acc = self.means.setdefault(col, [0, 0.0])
+                    acc[0] += len(v)
+                    acc[1] += float(v.sum())
+
+    def merge(self, other: "GroupState") -> "GroupState":
+        self.ok_n += other.ok_n
+        self.ok_sum += other.ok_sum
+        self.valid_n += other.valid_n
+        self.valid_sum += other.valid_sum
+        self.time_n += other.time_n
+        self.time_sum += other.time_sum
+        self.time_sketch.merge(other.time_sketch)
+        self.energy_min = min(self.energy_min, other.energy_min)
+        self.energy_sketch.merge(other.energy_sketch)
+        for col, (cnt, total) in other.means.items():
+            acc = self.means.setdefault(col, [0, 0.0])
+            acc[0] += cnt
+            acc[1] += total
+        return self
+
+    def summary(self) -> Dict[str, float]:
+        nan = float("nan")
+        return {
+            "runs": self.valid_n,
+            "ok_rate": self.ok_sum / self.ok_n if self.ok_n else nan,
+            "valid_rate": self.valid_sum / self.valid_n if self.valid_n else nan,
+            "time_mean": self.time_sum / self.time_n if self.time_n else nan,
+            "time_median": self.time_sketch.quantile(0.5),
+            "time_p90": self.time_sketch.quantile(0.9),
+            "energy_min": self.energy_min if self.energy_sketch.n else nan,
+            "energy_median": self.energy_sketch.quantile(0.5),
+            **{
+                _mean_name(col): self.means[col][1] / self.means[col][0] if col in self.means else nan
+                for col in MEAN_COLUMNS
+            },
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        d = {k: getattr(self, k) for k in ("ok_n", "ok_sum", "valid_n", "valid_sum", "time_n", "time_sum")}
+        d["energy_min"] = None if self.energy_min == float("inf") else self.energy_min
+        d["time_sketch"] = self.time_sketch.to_dict()
+        d["energy_sketch"] = self.energy_sketch.to_dict()
+        d["means"] = {k: list(v) for k, v in self.means.items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "GroupState":
+        st = cls(**{k: d[k] for k in ("ok_n", "ok_sum", "valid_n", "valid_sum", "time_n", "time_sum")})
+        st.energy_min = float("inf") if d["energy_min"] is None else d["energy_min"]
+        st.time_sketch = KllSketch.from_dict(d["time_sketch"])
+        st.energy_sketch = KllSketch.from_dict(d["energy_sketch"])
+        st.means = {k: list(v) for k, v in d["means"].items()}
+        return st
+
+
+def _mean_name(col: str) -> str:
+    """build_time_s -> build_time_mean, nodes -> nodes_mean"""
+    return col[: -len("_s")] + "_mean" if col.endswith("_s") else col + "_mean"
+
+
+States = Dict[GroupKey, GroupState]
+
+
+def fold_chunk(states: States, df: pd.DataFrame) -> None:
+    for (approach, solver, n), g in df.groupby(["approach", "solver", "n"], dropna=False, sort=False):
+        key = (str(approach), None if pd.isna(solver) else str(solver), int(n))
+        states.setdefault(key, GroupState()).fold(g)
+
+
+def merge_states(parts: Sequence[States]) -> States:
+    out: States = {}
+    for part in parts:
+        for key, st in part.items():
+            if key in out:
+                out[key].merge(GroupState.from_dict(st.to_dict()))
+            else:
+                out[key] = GroupState.from_dict(st.to_dict())
+    return out
+
+
+def _file_chunks(raw: Path) -> Iterator[pd.DataFrame]:
+    """Bounded chunks of a Parquet file or a legacy CSV (type-repaired)"""
+    if raw.suffix == ".parquet":
+        pf = pq.ParquetFile(raw)
+        cols = [c for c in SUMMARY_INPUT_COLUMNS if c in pf.schema_arrow.names]
+        for batch in pf.iter_batches(batch_size=CHUNK_ROWS, columns=cols):
+            yield batch.to_pandas()
+        return
+
+    for df in pd.read_csv(raw, usecols=lambda c: c in SUMMARY_INPUT_COLUMNS, chunksize=CHUNK_ROWS):
+        # Normalize dtypes
+        for col in ("ok", "valid"):
+            if df[col].dtype == object:
+                df[col] = df[col].astype(str).str.lower().isin(["true", "1", "yes"])
+        for col in ["time_s", "energy"] + MEAN_COLUMNS:
+            if col in df.columns:
+                df[col] = _to_numeric_safe(df[col])
+        yield df
+
+
+def _encode_states(states: States) -> List[Any]:
+    return [[list(key), st.to_dict()] for key, st in states.items()]
+
+
+def _decode_states(items: List[Any]) -> States:
+    return {(k[0], k[1], int(k[2])): GroupState.from_dict(d) for k, d in items}
+
+
+def update_store_state(store_dir: Path) -> Dict[str, States]:
+    """
+    Per-run group states for every run in the store, folding only runs that are new or whose
+    files changed since the last call; the result is persisted in the store.
+    """
+    path = store_dir / SUMMARY_STATE_FILE
+    saved = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    if saved.get("version") != STATE_VERSION:
+        saved = {"runs": {}}
+
+    per_run: Dict[str, States] = {}
+    entries: Dict[str, Any] = {}
+    changed = False
+    for run in list_runs(store_dir):
+        fp = run_fingerprint(run, store_dir)
+        entry = saved["runs"].get(run)
+        if entry is not None and entry["fingerprint"] == fp:
+            per_run[run] = _decode_states(entry["groups"])
+            entries[run] = entry
+            continue
+        states: States = {}
+        for chunk in iter_run_batches(run, SUMMARY_INPUT_COLUMNS, store_dir, batch_size=CHUNK_ROWS):
+            fold_chunk(states, chunk)
+        per_run[run] = states
+        entries[run] = {"fingerprint": fp, "groups": _encode_states(states)}
+        changed = True
+
+    if changed or set(entries) != set(saved["runs"]) or saved.get("version") != STATE_VERSION:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps({"version": STATE_VERSION, "runs": entries}, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+    return per_run
+
+
+def summary_frame(states: States, with_energy: bool = True) -> pd.DataFrame:
+    rows = [{"approach": a, "solver": s, "n": n, **st.summary()} for (a, s, n), st in states.items()]
+    cols = ["approach", "solver", "n", "runs", "ok_rate", "valid_rate", "time_mean", "time_median", "time_p90",
+            "energy_min", "energy_median"] + [_mean_name(c) for c in MEAN_COLUMNS]
+    df = pd.DataFrame(rows, columns=cols)
+    if not with_energy:
+        df = df.drop(columns=["energy_min", "energy_median"])
+    return df.sort_values(["approach", "solver", "n"], kind="stable", na_position="last").reset_index(drop=True)
+
+
+def summarize_results(raw: Path, out_csv: Path, runs: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Reads raw results (long format) and outputs grouped summary by (approach, n)
+
+    `raw` is the results store directory, a Parquet file or a results CSV, read in chunks
+    into mergeable per-group state (counts, sums, KLL sketches for median/p90). For the
+    store that state is kept per run, so only new or rewritten runs are read. The summary
+    is written to out_csv and, typed, to the .parquet next to it (which the plots prefer).
+    """
+    with_energy = True
+    if raw.is_dir():
+        per_run = update_store_state(raw)
+        selected = list(per_run) if runs is None else [r for r in runs if r in per_run]
+        states = merge_states([per_run[r] for r in selected])
+    else:
+        states = {}
+        with_energy = False
+        for chunk in _file_chunks(raw):
+            with_energy = with_energy or "energy" in chunk.columns
+            fold_chunk(states, chunk)
+
+    summary = summary_frame(states, with_energy=with_energy)
 
     out_csv.parent.mkdir(parents=True, exist_ok=True)
     summary.to_csv(out_csv, index=False)
+    summary.to_parquet(out_csv.with_suffix(".parquet"), index=False)
     return summary
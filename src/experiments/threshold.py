@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import math
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from src.experiments.scheduler import Row, Rows, Unit
+
+
+@dataclass
+class ThresholdSearch:
+    """
+    First failing N of one approach: N grows geometrically from n_min until a probe fails
+    (or n_max passes), then the gap between the last pass and the first failure is bisected.
+
+    Assumes failure is monotone in N; `failed` ends as the smallest failing N probed, with
+    `passed` = failed - 1 unless the very first probe failed.
+    """
+    n_min: int
+    n_max: int
+    growth: float = 2.0
+    passed: Optional[int] = None
+    failed: Optional[int] = None
+
+    def next_n(self) -> Optional[int]:
+        """N to probe next, or None once the threshold is pinned down"""
+        if self.failed is None:
+            if self.passed is None:
+                return self.n_min
+            if self.passed >= self.n_max:
+                return None
+            return min(self.n_max, max(self.passed + 1, int(math.ceil(self.passed * self.growth))))
+        lo = self.passed if self.passed is not None else self.n_min - 1
+        if self.failed - lo <= 1:
+            return None
+        return (lo + self.failed) // 2
+
+    def record(self, n: int, ok: bool) -> None:
+        if ok:
+            self.passed = n if self.passed is None else max(self.passed, n)
+        else:
+            self.failed = n if self.failed is None else min(self.failed, n)
+
+
+@dataclass
+class _Probe:
+    """The units of one (approach, N) probe; it fails as soon as any row is invalid"""
+    approach: str
+    n: int
+    units: List[Unit]
+    submitted: int = 0
+    done: int = 0
+    failed: bool = False
+    closed: bool = False
+    running: Set[Future] = field(default_factory=set)
+
+    def add(self, rows: List[Row]) -> None:
+        self.done += 1
+        self.failed = self.failed or any(not r.get("valid") for r in rows)
+
+    def settled(self) -> bool:
+        return self.failed or self.done == len(self.units)
+
+
+def search_thresholds(
+    approaches: Sequence[str],
+    probe_units: Callable[[str, int], List[Unit]],
+    run: Callable[[Unit], Rows],
+    n_min: int,
+    n_max: int,
+    growth: float = 2.0,
+    jobs: int = 1,
+    on_done: Optional[Callable[[Unit, Row], None]] = None,
+    previous: Optional[Callable[[Unit], Optional[List[Row]]]] = None,
+) -> Tuple[List[Row], Dict[str, ThresholdSearch]]:
+    """
+    Run a ThresholdSearch per approach, each approach advancing on its own.
+
+    `probe_units(approach, n)` lists the units of one probe (e.g. every QUBO trial); at most
+    `jobs` of them are in flight at once, and once one yields an invalid row the probe fails
+    and its remaining units are skipped. Units run on a pool of `jobs` processes (one thread
+    for jobs=1). `previous(unit)` may return rows recorded by an earlier, resumed run; those
+    are reused instead of re-run and are not part of the returned rows.
+    """
+    searches = {a: ThresholdSearch(n_min, n_max, growth) for a in approaches}
+    out: List[Row] = []
+    live: Dict[Future, Tuple[_Probe, Unit]] = {}
+
+    def feed(probe: _Probe) -> None:
+        """Submit (or reuse) the probe's next units, at most `jobs` in flight"""
+        while not probe.failed and probe.submitted < len(probe.units) and len(probe.running) < max(1, jobs):
+            unit = probe.units[probe.submitted]
+            probe.submitted += 1
+            rows = previous(unit) if previous is not None else None
+            if rows is not None:
+                probe.add(rows)
+                continue
+            fut = pool.submit(run, unit)
+            live[fut] = (probe, unit)
+            probe.running.add(fut)
+
+    def close(probe: _Probe) -> None:
+        probe.closed = True
+        for fut in probe.running:
+            if fut.cancel():
+                live.pop(fut, None)
+        searches[probe.approach].record(probe.n, not probe.failed)
+
+    def launch(approach: str) -> None:
+        while True:
+            n = searches[approach].next_n()
+            if n is None:
+                return
+            probe = _Probe(approach, n, probe_units(approach, n))
+            feed(probe)
+            if not probe.settled():
+                return
+            close(probe)
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else ThreadPoolExecutor(max_workers=1)
+    with pool:
+        for approach in approaches:
+            launch(approach)
+        while live:
+            done, _ = wait(live, return_when=FIRST_COMPLETED)
+            for fut in done:
+                probe, unit = live.pop(fut)
+                probe.running.discard(fut)
+                if fut.cancelled():
+                    continue
+                rows = fut.result()
+                rows = rows if isinstance(rows, list) else [rows]
+                out.extend(rows)
+                if on_done is not None:
+                    for row in rows:
+                        on_done(unit, row)
+                if probe.closed:
+                    # a unit that was already running when its probe failed
+                    continue
+                probe.add(rows)
+                if probe.settled():
+                    close(probe)
+                    launch(probe.approach)
+                else:
+                    feed(probe)
+
+    return out, searches
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.config import PATHS
+from src.qubo.cache import QuboModelCache
+from src.qubo.encodings import ENCODING_WEIGHTS, check_encoding
+
+DEFAULT_WEIGHT_TABLE = PATHS.results / "qubo_weights.json"
+WEIGHT_KEYS = ("w_row", "w_col", "w_diag")
+
+# Default grid: w_row and w_col each over DEFAULT_ROW_COL_GRID, w_diag over DEFAULT_DIAG_GRID (48 configurations)
+DEFAULT_ROW_COL_GRID = (1.0, 2.0, 5.0, 10.0)
+DEFAULT_DIAG_GRID = (0.5, 1.0, 2.0)
+
+Weights = Tuple[float, float, float]
+
+
+def weight_table_key(solver: str, encoding: str = "penalty") -> str:
+    """Weight table section for a solver and QUBO encoding (penalty weights don't carry over between encodings)"""
+    return solver if encoding == "penalty" else f"{solver}:{encoding}"
+
+
+def weight_grid(row_col: Sequence[float] = DEFAULT_ROW_COL_GRID, diag: Sequence[float] = DEFAULT_DIAG_GRID) -> List[Weights]:
+    return [(float(r), float(c), float(d)) for r, c, d in product(row_col, row_col, diag)]
+
+
+def encoding_grid(configs: Sequence[Weights], encoding: str) -> List[Weights]:
+    """
+    configs without the duplicates an encoding can't tell apart: one configuration (the first)
+    per distinct value of the weights in ENCODING_WEIGHTS[encoding]. The default grid thus
+    shrinks from 48 to 12 configurations under one_hot and to 3 under pruned.
+    """
+    check_encoding(encoding)
+    used = [WEIGHT_KEYS.index(k) for k in ENCODING_WEIGHTS[encoding]]
+    distinct: Dict[Tuple[float, ...], Weights] = {}
+    for w in configs:
+        distinct.setdefault(tuple(w[i] for i in used), w)
+    return list(distinct.values())
+
+
+@dataclass
+class Arm:
+    """One weight configuration at one N, with everything its reads have produced so far"""
+    weights: Weights
+    valid: int = 0
+    reads: int = 0
+    time_s: float = 0.0
+    energy_sum: float = 0.0
+
+    @property
+    def valid_per_s(self) -> float:
+        return self.valid / self.time_s if self.time_s > 0 else 0.0
+
+    @property
+    def success_rate(self) -> float:
+        return self.valid / self.reads if self.reads else 0.0
+
+    def rank_key(self) -> Tuple[float, float]:
+        # valid solutions per second; while nothing is valid, lower mean energy ranks higher
+        return (self.valid_per_s, -self.energy_sum / self.reads if self.reads else -math.inf)
+
+    def add(self, result: Dict[str, Any]) -> None:
+        reads = int(result.get("num_samples") or 0)
+        self.reads += reads
+        self.valid += int(round((result.get("success_rate") or 0.0) * reads))
+        self.time_s += float(result.get("time_s") or 0.0)
+        if result.get("energy_mean") is not None:
+            self.energy_sum += float(result["energy_mean"]) * reads
+
+
+@dataclass
+class _Halving:
+    """Successive halving over the arms of one N: every rung gives the survivors eta x the reads"""
+    n: int
+    arms: List[Arm]
+    reads: int
+    eta: int
+    max_reads: int
+    rung: int = 0
+    running: int = 0
+    alive: List[Arm] = field(default_factory=list)
+
+    def promote(self) -> bool:
+        """Keep the best 1/eta of the rung; False once the search is done"""
+        ranked = sorted(self.alive, key=Arm.rank_key, reverse=True)
+        self.alive = ranked[: max(1, len(ranked) // self.eta)]
+        self.rung += 1
+        self.reads *= self.eta
+        return len(self.alive) > 1 and self.reads <= self.max_reads
+
+    def best(self) -> Arm:
+        return max(self.alive, key=Arm.rank_key)
+
+
+# Per-process QUBO model cache for evaluate() (pool workers can't share the caller's)
+_PROCESS_QUBO_CACHE: Optional[QuboModelCache] = None
+
+
+def evaluate(
+    n: int,
+    weights: Weights,
+    reads: int,
+    solver: str,
+    timeout_s: Optional[float],
+    seed: Optional[int],
+    encoding: str = "penalty",
+) -> Dict[str, Any]:
+    """One solver call with `reads` reads at the given weights"""
+    global _PROCESS_QUBO_CACHE
+    if _PROCESS_QUBO_CACHE is None:
+        _PROCESS_QUBO_CACHE = QuboModelCache()
+    w = dict(zip(WEIGHT_KEYS, weights))
+    if solver == "local_sa":
+        from src.qubo.solve_local import solve_with_local_sa
+        return solve_with_local_sa(n=n, num_reads=reads, timeout_s=timeout_s, seed=seed, cache=_PROCESS_QUBO_CACHE, encoding=encoding, **w)
+    if solver == "amplify_ae":
+        from src.qubo.solve_amplify import solve_with_amplify
+        return solve_with_amplify(n=n, num_reads=reads, timeout_s=timeout_s, cache=_PROCESS_QUBO_CACHE, encoding=encoding, **w)
+    raise ValueError(f"Unknown QUBO solver: {solver!r} (expected 'local_sa' or 'amplify_ae')")
+
+
+def tune_weights(
+    ns: Sequence[int],
+    configs: Optional[Sequence[Weights]] = None,
+    solver: str = "local_sa",
+    encoding: str = "penalty",
+    min_reads: int = 8,
+    eta: int = 3,
+    max_reads: int = 512,
+    timeout_s: Optional[float] = 1.0,
+    jobs: int = 1,
+    seed: Optional[int] = None,
+    out: Optional[Path] = DEFAULT_WEIGHT_TABLE,
+    on_rung: Optional[Callable[[int, int, List[Arm]], None]] = None,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Pick (w_row, w_col, w_diag) per N by successive halving over a weight grid.
+
+    Every configuration first gets min_reads reads; after each rung only the best 1/eta by
+    valid solutions per second (summed over all its reads so far) go on, with eta x the reads,
+    until one is left or the next rung would exceed max_reads. Poor configurations are thus
+    dropped after a few reads. All N are tuned at once on `jobs` processes (one thread for
+    jobs=1). Configurations that differ only in weights the encoding ignores are run once
+    (encoding_grid). The winner of each N that produced any valid read is merged into the weight
+    table at `out` under weight_table_key(solver, encoding); returns {n: entry} for those N.
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2")
+    configs = encoding_grid(list(configs) if configs else weight_grid(), encoding)
+    searches = [_Halving(n, [Arm(w) for w in configs], min_reads, eta, max_reads) for n in ns]
+    live: Dict[Future, Tuple[_Halving, Arm]] = {}
+
+    def submit(h: _Halving) -> None:
+        h.alive = h.alive or list(h.arms)
+        for i, arm in enumerate(h.alive):
+            arm_seed = None if seed is None else seed + 10007 * h.rung + i
+            fut = pool.submit(evaluate, h.n, arm.weights, h.reads, solver, timeout_s, arm_seed, encoding)
+            live[fut] = (h, arm)
+            h.running += 1
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else ThreadPoolExecutor(max_workers=1)
+    with pool:
+        for h in searches:
+            submit(h)
+        while live:
+            done, _ = wait(live, return_when=FIRST_COMPLETED)
+            for fut in done:
+                h, arm = live.pop(fut)
+                h.running -= 1
+                arm.add(fut.result())
+                if h.running:
+                    continue
+                if on_rung is not None:
+                    on_rung(h.n, h.reads, h.alive)
+                if h.promote():
+                    submit(h)
+
+    tuned: Dict[int, Dict[str, Any]] = {}
+    for h in searches:
+        best = h.best()
+        if not best.valid:
+            continue
+        tuned[h.n] = {
+            **dict(zip(WEIGHT_KEYS, best.weights)),
+            "valid_per_s": best.valid_per_s,
+            "success_rate": best.success_rate,
+            "reads": best.reads,
+            "configs": len(h.arms),
+            "timeout_s": timeout_s,
+            "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    if out is not None and tuned:
+        save_weight_table(out, weight_table_key(solver, encoding), tuned)
+    return tuned
+
+
+def save_weight_table(path: Path, key: str, entries: Dict[int, Dict[str, Any]]) -> None:
+    """Merge per-N entries into the table (JSON: {weight_table_key: {N: {w_row, w_col, w_diag, ...}}})"""
+    table = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    table.setdefault(key, {}).update({str(n): e for n, e in entries.items()})
+    table[key] = dict(sorted(table[key].items(), key=lambda kv: int(kv[0])))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(table, indent=2) + "\n", encoding="utf-8")
+    tmp.replace(path)
+
+
+def load_weight_table(path: Optional[Path], key: str) -> Optional[Dict[str, Dict[str, float]]]:
+    """{str(N): {w_row, w_col, w_diag}} under `key` (see weight_table_key), or None if there is none"""
+    if path is None or not path.exists():
+        return None
+    entries = json.loads(path.read_text(encoding="utf-8")).get(key) or {}
+    return {n: {k: float(e[k]) for k in WEIGHT_KEYS} for n, e in entries.items()} or None
+
+
+def weights_for(table: Optional[Dict[str, Dict[str, float]]], n: int, default: Dict[str, float]) -> Dict[str, float]:
+    """Weights tuned for N, else those of the nearest tuned N (the smaller one on a tie), else `default`"""
+    if not table:
+        return default
+    nearest = min(table, key=lambda k: (abs(int(k) - n), int(k)))
+    return dict(table[nearest])
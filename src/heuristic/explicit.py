@@ -0,0 +1,47 @@
+from __future__ import annotations
+from array import array
+from itertools import chain
+from typing import Any, Dict, Iterator
+
+from src.utils.solution import Solution
+from src.utils.timing import timer
+
+
+def iter_explicit_q(n: int) -> Iterator[int]:
+    """
+    Stream a valid q-vector (1-indexed column per row) for any N >= 4 in O(1) memory.
+
+    Evens then odds, with the classic fix-ups (Hoffman, Loessi & Moore):
+    - N % 6 == 2: swap 1 and 3 in the odds and move 5 to the end
+    - N % 6 == 3: move 2 to the end of the evens, and 1, 3 to the end of the odds
+    """
+    if n == 1:
+        return iter([1])
+    if n < 4:
+        raise ValueError(f"No N-queens solution exists for N={n}")
+
+    r = n % 6
+    if r == 2:
+        odds = chain([3, 1], range(7, n + 1, 2), [5])
+        return chain(range(2, n + 1, 2), odds)
+    if r == 3:
+        evens = chain(range(4, n + 1, 2), [2])
+        odds = chain(range(5, n + 1, 2), [1, 3])
+        return chain(evens, odds)
+    return chain(range(2, n + 1, 2), range(1, n + 1, 2))
+
+
+def explicit_q(n: int) -> array:
+    """Materialized q-vector (1-indexed) as a compact int array"""
+    return array("i", iter_explicit_q(n))
+
+
+def solve_explicit(n: int) -> Dict[str, Any]:
+    """O(N) constructive placement, timed the same way as the search-based approaches"""
+    with timer() as t:
+        try:
+            solution = Solution(c - 1 for c in iter_explicit_q(n))
+        except ValueError:
+            solution = None
+        elapsed = t()
+    return {"ok": solution is not None, "n": n, "time_s": elapsed, "solution": solution}
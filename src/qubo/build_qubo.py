@@ -1,80 +1,118 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
-from amplify import VariableGenerator, sum as a_sum
+from typing import Any, Dict, Optional, Tuple
+from amplify import VariableGenerator, one_hot
+from src.qubo.cache import QuboModelCache, cached_matrix, model_key
+from src.qubo.encodings import build_encoded_matrix
+from src.qubo.matrix import QuboMatrix
+from src.utils.timing import timer
 
 
 @dataclass
 class QuboBuildResult:
     n: int
-    x: Any  # PolyArray[Dim2] of binary variables
+    x: Any  # PolyArray[Dim2] of binary variables (n x num_variables/n)
     objective: Any  # the quadratic objective
     metadata: Dict[str, Any]
+    matrix: QuboMatrix
+    model: Any = None  # what solve() gets: the objective plus any native one-hot constraints
 
-def diag_cells_main(n: int, d: int) -> List[Tuple[int, int]]:
-    # main diagonal: d = r - c
-    cells = []
-    for r in range(n):
-        c = r - d
-        if 0 <= c < n:
-            cells.append((r, c))
-    return cells
+# Terms turned into Amplify polynomials per PolyArray operation (bounds the intermediate arrays)
+_TERM_CHUNK = 1 << 18
 
-def diag_cells_anti(n: int, s: int) -> List[Tuple[int, int]]:
-    # anti diagonal: s = r + c
-    out = []
-    for r in range(n):
-        c = s - r
-        if 0 <= c < n:
-            out.append((r, c))
-    return out
 
-def pairwise_collision_penalty(x, cells: List[Tuple[int, int]]):
-    """at most one queen on this line -> sum of x_i*x_j for i<j"""
-    pen = 0
-    for i in range(len(cells)):
-        r1, c1 = cells[i]
-        for j in range(i + 1, len(cells)):
-            r2, c2 = cells[j]
-            pen += x[r1, c1] * x[r2, c2]
-    return pen
+def to_amplify(matrix: QuboMatrix):
+    """
+    Convert a sparse QuboMatrix into an Amplify (x, objective) pair; variable i is x[i // width, i % width].
+
+    Terms are built in bulk: the variables are gathered with PolyArray.take on the flattened
+    array (it accepts index lists, not ndarrays), scaled by the coefficient array and summed,
+    one chunk at a time.
+    """
+    n = matrix.n
+    width = matrix.num_variables // n
+    gen = VariableGenerator()
+    x = gen.array("Binary", (n, width), name="x")
+    flat = x.ravel()
+
+    objective = matrix.offset
+    diag = matrix.rows == matrix.cols
+    linear_i, linear_w = matrix.rows[diag], matrix.data[diag]
+    pair_i, pair_j, pair_w = matrix.rows[~diag], matrix.cols[~diag], matrix.data[~diag]
+    for lo in range(0, linear_i.size, _TERM_CHUNK):
+        hi = lo + _TERM_CHUNK
+        objective += (flat.take(linear_i[lo:hi].tolist()) * linear_w[lo:hi]).sum()
+    for lo in range(0, pair_i.size, _TERM_CHUNK):
+        hi = lo + _TERM_CHUNK
+        objective += (flat.take(pair_i[lo:hi].tolist()) * flat.take(pair_j[lo:hi].tolist()) * pair_w[lo:hi]).sum()
+    return x, objective
+
+
+def with_constraints(matrix: QuboMatrix, x: Any, objective: Any) -> Any:
+    """The objective plus the one-hot constraints the matrix's encoding leaves to the solver"""
+    native = matrix.metadata.get("one_hot")
+    if native is None:
+        return objective
+    constraints = one_hot(x, axis=1)
+    if native == "rows_cols":
+        constraints += one_hot(x, axis=0)
+    return objective + constraints
 
 def build_nqueens_qubo(
     n: int,
     w_row: float = 5.0,
     w_col: float = 5.0,
     w_diag: float = 1.0,
+    matrix: Optional[QuboMatrix] = None,
+    encoding: str = "penalty",
 ) -> QuboBuildResult:
-    """Build QUBO for n-queens (binary matrix x, row/col/diag constraints)."""
-    gen = VariableGenerator()
-    x = gen.array("Binary", (n, n), name="x")
-
-    # rows: exactly one per row -> (sum - 1)^2
-    row_pen = 0
-    for r in range(n):
-        s = a_sum(x[r, :])
-        row_pen += (s - 1) * (s - 1)
-
-    # same for columns
-    col_pen = 0
-    for c in range(n):
-        s = a_sum(x[:, c])
-        col_pen += (s - 1) * (s - 1)
-
-    # diagonals: at most one per diagonal (pairwise penalties)
-    diag_pen = 0
-    for d in range(-(n - 1), n):
-        cells = diag_cells_main(n, d)
-        diag_pen += pairwise_collision_penalty(x, cells)
-    for s in range(0, 2 * n - 1):
-        cells = diag_cells_anti(n, s)
-        diag_pen += pairwise_collision_penalty(x, cells)
-
-    objective = w_row * row_pen + w_col * col_pen + w_diag * diag_pen
+    """Build QUBO for n-queens (binary matrix x, row/col/diag constraints); reuses `matrix` if given."""
+    with timer() as t:
+        if matrix is None:
+            matrix = build_encoded_matrix(n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+        matrix_time = t()
+        x, objective = to_amplify(matrix)
+        model = with_constraints(matrix, x, objective)
+        build_time = t()
 
     return QuboBuildResult(
         n=n,
         x=x,
         objective=objective,
-        metadata={"w_row": w_row, "w_col": w_col, "w_diag": w_diag},
+        metadata={
+            "w_row": w_row,
+            "w_col": w_col,
+            "w_diag": w_diag,
+            "num_terms": matrix.num_terms,
+            "num_variables": matrix.num_variables,
+            "encoding": encoding,
+            "matrix_time_s": matrix_time,
+            "build_time_s": build_time,
+        },
+        matrix=matrix,
+        model=model,
     )
+
+def cached_build(
+    cache: Optional[QuboModelCache],
+    n: int,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    encoding: str = "penalty",
+) -> Tuple[QuboBuildResult, bool]:
+    """
+    Amplify build through the model cache: (build, hit).
+
+    The Amplify objective is memoized in memory only; the underlying QuboMatrix also uses the disk layer.
+    Each call counts as one hit or miss in the cache statistics.
+    """
+    if cache is None:
+        return build_nqueens_qubo(n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding), False
+
+    def build() -> QuboBuildResult:
+        # part of this lookup: only the outer entry counts as a hit or miss
+        matrix, _ = cached_matrix(cache, n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding, count=False)
+        return build_nqueens_qubo(n, w_row=w_row, w_col=w_col, w_diag=w_diag, matrix=matrix, encoding=encoding)
+
+    return cache.get(("amplify",) + model_key(n, w_row, w_col, w_diag, encoding), build)
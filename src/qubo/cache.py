@@ -0,0 +1,162 @@
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from src.config import PATHS
+from src.qubo.encodings import build_encoded_matrix
+from src.qubo.export import load_qubo, write_qubo
+from src.qubo.matrix import QuboMatrix
+from src.utils.timing import timer
+
+# (n, w_row, w_col, w_diag, encoding)
+ModelKey = Tuple[int, float, float, float, str]
+
+DEFAULT_DISK_DIR = PATHS.cache / "qubo"
+
+
+def model_key(n: int, w_row: float, w_col: float, w_diag: float, encoding: str = "penalty") -> ModelKey:
+    return (int(n), float(w_row), float(w_col), float(w_diag), encoding)
+
+
+# Rough in-memory size of one Amplify polynomial term (variable indices, coefficient, hash-map slot)
+_POLY_TERM_BYTES = 96
+
+
+def _sizeof(value: Any) -> int:
+    """Bytes charged against max_bytes: a matrix's arrays, or for an Amplify build its polynomial
+    (estimated per term; the matrix it carries is charged to its own entry)"""
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    matrix = getattr(value, "matrix", None)
+    return int(matrix.num_terms) * _POLY_TERM_BYTES if matrix is not None else 0
+
+
+class QuboModelCache:
+    """
+    Bounded LRU cache of built QUBO models with an optional on-disk layer for QuboMatrix values.
+
+    Entries are evicted oldest-first once either max_entries or max_bytes is exceeded
+    (the most recent entry is always kept). Hits add the original build time to time_saved_s.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 32,
+        max_bytes: int = 512 * 1024 * 1024,
+        disk_dir: Optional[Path] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.time_saved_s = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache_hits": self.hits,
+            "cache_disk_hits": self.disk_hits,
+            "cache_misses": self.misses,
+            "cache_time_saved_s": self.time_saved_s,
+            "cache_entries": len(self._entries),
+            "cache_bytes": self._bytes,
+        }
+
+    def get(self, key: Tuple, build: Callable[[], Any], persist: bool = False, count: bool = True) -> Tuple[Any, bool]:
+        """
+        Return (value, hit); persist=True also reads/writes the disk layer (QuboMatrix only).
+        count=False leaves the hit/miss statistics alone, for lookups nested in another entry's build.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+                self.time_saved_s += entry[1]
+            return entry[0], True
+
+        if persist and self.disk_dir is not None:
+            with timer() as t:
+                loaded = self._load(key)
+                load_time = t()
+            if loaded is not None:
+                value, build_time = loaded
+                if count:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.time_saved_s += max(build_time - load_time, 0.0)
+                self._insert(key, value, build_time)
+                return value, True
+
+        with timer() as t:
+            value = build()
+            build_time = t()
+        if count:
+            self.misses += 1
+        self._insert(key, value, build_time)
+        if persist and self.disk_dir is not None:
+            self._store(key, value, build_time)
+        return value, False
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _insert(self, key: Tuple, value: Any, build_time: float) -> None:
+        size = _sizeof(value)
+        self._entries[key] = (value, build_time, size)
+        self._bytes += size
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, _, old_size) = self._entries.popitem(last=False)
+            self._bytes -= old_size
+
+    def _path(self, key: Tuple) -> Path:
+        # the digest covers the exact weights (repr); n and encoding are only there for browsing
+        n, _, _, _, encoding = key
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()[:20]
+        return self.disk_dir / f"n{n}_{encoding}_{digest}.qubo"
+
+    def _load(self, key: Tuple) -> Optional[Tuple[QuboMatrix, float]]:
+        """
+        Memory-mapped, so processes loading the same entry share one page-cache copy.
+        A file whose recorded n, weights or encoding differ from the key counts as a miss.
+        """
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            matrix = load_qubo(path)
+        except (OSError, ValueError):
+            return None
+        meta = matrix.metadata
+        stored = (matrix.n, meta.get("w_row"), meta.get("w_col"), meta.get("w_diag"), meta.get("encoding"))
+        if stored != tuple(key):
+            return None
+        return matrix, float(meta.pop("build_time_s", 0.0))
+
+    def _store(self, key: Tuple, matrix: QuboMatrix, build_time: float) -> None:
+        write_qubo(matrix, self._path(key), metadata={"build_time_s": build_time})
+
+
+def cached_matrix(
+    cache: Optional[QuboModelCache],
+    n: int,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    encoding: str = "penalty",
+    count: bool = True,
+) -> Tuple[QuboMatrix, bool]:
+    """Build (or fetch) the sparse N-queens QUBO matrix in the given encoding: (matrix, hit)"""
+    build = lambda: build_encoded_matrix(n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)  # noqa: E731
+    if cache is None:
+        return build(), False
+    return cache.get(model_key(n, w_row, w_col, w_diag, encoding), build, persist=True, count=count)
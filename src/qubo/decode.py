@@ -0,0 +1,66 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.utils.solution import Solution
+
+
+def score_boards(boards: Any, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Validate a stack of 0/1 boards in one array pass.
+
+    boards: (S, n, n) or (S, n*n). Row/column occupancy comes from axis sums, diagonal
+    occupancy from one bincount over (sample, diagonal) ids of the placed queens.
+    Violations count missing/extra queens per row and column plus extra queens per diagonal.
+    """
+    b = np.asarray(boards)
+    if n is None:
+        n = b.shape[-1] if b.ndim == 3 else int(round(np.sqrt(b.shape[-1])))
+    b = b.reshape(-1, n, n).astype(np.int32, copy=False)
+    num_samples = b.shape[0]
+    num_diags = 2 * n - 1
+
+    row_occ = b.sum(axis=2)
+    col_occ = b.sum(axis=1)
+
+    s, r, c = np.nonzero(b)
+    main = np.bincount(s * num_diags + (r - c + n - 1), minlength=num_samples * num_diags).reshape(num_samples, num_diags)
+    anti = np.bincount(s * num_diags + (r + c), minlength=num_samples * num_diags).reshape(num_samples, num_diags)
+
+    violations = (
+        np.abs(row_occ - 1).sum(axis=1)
+        + np.abs(col_occ - 1).sum(axis=1)
+        + np.maximum(main - 1, 0).sum(axis=1)
+        + np.maximum(anti - 1, 0).sum(axis=1)
+    )
+    return {
+        "valid": violations == 0,
+        "violations": violations,
+        "queens": row_occ.sum(axis=1),
+    }
+
+
+def distribution(energies: np.ndarray, violations: np.ndarray) -> Dict[str, Any]:
+    """Energy and violation distribution over all samples of one solve"""
+    if len(energies) == 0:
+        return {"num_samples": 0}
+    hist = np.bincount(violations)
+    return {
+        "num_samples": int(len(energies)),
+        "energy_mean": float(np.mean(energies)),
+        "energy_median": float(np.median(energies)),
+        "energy_max": float(np.max(energies)),
+        "violations_min": int(np.min(violations)),
+        "violations_median": float(np.median(violations)),
+        "violation_hist": {int(k): int(v) for k, v in enumerate(hist) if v},
+    }
+
+
+def board_to_solution(board: Any, n: int) -> Optional[Solution]:
+    """Compact q-vector of one decoded sample; None unless every row holds exactly one queen"""
+    b = np.asarray(board).reshape(n, n)
+    if not np.all(b.sum(axis=1) == 1):
+        return None
+    return Solution(array("i", b.argmax(axis=1).astype(np.int32).tobytes()))
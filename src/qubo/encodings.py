@@ -0,0 +1,225 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.qubo.matrix import QuboMatrix, _line_pairs, build_nqueens_qubo_matrix
+from src.utils.resources import traced_peak
+from src.utils.timing import timer
+
+# penalty:     n^2 binaries, every row/column/diagonal constraint as a penalty (build_nqueens_qubo_matrix)
+# one_hot:     n^2 binaries, rows are native one-hot constraints; with one queen per row, "exactly one
+#              per column" reduces to "at most one", so only column and diagonal pair terms remain
+# domain_wall: n(n-1) binaries, each row's column as a domain wall d_1 >= ... >= d_{n-1}
+#              (queen at c where the wall steps down), rows are one-hot by construction
+# pruned:      n^2 binaries, rows and columns both native one-hot (a permutation), leaving
+#              only the diagonal pair terms
+ENCODINGS = ("penalty", "one_hot", "domain_wall", "pruned")
+
+# metadata["one_hot"] of each encoding: the constraints a solver has to enforce itself
+NATIVE_ONE_HOT = {"penalty": None, "one_hot": "rows", "domain_wall": None, "pruned": "rows_cols"}
+
+# Penalty weights each encoding's QUBO depends on; the native constraints replace the others
+ENCODING_WEIGHTS = {
+    "penalty": ("w_row", "w_col", "w_diag"),
+    "one_hot": ("w_col", "w_diag"),
+    "domain_wall": ("w_row", "w_col", "w_diag"),
+    "pruned": ("w_diag",),
+}
+
+
+def check_encoding(encoding: str) -> None:
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown QUBO encoding: {encoding!r} (expected one of {list(ENCODINGS)})")
+
+
+# Expanded terms summed per chunk while rewriting a formulation, to bound peak memory
+_EXPAND_CHUNK = 1 << 20
+
+
+def _sum_terms(keys: np.ndarray, data: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct keys (lo * num_variables + hi) with their coefficients summed"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=data, minlength=unique.size)
+
+
+def _pairs_matrix(n: int, w_row: float, w_col: float, w_diag: float, encoding: str) -> QuboMatrix:
+    """one_hot / pruned: only the pair terms the native constraints don't already imply"""
+    _, _, col_i, col_j, diag_i, diag_j = _line_pairs(n)
+    if encoding == "pruned":
+        col_i, col_j = col_i[:0], col_j[:0]
+    rows = np.concatenate([col_i, diag_i]).astype(np.int32, copy=False)
+    cols = np.concatenate([col_j, diag_j]).astype(np.int32, copy=False)
+    data = np.concatenate([
+        np.full(col_i.size, float(w_col), dtype=np.float64),
+        np.full(diag_i.size, float(w_diag), dtype=np.float64),
+    ])
+    keep = data != 0.0
+    return QuboMatrix(
+        n=n,
+        rows=rows[keep],
+        cols=cols[keep],
+        data=data[keep],
+        offset=0.0,
+        num_variables=n * n,
+    )
+
+
+def _domain_wall_map(n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    x[r, c] = d[r, c] - d[r, c + 1] with d[r, 0] = 1 and d[r, n] = 0 fixed, as
+    (var[n*n, 2], coef[n*n, 2], const[n*n]); d[r, k] for k = 1..n-1 is variable r*(n-1) + k-1.
+    Absent parts have coefficient 0 (and point at variable 0).
+    """
+    r, c = np.divmod(np.arange(n * n), n)
+    var = np.zeros((n * n, 2), dtype=np.int64)
+    coef = np.zeros((n * n, 2), dtype=np.float64)
+    head = c >= 1
+    var[head, 0] = r[head] * (n - 1) + c[head] - 1
+    coef[head, 0] = 1.0
+    tail = c <= n - 2
+    var[tail, 1] = r[tail] * (n - 1) + c[tail]
+    coef[tail, 1] = -1.0
+    const = (~head).astype(np.float64)
+    return var, coef, const
+
+
+def _domain_wall_matrix(n: int, w_row: float, w_col: float, w_diag: float) -> QuboMatrix:
+    """
+    Columns as w_col * (S - 1)^2 and diagonals as w_diag * S(S - 1) / 2 over x = d-differences,
+    plus w_row * d[k+1] * (1 - d[k]) for every step up in a row's wall.
+
+    A broken wall makes some x = -1, so squares are expanded as products instead of x^2 = x;
+    both forms stay >= 0 for any integer S, so every broken or conflicting state costs energy.
+    """
+    _, _, col_i, col_j, diag_i, diag_j = _line_pairs(n)
+    cells = np.arange(n * n, dtype=np.int64)
+    # x-space: sum w * x_i * x_j over (prod_i, prod_j) + sum lin_w * x_i + offset
+    prod_i = np.concatenate([col_i, diag_i, cells]).astype(np.int64)
+    prod_j = np.concatenate([col_j, diag_j, cells]).astype(np.int64)
+    prod_w = np.concatenate([
+        np.full(col_i.size, 2.0 * w_col),
+        np.full(diag_i.size, float(w_diag)),
+        np.full(cells.size, float(w_col + w_diag)),  # x_i^2: one column, two diagonals (1/2 each)
+    ])
+    lin_w = np.full(cells.size, -(2.0 * w_col + w_diag))
+    offset = float(n * w_col)
+
+    var, coef, const = _domain_wall_map(n)
+    num_vars = n * (n - 1)
+    offset += float(np.dot(lin_w, const)) + float(np.dot(prod_w, const[prod_i] * const[prod_j]))
+    keys: List[np.ndarray] = []
+    data: List[np.ndarray] = []
+
+    def add(a: np.ndarray, b: np.ndarray, v: np.ndarray) -> None:
+        keep = v != 0.0
+        a, b = a[keep], b[keep]
+        keys.append(np.minimum(a, b) * num_vars + np.maximum(a, b))
+        data.append(v[keep])
+
+    def flush() -> None:
+        merged = _sum_terms(np.concatenate(keys), np.concatenate(data))
+        keys[:], data[:] = [merged[0]], [merged[1]]
+
+    for k in (0, 1):
+        add(var[cells, k], var[cells, k], lin_w * coef[cells, k])
+    if n > 2:
+        r, k = np.divmod(np.arange(n * (n - 2), dtype=np.int64), n - 2)
+        lower, upper = r * (n - 1) + k, r * (n - 1) + k + 1
+        add(upper, upper, np.full(upper.size, float(w_row)))
+        add(lower, upper, np.full(upper.size, -float(w_row)))
+
+    for lo in range(0, prod_i.size, _EXPAND_CHUNK):
+        hi = lo + _EXPAND_CHUNK
+        pi, pj, pw = prod_i[lo:hi], prod_j[lo:hi], prod_w[lo:hi]
+        for ka in (0, 1):
+            for kb in (0, 1):
+                add(var[pi, ka], var[pj, kb], pw * coef[pi, ka] * coef[pj, kb])
+            add(var[pi, ka], var[pi, ka], pw * coef[pi, ka] * const[pj])
+            add(var[pj, ka], var[pj, ka], pw * coef[pj, ka] * const[pi])
+        flush()
+
+    flush()
+    keep = data[0] != 0.0
+    terms, coefs = keys[0][keep], data[0][keep]
+    out_rows, out_cols, out_data = (terms // num_vars).astype(np.int32), (terms % num_vars).astype(np.int32), coefs
+    return QuboMatrix(n=n, rows=out_rows, cols=out_cols, data=out_data, offset=offset, num_variables=num_vars)
+
+
+def build_encoded_matrix(
+    n: int,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    encoding: str = "penalty",
+) -> QuboMatrix:
+    """
+    The N-queens QUBO in one of ENCODINGS. metadata records the encoding and, under "one_hot",
+    which one-hot constraints the solver must enforce natively (the matrix omits them).
+    Weights an encoding doesn't use (w_row under one_hot/pruned, w_col under pruned) are ignored.
+    """
+    check_encoding(encoding)
+    if encoding == "penalty":
+        matrix = build_nqueens_qubo_matrix(n, w_row=w_row, w_col=w_col, w_diag=w_diag)
+    elif encoding == "domain_wall":
+        matrix = _domain_wall_matrix(n, w_row, w_col, w_diag)
+    else:
+        matrix = _pairs_matrix(n, w_row, w_col, w_diag, encoding)
+    matrix.metadata = {
+        "w_row": w_row, "w_col": w_col, "w_diag": w_diag,
+        "encoding": encoding, "one_hot": NATIVE_ONE_HOT[encoding],
+    }
+    return matrix
+
+
+def decode_boards(matrix: QuboMatrix, samples: Any) -> np.ndarray:
+    """(S, n, n) int8 boards from samples over the matrix's variables"""
+    n = matrix.n
+    x = np.asarray(samples).reshape(-1, matrix.num_variables)
+    if matrix.metadata.get("encoding") != "domain_wall":
+        return x.reshape(-1, n, n).astype(np.int8, copy=False)
+    d = x.reshape(-1, n, n - 1).astype(np.int8, copy=False)
+    s = d.shape[0]
+    walls = np.concatenate([np.ones((s, n, 1), np.int8), d, np.zeros((s, n, 1), np.int8)], axis=2)
+    # a broken wall (a 0 followed by a 1) yields -1 somewhere; only clean steps count as queens
+    return (walls[:, :, :-1] - walls[:, :, 1:] == 1).astype(np.int8)
+
+
+def encode_q(matrix: QuboMatrix, q: Sequence[int]) -> np.ndarray:
+    """Variable assignment (num_variables,) int8 for a 0-indexed q-vector"""
+    n = matrix.n
+    q = np.asarray(q)
+    if matrix.metadata.get("encoding") == "domain_wall":
+        return (np.arange(1, n)[None, :] <= q[:, None]).astype(np.int8).ravel()
+    board = np.zeros((n, n), dtype=np.int8)
+    board[np.arange(n), q] = 1
+    return board.ravel()
+
+
+def encoding_report(
+    n: int,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    encodings: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Per encoding: variables, terms, matrix bytes, build time and peak Python allocation of the build"""
+    out = []
+    for encoding in encodings or ENCODINGS:
+        with timer() as t:
+            matrix = build_encoded_matrix(n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+            build_time = t()
+        # a second, traced build for memory (tracemalloc would distort the timing)
+        with traced_peak() as peak:
+            build_encoded_matrix(n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+        out.append({
+            "encoding": encoding,
+            "n": n,
+            "num_variables": matrix.num_variables,
+            "num_terms": matrix.num_terms,
+            "native_one_hot": NATIVE_ONE_HOT[encoding],
+            "matrix_bytes": matrix.nbytes,
+            "build_time_s": build_time,
+            "build_peak_kb": peak(),
+        })
+    return out
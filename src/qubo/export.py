@@ -0,0 +1,145 @@
+from __future__ import annotations
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, TextIO
+
+import numpy as np
+
+from src.qubo.matrix import QuboMatrix
+
+# Binary layout (little-endian). Sections follow each other without padding; the 40-byte header
+# keeps each one aligned to its element size (cols starts at 40 + 4 * num_terms, 4-byte aligned;
+# data at 40 + 8 * num_terms, 8-byte aligned), so the memory-mapped arrays are aligned:
+#   header     magic "NQQUBO", u16 version, u32 n, u32 num_variables, u64 num_terms,
+#              f64 offset, u64 metadata length
+#   rows       int32[num_terms]
+#   cols       int32[num_terms]
+#   data       float64[num_terms]
+#   var_map    int32[num_variables, 2]  (r, c) of each variable; under domain_wall, (r, k) of wall bit d[r, k]
+#   metadata   UTF-8 JSON (weights, encoding, native one-hot constraints, ...)
+MAGIC = b"NQQUBO"
+VERSION = 1
+_HEADER = struct.Struct("<6sHIIQdQ")
+
+
+def variable_map(matrix: QuboMatrix) -> np.ndarray:
+    """(num_variables, 2) int32: the board row and column (wall position for domain_wall) of each variable"""
+    n = matrix.n
+    idx = np.arange(matrix.num_variables, dtype=np.int64)
+    if matrix.metadata.get("encoding") == "domain_wall":
+        r, k = np.divmod(idx, n - 1)
+        return np.stack([r, k + 1], axis=1).astype(np.int32)
+    return np.stack(np.divmod(idx, n), axis=1).astype(np.int32)
+
+
+def write_qubo(matrix: QuboMatrix, path: Path, metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """Write `matrix` in the binary format (atomically); `metadata` is merged over matrix.metadata"""
+    meta = json.dumps({**matrix.metadata, **(metadata or {})}).encode("utf-8")
+    t = matrix.num_terms
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + f".tmp{os.getpid()}")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, matrix.n, matrix.num_variables, t, float(matrix.offset), len(meta)))
+        for arr, dtype in ((matrix.rows, "<i4"), (matrix.cols, "<i4"), (matrix.data, "<f8")):
+            f.write(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+        f.write(variable_map(matrix).astype("<i4", copy=False).tobytes())
+        f.write(meta)
+    os.replace(tmp, path)
+    return path
+
+
+def read_header(path: Path) -> Dict[str, Any]:
+    with path.open("rb") as f:
+        raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise ValueError(f"{path}: truncated QUBO header")
+    magic, version, n, num_vars, num_terms, offset, meta_len = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a QUBO export (magic {magic!r})")
+    if version != VERSION:
+        raise ValueError(f"{path}: unsupported QUBO export version {version} (expected {VERSION})")
+    return {"n": n, "num_variables": num_vars, "num_terms": num_terms, "offset": offset, "metadata_bytes": meta_len}
+
+
+def _sections(h: Dict[str, Any]) -> Dict[str, int]:
+    """Byte offset of each section"""
+    t, v = h["num_terms"], h["num_variables"]
+    rows = _HEADER.size
+    cols = rows + 4 * t
+    data = cols + 4 * t
+    var_map = data + 8 * t
+    meta = var_map + 8 * v
+    return {"rows": rows, "cols": cols, "data": data, "var_map": var_map, "metadata": meta}
+
+
+def load_qubo(path: Path, mmap: bool = True) -> QuboMatrix:
+    """
+    Read a binary QUBO export. With mmap the term arrays are read-only np.memmap views, so
+    every process that loads the same file shares one page-cache copy instead of its own.
+    """
+    h = read_header(path)
+    at = _sections(h)
+    t = h["num_terms"]
+
+    def section(name: str, dtype: str, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        if mmap:
+            return np.memmap(path, dtype=dtype, mode="r", offset=at[name], shape=(count,))
+        return np.fromfile(path, dtype=dtype, count=count, offset=at[name])
+
+    with path.open("rb") as f:
+        f.seek(at["metadata"])
+        metadata = json.loads(f.read(h["metadata_bytes"]).decode("utf-8"))
+    return QuboMatrix(
+        n=h["n"],
+        rows=section("rows", "<i4", t),
+        cols=section("cols", "<i4", t),
+        data=section("data", "<f8", t),
+        offset=h["offset"],
+        num_variables=h["num_variables"],
+        metadata=metadata,
+    )
+
+
+def load_variable_map(path: Path) -> np.ndarray:
+    h = read_header(path)
+    return np.fromfile(path, dtype="<i4", count=2 * h["num_variables"], offset=_sections(h)["var_map"]).reshape(-1, 2)
+
+
+def _write_lines(path: Path, write: Any) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        write(f)
+    return path
+
+
+def write_qbsolv(matrix: QuboMatrix, path: Path) -> Path:
+    """
+    qbsolv .qubo text: a "p qubo 0 <maxNodes> <nNodes> <nCouplers>" line, then the diagonal
+    entries, then the couplers. The constant offset has no field and goes in a comment.
+    """
+    diag = matrix.rows == matrix.cols
+
+    def write(f: TextIO) -> None:
+        f.write(f"c N-queens n={matrix.n} encoding={matrix.metadata.get('encoding', 'penalty')}\n")
+        f.write(f"c offset {matrix.offset!r}\n")
+        f.write(f"p qubo 0 {matrix.num_variables} {int(diag.sum())} {int((~diag).sum())}\n")
+        for mask in (diag, ~diag):
+            for i, j, v in zip(matrix.rows[mask].tolist(), matrix.cols[mask].tolist(), matrix.data[mask].tolist()):
+                f.write(f"{i} {j} {v!r}\n")
+
+    return _write_lines(path, write)
+
+
+def write_coo(matrix: QuboMatrix, path: Path) -> Path:
+    """BQM COO text as read by dimod's coo serializer: "# vartype=BINARY", then "u v bias" lines (u == v: linear)"""
+    def write(f: TextIO) -> None:
+        f.write("# vartype=BINARY\n")
+        f.write(f"# offset={matrix.offset!r}\n")
+        for i, j, v in zip(matrix.rows.tolist(), matrix.cols.tolist(), matrix.data.tolist()):
+            f.write(f"{i} {j} {v!r}\n")
+
+    return _write_lines(path, write)
@@ -1,16 +1,87 @@
 from __future__ import annotations
 import os
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, List, Optional
+import numpy as np
 from amplify import AmplifyAEClient, solve
 from src.utils.timing import timer
-from src.utils.validate import is_valid_board_x
-from src.qubo.build_qubo import build_nqueens_qubo
+from src.qubo.build_qubo import QuboBuildResult, cached_build
+from src.qubo.cache import QuboModelCache
+from src.qubo.encodings import decode_boards
+from src.qubo.decode import board_to_solution, distribution, score_boards
+from src.qubo.trials import run_trials
 
 
-def to_int_matrix(x_eval: Any) -> List[List[int]]:
-    if hasattr(x_eval, "tolist"):
-        return [[int(v) for v in row] for row in x_eval.tolist()]
-    return [[int(v) for v in row] for row in x_eval]
+def _missing_token(n: int) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "n": n,
+        "time_s": 0.0,
+        "note": "Missing AMPLIFY_AE_TOKEN env var. Set your Amplify AE API token.",
+        "solution": None,
+        "valid": False,
+        "energy": None,
+        "success_rate": None,
+        "build_time_s": None,
+    }
+
+
+def make_client(token: str, num_reads: int = 100, timeout_s: Optional[float] = 1.0) -> AmplifyAEClient:
+    """Configured Amplify AE client; one instance can be shared by concurrent trials"""
+    client = AmplifyAEClient()
+    client.token = token
+
+    # Time limit in ms
+    if timeout_s is not None:
+        client.parameters.time_limit_ms = int(timeout_s * 1000)
+
+    try:
+        client.parameters.num_reads = int(num_reads)
+    except Exception:
+        pass
+    return client
+
+
+def sample_matrix(build: QuboBuildResult, sols: List[Any]) -> np.ndarray:
+    """
+    (samples x num_variables) int8 in matrix variable order, filled in one pass.
+
+    Values has no array export and reading it from Python is ~3x slower than the SDK's own
+    evaluate, so each row comes from evaluate on the variables flattened once.
+    """
+    flat = build.x.ravel()
+    out = np.empty((len(sols), flat.size), dtype=np.int8)
+    for r, sol in enumerate(sols):
+        out[r] = flat.evaluate(sol.values)
+    return out
+
+
+def decode_result(build: QuboBuildResult, result: Any, n: int) -> Dict[str, Any]:
+    """Decode, validate and score every returned sample in one array pass"""
+    with timer() as t:
+        try:
+            sols = list(result)
+        except Exception:
+            sols = []
+        if not sols:
+            sols = [result.best]
+        samples = sample_matrix(build, sols)
+        energies = build.matrix.energy(samples)
+        boards = decode_boards(build.matrix, samples)
+        scores = score_boards(boards, n=n)
+        best_idx = int(np.argmin(energies))
+        decode_time = t()
+
+    # solver-side time as reported by the service (excludes upload/queueing)
+    execution = getattr(result, "execution_time", None)
+    return {
+        "client_time_s": execution.total_seconds() if hasattr(execution, "total_seconds") else None,
+        "solution": board_to_solution(boards[best_idx], n),
+        "valid": bool(scores["valid"][best_idx]),
+        "energy": float(energies[best_idx]),
+        "success_rate": float(scores["valid"].mean()),
+        "decode_time_s": decode_time,
+        **distribution(energies, scores["violations"]),
+    }
 
 
 def solve_with_amplify(
@@ -20,6 +91,8 @@ def solve_with_amplify(
     w_row: float = 5.0,
     w_col: float = 5.0,
     w_diag: float = 1.0,
+    cache: Optional[QuboModelCache] = None,
+    encoding: str = "penalty",
 ) -> Dict[str, Any]:
     """
     Solve the N-Queens QUBO with Amplify Annealing Engine
@@ -30,69 +103,81 @@ def solve_with_amplify(
     """
     token = os.getenv("AMPLIFY_AE_TOKEN")
     if not token:
-        return {
-            "ok": False,
-            "n": n,
-            "time_s": 0.0,
-            "note": "Missing AMPLIFY_AE_TOKEN env var. Set your Amplify AE API token.",
-            "solution_x": None,
-            "valid": False,
-            "energy": None,
-            "success_rate": None,
-        }
-
-    build = build_nqueens_qubo(n=n, w_row=w_row, w_col=w_col, w_diag=w_diag)
-
-    client = AmplifyAEClient()
-    client.token = token
+        return _missing_token(n)
 
-    # Time limit in ms
-    if timeout_s is not None:
-        client.parameters.time_limit_ms = int(timeout_s * 1000)
+    with timer() as t:
+        build, cache_hit = cached_build(cache, n=n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+        build_time = t()
 
-    try:
-        client.parameters.num_reads = int(num_reads)
-    except Exception:
-        pass
+    client = make_client(token, num_reads, timeout_s)
 
     with timer() as t:
-        result = solve(build.objective, client)
+        result = solve(build.model, client)
         elapsed = t()
 
-    # Best solution
-    best = result.best
-    energy = float(best.objective)
-
-    # Decode
-    x_eval = build.x.evaluate(best.values)
-    x_mat = to_int_matrix(x_eval)
-    valid = is_valid_board_x(x_mat)
-
-    # Success rate across returned solutions
-    try:
-        sols = list(result)
-        if len(sols) > 0:
-            valid_ct = 0
-            for sol in sols:
-                x_i = to_int_matrix(build.x.evaluate(sol.values))
-                if is_valid_board_x(x_i):
-                    valid_ct += 1
-            success_rate = valid_ct / len(sols)
-        else:
-            success_rate = None
-    except Exception:
-        success_rate = None
-
     return {
         "ok": True,
         "n": n,
         "time_s": elapsed,
-        "solution_x": x_mat,
-        "valid": valid,
-        "energy": energy,
-        "success_rate": success_rate,
-        "weights": build.metadata,
+        "weights": {k: build.metadata[k] for k in ("w_row", "w_col", "w_diag")},
+        "build_time_s": build_time,
+        "cache_hit": cache_hit,
+        "num_terms": build.metadata["num_terms"],
+        "num_variables": build.metadata["num_variables"],
+        "encoding": encoding,
         "num_reads": num_reads,
         "timeout_s": timeout_s,
+        **decode_result(build, result, n),
     }
-    
\ No newline at end of file
+
+
+def solve_trials_with_amplify(
+    n: int,
+    trials: int,
+    num_reads: int = 100,
+    timeout_s: Optional[float] = 1.0,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    cache: Optional[QuboModelCache] = None,
+    max_in_flight: int = 4,
+    client: Optional[AmplifyAEClient] = None,
+    encoding: str = "penalty",
+) -> List[Dict[str, Any]]:
+    """
+    All trials of one N with the model built once and one shared client.
+
+    Requests go out concurrently (at most max_in_flight, backing off on throttling) and
+    each result is decoded while the others are still pending. Per-trial dicts have the
+    shape of solve_with_amplify; time_s is that trial's round trip.
+    """
+    token = os.getenv("AMPLIFY_AE_TOKEN")
+    if client is None and not token:
+        return [_missing_token(n) for _ in range(trials)]
+
+    with timer() as t:
+        build, cache_hit = cached_build(cache, n=n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+        build_time = t()
+    if client is None:
+        client = make_client(token, num_reads, timeout_s)
+
+    def decode(trial: int, result: Any) -> Dict[str, Any]:
+        return {
+            "ok": True,
+            "n": n,
+            "weights": {k: build.metadata[k] for k in ("w_row", "w_col", "w_diag")},
+            # the model is built once per batch; later trials reuse it
+            "build_time_s": build_time if trial == 0 else 0.0,
+            "cache_hit": cache_hit or trial > 0,
+            "num_terms": build.metadata["num_terms"],
+            "num_variables": build.metadata["num_variables"],
+            "encoding": encoding,
+            "num_reads": num_reads,
+            "timeout_s": timeout_s,
+            **decode_result(build, result, n),
+        }
+
+    results = run_trials(trials, lambda trial: solve(build.model, client), decode, max_in_flight=max_in_flight)
+    for r in results:
+        r["time_s"] = r.pop("request_time_s", 0.0)
+    return results
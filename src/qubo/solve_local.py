@@ -0,0 +1,382 @@
+from __future__ import annotations
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.timing import timer
+from src.qubo.cache import QuboModelCache, cached_matrix
+from src.qubo.encodings import decode_boards, encode_q
+from src.qubo.decode import board_to_solution, distribution, score_boards
+from src.qubo.matrix import QuboMatrix
+
+# Variable updates between clock checks inside a sweep (a sweep is num_variables updates, so at
+# large N checking only between sweeps can overrun timeout_s by a whole sweep)
+_CLOCK_EVERY = 256
+# Slack on target_energy for the drift of incrementally updated energies
+_TARGET_TOL = 1e-6
+
+
+def neighbour_table(matrix: QuboMatrix) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Padded symmetric adjacency of the QUBO: (nbr[N, D], wts[N, D], linear[N]).
+
+    Padding slots point at the variable itself with weight 0 so they never change a field.
+    """
+    num_vars = matrix.num_variables
+    diag = matrix.rows == matrix.cols
+    linear = np.zeros(num_vars, dtype=np.float64)
+    np.add.at(linear, matrix.rows[diag], matrix.data[diag])
+
+    off = ~diag
+    src = np.concatenate([matrix.rows[off], matrix.cols[off]])
+    dst = np.concatenate([matrix.cols[off], matrix.rows[off]])
+    w = np.concatenate([matrix.data[off], matrix.data[off]])
+
+    order = np.argsort(src, kind="stable")
+    src, dst, w = src[order], dst[order], w[order]
+    counts = np.bincount(src, minlength=num_vars)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    slot = np.arange(src.size) - starts[src]
+
+    width = int(counts.max()) if counts.size else 0
+    nbr = np.repeat(np.arange(num_vars, dtype=np.int32)[:, None], max(width, 1), axis=1)
+    wts = np.zeros_like(nbr, dtype=np.float64)
+    nbr[src, slot] = dst
+    wts[src, slot] = w
+    return nbr, wts, linear
+
+
+def default_beta_range(wts: np.ndarray, linear: np.ndarray) -> Tuple[float, float]:
+    """Hot end accepts the largest flip with p=0.5, cold end rejects the smallest with p=0.01"""
+    max_delta = float(np.max(np.abs(linear) + np.abs(wts).sum(axis=1)))
+    coefs = np.abs(np.concatenate([wts.ravel(), linear]))
+    min_delta = float(coefs[coefs > 0].min()) if np.any(coefs > 0) else 1.0
+    return np.log(2.0) / max(max_delta, 1e-12), np.log(100.0) / min_delta
+
+
+def _mark_hits(first: np.ndarray, energy: np.ndarray, target: Optional[float], now: float) -> None:
+    """Record `now` for reads reaching target energy for the first time"""
+    if target is not None:
+        first[np.isnan(first) & (energy <= target + _TARGET_TOL)] = now
+
+
+def anneal(
+    matrix: QuboMatrix,
+    num_reads: int = 100,
+    num_sweeps: int = 1000,
+    timeout_s: Optional[float] = None,
+    seed: Optional[int] = None,
+    beta_range: Optional[Tuple[float, float]] = None,
+    initial_state: Optional[np.ndarray] = None,
+    target_energy: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Batched single-flip Metropolis annealing of all reads at once.
+
+    State is a (reads x N) int8 matrix; each read keeps its local fields
+    h_i = Q_ii + sum_j Q_ij x_j so a flip costs O(degree) instead of a full energy evaluation.
+    The schedule advances by sweep count or, if timeout_s is set, by elapsed time, whichever is further.
+    The clock is also checked every _CLOCK_EVERY updates within a sweep; once timeout_s has passed
+    the run stops mid-sweep with the best states so far (sweeps counts completed sweeps only).
+    `initial_state` is one state for every read or one per read. With `target_energy`, the
+    result's time_to_target_s holds when each read's best state first reached it (checked
+    between sweeps; NaN if never).
+    """
+    rng = np.random.default_rng(seed)
+    nbr, wts, linear = neighbour_table(matrix)
+    num_vars = matrix.num_variables
+    reads = np.arange(num_reads)
+
+    if initial_state is not None:
+        x = np.broadcast_to(np.asarray(initial_state, dtype=np.int8).reshape(-1, num_vars), (num_reads, num_vars)).copy()
+    else:
+        x = rng.integers(0, 2, size=(num_reads, num_vars), dtype=np.int8)
+
+    fields = np.empty((num_reads, num_vars), dtype=np.float64)
+    for r in range(num_reads):
+        fields[r] = linear + (x[r, nbr] * wts).sum(axis=1)
+    energy = matrix.energy(x)
+
+    best_x = x.copy()
+    best_energy = energy.copy()
+    first_hit = np.full(num_reads, np.nan)
+    _mark_hits(first_hit, best_energy, target_energy, 0.0)
+
+    beta_min, beta_max = beta_range or default_beta_range(wts, linear)
+    sweeps = 0
+    with timer() as t:
+        while True:
+            progress = sweeps / max(num_sweeps, 1)
+            if timeout_s is not None:
+                progress = max(progress, t() / timeout_s)
+            if progress >= 1.0:
+                break
+            beta = beta_min * (beta_max / beta_min) ** progress
+
+            flips = rng.integers(0, num_vars, size=(num_vars, num_reads))
+            draws = rng.random((num_vars, num_reads))
+            expired = False
+            for k, (i, u) in enumerate(zip(flips, draws)):
+                if timeout_s is not None and k and k % _CLOCK_EVERY == 0 and t() >= timeout_s:
+                    expired = True
+                    break
+                xi = x[reads, i]
+                delta = (1 - 2 * xi) * fields[reads, i]
+                accept = (delta <= 0) | (u < np.exp(-beta * np.maximum(delta, 0.0)))
+                if not accept.any():
+                    continue
+                b, ia = reads[accept], i[accept]
+                step = (1 - 2 * xi[accept]).astype(np.int8)
+                x[b, ia] += step
+                energy[b] += delta[accept]
+                fields[b[:, None], nbr[ia]] += step[:, None] * wts[ia]
+
+            improved = energy < best_energy
+            best_x[improved] = x[improved]
+            best_energy[improved] = energy[improved]
+            _mark_hits(first_hit, best_energy, target_energy, t())
+            if expired:
+                break
+            sweeps += 1
+        elapsed = t()
+
+    return {
+        "samples": best_x,
+        "energies": best_energy,
+        "sweeps": sweeps,
+        "time_s": elapsed,
+        "time_to_target_s": first_hit,
+    }
+
+
+def _pair_weight(nbr: np.ndarray, wts: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+    """Q_ij for index arrays i, j (0 where the variables don't interact)"""
+    return (wts[i] * (nbr[i] == j[:, None])).sum(axis=1)
+
+
+def anneal_one_hot(
+    matrix: QuboMatrix,
+    num_reads: int = 100,
+    num_sweeps: int = 1000,
+    timeout_s: Optional[float] = None,
+    seed: Optional[int] = None,
+    beta_range: Optional[Tuple[float, float]] = None,
+    initial_q: Optional[Sequence[int]] = None,
+    target_energy: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Batched Metropolis annealing that keeps the native one-hot constraints of a one_hot / pruned
+    encoding satisfied: each read is a q-vector (one queen per row) and moves relocate a queen
+    within its row ("rows") or swap two rows' columns ("rows_cols", a permutation throughout).
+
+    A move is two or four single flips, so its cost comes from the same local fields as in
+    anneal() plus the pair weights among the touched cells. A sweep is num_variables moves;
+    timeout_s is enforced within a sweep as in anneal().
+    `initial_q` is 0-indexed, one q-vector for every read or one per read. Returns anneal()'s
+    dict with samples as (reads x n^2) boards.
+    """
+    n = matrix.n
+    swap = matrix.metadata.get("one_hot") == "rows_cols"
+    rng = np.random.default_rng(seed)
+    nbr, wts, linear = neighbour_table(matrix)
+    num_vars = matrix.num_variables
+    reads = np.arange(num_reads)
+
+    if initial_q is not None:
+        q = np.broadcast_to(np.asarray(initial_q, dtype=np.int64).reshape(-1, n), (num_reads, n)).copy()
+    elif swap:
+        q = np.argsort(rng.random((num_reads, n)), axis=1)
+    else:
+        q = rng.integers(0, n, size=(num_reads, n))
+    base = np.arange(n) * n
+
+    x = np.zeros((num_reads, num_vars), dtype=np.int8)
+    x[reads[:, None], base + q] = 1
+    fields = np.empty((num_reads, num_vars), dtype=np.float64)
+    for r in range(num_reads):
+        fields[r] = linear + (x[r, nbr] * wts).sum(axis=1)
+    energy = matrix.energy(x)
+
+    def flip(b: np.ndarray, i: np.ndarray, step: int) -> None:
+        fields[b[:, None], nbr[i]] += step * wts[i]
+
+    best_q = q.copy()
+    best_energy = energy.copy()
+    first_hit = np.full(num_reads, np.nan)
+    _mark_hits(first_hit, best_energy, target_energy, 0.0)
+
+    beta_min, beta_max = beta_range or default_beta_range(wts, linear)
+    sweeps = 0
+    with timer() as t:
+        while True:
+            progress = sweeps / max(num_sweeps, 1)
+            if timeout_s is not None:
+                progress = max(progress, t() / timeout_s)
+            if progress >= 1.0 or n < 2:
+                break
+            beta = beta_min * (beta_max / beta_min) ** progress
+
+            picks = rng.integers(0, n, size=(num_vars, num_reads))
+            shifts = rng.integers(1, n, size=(num_vars, num_reads))
+            draws = rng.random((num_vars, num_reads))
+            expired = False
+            for k, (r1, shift, u) in enumerate(zip(picks, shifts, draws)):
+                if timeout_s is not None and k and k % _CLOCK_EVERY == 0 and t() >= timeout_s:
+                    expired = True
+                    break
+                a = q[reads, r1]
+                A = base[r1] + a
+                if swap:
+                    r2 = (r1 + shift) % n
+                    b = q[reads, r2]
+                    B, C, D = base[r2] + b, base[r1] + b, base[r2] + a
+                    delta = (
+                        fields[reads, C] + fields[reads, D] - fields[reads, A] - fields[reads, B]
+                        + _pair_weight(nbr, wts, A, B) + _pair_weight(nbr, wts, C, D)
+                        - _pair_weight(nbr, wts, A, C) - _pair_weight(nbr, wts, B, C)
+                        - _pair_weight(nbr, wts, A, D) - _pair_weight(nbr, wts, B, D)
+                    )
+                else:
+                    b = (a + shift) % n
+                    C = base[r1] + b
+                    delta = fields[reads, C] - fields[reads, A] - _pair_weight(nbr, wts, A, C)
+                accept = (delta <= 0) | (u < np.exp(-beta * np.maximum(delta, 0.0)))
+                if not accept.any():
+                    continue
+                k = reads[accept]
+                energy[k] += delta[accept]
+                flip(k, A[accept], -1)
+                if swap:
+                    flip(k, B[accept], -1)
+                    flip(k, D[accept], 1)
+                    q[k, r2[accept]] = a[accept]
+                flip(k, C[accept], 1)
+                q[k, r1[accept]] = b[accept]
+
+            improved = energy < best_energy
+            best_q[improved] = q[improved]
+            best_energy[improved] = energy[improved]
+            _mark_hits(first_hit, best_energy, target_energy, t())
+            if expired:
+                break
+            sweeps += 1
+        elapsed = t()
+
+    samples = np.zeros((num_reads, num_vars), dtype=np.int8)
+    samples[reads[:, None], base + best_q] = 1
+    return {
+        "samples": samples,
+        "energies": best_energy,
+        "sweeps": sweeps,
+        "time_s": elapsed,
+        "time_to_target_s": first_hit,
+    }
+
+
+def perturbed_hints(q0: np.ndarray, num_reads: int, swaps: int, seed: Optional[int] = None) -> np.ndarray:
+    """
+    (num_reads, n) copies of the 0-indexed q-vector q0, each with `swaps` random row swaps.
+
+    A swap keeps the placement a permutation, so it stays feasible under every encoding's
+    native constraints, but it breaks the zero-energy hint: starting every read from q0 itself
+    would make a warm-started run valid at time zero.
+    """
+    rng = np.random.default_rng(None if seed is None else [seed, 1])
+    q = np.tile(np.asarray(q0, dtype=np.int64), (num_reads, 1))
+    n = q.shape[1]
+    if n < 2:
+        return q
+    reads = np.arange(num_reads)
+    for _ in range(swaps):
+        r1 = rng.integers(0, n, size=num_reads)
+        r2 = (r1 + rng.integers(1, n, size=num_reads)) % n
+        q[reads, r1], q[reads, r2] = q[reads, r2], q[reads, r1]
+    return q
+
+
+def solve_with_local_sa(
+    n: int,
+    num_reads: int = 100,
+    timeout_s: Optional[float] = 1.0,
+    w_row: float = 5.0,
+    w_col: float = 5.0,
+    w_diag: float = 1.0,
+    num_sweeps: int = 1000,
+    seed: Optional[int] = None,
+    cache: Optional[QuboModelCache] = None,
+    initial_q: Optional[Sequence[int]] = None,
+    encoding: str = "penalty",
+    hint_swaps: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Solve the N-Queens QUBO with the local batched simulated annealer (no network, seedable).
+
+    `initial_q` (1-indexed q-vector) warm-starts the reads from that placement, each perturbed
+    by `hint_swaps` random row swaps (default max(2, n // 8)). Encodings with native one-hot
+    constraints (one_hot, pruned) run on anneal_one_hot, the others on anneal.
+    Returns the same result dict as solve_with_amplify, plus time_to_valid_s: when each read
+    first reached energy 0, i.e. a valid placement (None if it never did), and
+    time_to_first_s, the earliest of those.
+    """
+    with timer() as t:
+        matrix, cache_hit = cached_matrix(cache, n, w_row=w_row, w_col=w_col, w_diag=w_diag, encoding=encoding)
+        build_time = t()
+
+    q0 = None
+    if initial_q is not None:
+        swaps = max(2, n // 8) if hint_swaps is None else hint_swaps
+        q0 = perturbed_hints(np.asarray(initial_q) - 1, num_reads, swaps, seed=seed)
+    if matrix.metadata.get("one_hot"):
+        out = anneal_one_hot(
+            matrix,
+            num_reads=num_reads,
+            num_sweeps=num_sweeps,
+            timeout_s=timeout_s,
+            seed=seed,
+            initial_q=q0,
+            target_energy=0.0,
+        )
+    else:
+        out = anneal(
+            matrix,
+            num_reads=num_reads,
+            num_sweeps=num_sweeps,
+            timeout_s=timeout_s,
+            seed=seed,
+            initial_state=None if q0 is None else np.stack([encode_q(matrix, q) for q in q0]),
+            target_energy=0.0,
+        )
+
+    with timer() as t:
+        energies = out["energies"]
+        boards = decode_boards(matrix, out["samples"])
+        scores = score_boards(boards, n=n)
+        best_idx = int(np.argmin(energies))
+        decode_time = t()
+    solution = board_to_solution(boards[best_idx], n)
+    hits = out["time_to_target_s"]
+
+    return {
+        "ok": True,
+        "n": n,
+        "time_s": out["time_s"],
+        "solution": solution,
+        "valid": bool(scores["valid"][best_idx]),
+        "energy": float(energies[best_idx]),
+        "success_rate": float(scores["valid"].mean()),
+        "weights": {"w_row": w_row, "w_col": w_col, "w_diag": w_diag},
+        "build_time_s": build_time,
+        "cache_hit": cache_hit,
+        "num_terms": matrix.num_terms,
+        "num_variables": matrix.num_variables,
+        "encoding": encoding,
+        "num_reads": num_reads,
+        "timeout_s": timeout_s,
+        "client_time_s": out["time_s"],
+        "sweeps": out["sweeps"],
+        "seed": seed,
+        "decode_time_s": decode_time,
+        "time_to_valid_s": [None if np.isnan(h) else float(h) for h in hits],
+        "time_to_first_s": float(np.nanmin(hits)) if not np.all(np.isnan(hits)) else None,
+        **distribution(energies, scores["violations"]),
+    }
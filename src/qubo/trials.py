@@ -0,0 +1,77 @@
+from __future__ import annotations
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.timing import timer
+
+# Substrings of client errors that mean "slow down" rather than "broken request"
+THROTTLE_MARKERS = ("429", "too many requests", "rate limit", "throttl")
+
+
+class Throttled(Exception):
+    """Raised by clients (or fakes) when the service asks us to back off"""
+
+
+def is_throttled(exc: BaseException) -> bool:
+    return isinstance(exc, Throttled) or any(m in str(exc).lower() for m in THROTTLE_MARKERS)
+
+
+def with_backoff(
+    call: Callable[[], Any],
+    max_retries: int = 5,
+    base_delay_s: float = 0.5,
+    max_delay_s: float = 30.0,
+) -> Any:
+    """Retry `call` on throttling with exponential backoff and full jitter; other errors propagate"""
+    for attempt in range(max_retries + 1):
+        try:
+            return call()
+        except Exception as exc:
+            if attempt == max_retries or not is_throttled(exc):
+                raise
+            time.sleep(random.uniform(0, min(max_delay_s, base_delay_s * 2 ** attempt)))
+
+
+def run_trials(
+    trials: int,
+    submit: Callable[[int], Any],
+    decode: Callable[[int, Any], Dict[str, Any]],
+    max_in_flight: int = 4,
+    max_retries: int = 5,
+    base_delay_s: float = 0.5,
+    on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Send `trials` requests through a thread pool, at most max_in_flight at a time.
+
+    submit(trial) is the blocking round trip (retried with backoff on throttling) and runs on
+    the pool; decode(trial, raw) runs on the calling thread as soon as a request completes,
+    so decoding overlaps the requests still in flight. A failed request yields
+    {"ok": False, "valid": False, "error": ...} for its trial. Results come back in trial order.
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+
+    def timed_submit(trial: int) -> Any:
+        with timer() as t:
+            raw = with_backoff(lambda: submit(trial), max_retries=max_retries, base_delay_s=base_delay_s)
+            return raw, t()
+
+    with ThreadPoolExecutor(max_workers=max(1, max_in_flight)) as pool:
+        pending: Dict[Future, int] = {pool.submit(timed_submit, trial): trial for trial in range(trials)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                trial = pending.pop(fut)
+                try:
+                    raw, request_time = fut.result()
+                    result = decode(trial, raw)
+                    result.setdefault("request_time_s", request_time)
+                except Exception as exc:
+                    result = {"ok": False, "valid": False, "error": f"{type(exc).__name__}: {exc}"}
+                results[trial] = result
+                if on_result is not None:
+                    on_result(trial, result)
+
+    return [results[trial] for trial in range(trials)]
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# stderr text of a solver or flattener that ran out of address space
+MEMORY_LIMIT_MARKERS = ("bad_alloc", "out of memory", "cannot allocate memory", "memoryerror", "failed to map segment")
+# Exit signals a capped process dies with when an allocation fails (abort, segfault)
+MEMORY_LIMIT_SIGNALS = (signal.SIGABRT, signal.SIGSEGV, signal.SIGBUS)
+
+# Result columns filled from a child's rusage
+USAGE_COLUMNS = ("peak_rss_kb", "user_time_s", "sys_time_s", "ctx_switches_vol", "ctx_switches_invol")
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_TO_KB = 1 / 1024 if sys.platform == "darwin" else 1
+
+
+def memory_limited(cmd: Sequence[str], max_memory_mb: Optional[int]) -> List[str]:
+    """
+    `cmd` run with its address space capped (RLIMIT_AS, inherited by its own children).
+
+    The limit is set by `prlimit --as` (or sh's `ulimit -v` without util-linux), which then
+    execs the command, so the child keeps its pid and process group. A preexec_fn would do the
+    same without the extra exec, but it isn't safe in a process that runs threads.
+    """
+    if max_memory_mb is None:
+        return list(cmd)
+    limit = int(max_memory_mb) * 1024 ** 2
+    if shutil.which("prlimit"):
+        return ["prlimit", f"--as={limit}", *cmd]
+    return ["sh", "-c", 'ulimit -v "$1" && shift && exec "$@"', "sh", str(limit // 1024), *cmd]
+
+
+def usage_fields(ru: Any) -> Dict[str, Any]:
+    """Result columns of one rusage (from wait4 or getrusage)"""
+    return {
+        "peak_rss_kb": int(ru.ru_maxrss * _MAXRSS_TO_KB),
+        "user_time_s": float(ru.ru_utime),
+        "sys_time_s": float(ru.ru_stime),
+        "ctx_switches_vol": int(ru.ru_nvcsw),
+        "ctx_switches_invol": int(ru.ru_nivcsw),
+    }
+
+
+def combine_usage(*usages: Dict[str, Any]) -> Dict[str, Any]:
+    """Usage of consecutive processes: peak RSS is the max, times and switches add up"""
+    present = [u for u in usages if u.get("user_time_s") is not None]
+    if not present:
+        return {}
+    out = {k: sum(u[k] for u in present) for k in USAGE_COLUMNS if k != "peak_rss_kb"}
+    peaks = [u["peak_rss_kb"] for u in present if u.get("peak_rss_kb") is not None]
+    out["peak_rss_kb"] = max(peaks) if peaks else None
+    return out
+
+
+def _tree_pids(root: int) -> List[int]:
+    """`root` and its live descendants (Linux /proc/<pid>/task/<pid>/children)"""
+    pids, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        try:
+            with open(f"/proc/{pid}/task/{pid}/children") as f:
+                stack.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def _vm_hwm_kb(pid: int) -> Optional[int]:
+    """Peak RSS of one live process's own address space (VmHWM), None once it is gone"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class RssWatch:
+    """
+    Largest VmHWM over a child's process tree, sampled from /proc on a daemon thread.
+
+    VmHWM belongs to the address space set up by exec, so unlike ru_maxrss it doesn't start
+    from the parent's high-water mark. Without /proc (macOS) peak stays None.
+    """
+
+    def __init__(self, pid: int, interval_s: float = 0.05) -> None:
+        self.pid = pid
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(interval_s,), daemon=True)
+        self._thread.start()
+
+    def sample(self) -> None:
+        for pid in _tree_pids(self.pid):
+            hwm = _vm_hwm_kb(pid)
+            if hwm is not None and (self.peak is None or hwm > self.peak):
+                self.peak = hwm
+
+    def _run(self, interval_s: float) -> None:
+        while True:
+            self.sample()
+            if self._stop.wait(interval_s):
+                return
+
+    def stop(self) -> Optional[int]:
+        self._stop.set()
+        self._thread.join()
+        return self.peak
+
+
+def wait_with_usage(proc: subprocess.Popen, watch: Optional[RssWatch] = None) -> Dict[str, Any]:
+    """
+    Reap `proc` with wait4 and return its resource usage.
+
+    The usage covers the child and every descendant it waited for (the flattener and solver
+    binary of a minizinc process). Descendants still alive when the child died, e.g. after
+    a process-group kill, are reaped by init and not counted.
+
+    A child's ru_maxrss starts from its parent's RSS high-water mark (Linux carries it over
+    fork and exec), so it is only trusted above this process's own. peak_rss_kb is the larger
+    of that and the VmHWM `watch` sampled while the child ran.
+    """
+    try:
+        _, status, ru = os.wait4(proc.pid, 0)
+    except ChildProcessError:
+        # already reaped elsewhere; the exit code is still known but the usage is lost
+        proc.wait()
+        if watch is not None:
+            watch.stop()
+        return {}
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    usage = usage_fields(ru)
+    sampled = watch.stop() if watch is not None else None
+    if usage["peak_rss_kb"] <= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_TO_KB:
+        usage["peak_rss_kb"] = None
+    peaks = [p for p in (usage["peak_rss_kb"], sampled) if p is not None]
+    usage["peak_rss_kb"] = max(peaks) if peaks else None
+    return usage
+
+
+def kill_group(proc: Any, watch: Optional[RssWatch] = None) -> None:
+    """SIGKILL a child started with start_new_session and everything it spawned (after a last RSS sample)"""
+    if watch is not None:
+        watch.sample()
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_with_usage(
+    cmd: Sequence[str],
+    timeout_s: Optional[float] = None,
+    max_memory_mb: Optional[int] = None,
+) -> Tuple[Optional[int], str, str, bool, Dict[str, Any]]:
+    """
+    subprocess.run() that also reports usage: (returncode, stdout, stderr, timed_out, usage).
+
+    The child gets its own process group, which is killed once timeout_s passes.
+    """
+    proc = subprocess.Popen(
+        memory_limited(cmd, max_memory_mb),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    out: List[bytes] = []
+    err: List[bytes] = []
+    readers = [
+        threading.Thread(target=lambda: out.append(proc.stdout.read()), daemon=True),
+        threading.Thread(target=lambda: err.append(proc.stderr.read()), daemon=True),
+    ]
+    for th in readers:
+        th.start()
+    watch = RssWatch(proc.pid)
+    expired = threading.Event()
+
+    def on_timeout() -> None:
+        expired.set()
+        kill_group(proc, watch)
+
+    killer = threading.Timer(timeout_s, on_timeout) if timeout_s is not None else None
+    if killer is not None:
+        killer.daemon = True
+        killer.start()
+    try:
+        usage = wait_with_usage(proc, watch)
+    finally:
+        if killer is not None:
+            killer.cancel()
+    for th in readers:
+        th.join(timeout=5)
+    proc.stdout.close()
+    proc.stderr.close()
+    decode = lambda chunks: b"".join(chunks).decode("utf-8", "replace")
+    return proc.returncode, decode(out), decode(err), expired.is_set(), usage
+
+
+def hit_memory_limit(max_memory_mb: Optional[int], returncode: Optional[int], stderr: str, killed: bool = False) -> bool:
+    """Whether a capped process failed because the cap was reached (not for runs we killed ourselves)"""
+    if max_memory_mb is None or killed or returncode == 0 or returncode is None:
+        return False
+    if any(m in stderr.lower() for m in MEMORY_LIMIT_MARKERS):
+        return True
+    return returncode in tuple(-int(s) for s in MEMORY_LIMIT_SIGNALS)
+
+
+@contextmanager
+def traced_peak() -> Iterator[Callable[[], int]]:
+    """
+    `with traced_peak() as peak: ...` then peak() -> peak Python allocation (KiB) inside the block.
+
+    tracemalloc slows allocation-heavy code down noticeably, so time measured inside the
+    block is not comparable to untraced runs.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    peak = [0]
+    try:
+        yield lambda: peak[0]
+    finally:
+        peak[0] = max(0, tracemalloc.get_traced_memory()[1] - base) // 1024
+        if started:
+            tracemalloc.stop()
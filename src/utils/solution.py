@@ -0,0 +1,68 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Iterable, List, Optional, Tuple
+
+from src.utils.validate import is_valid_q
+
+
+class Solution:
+    """
+    Compact N-queens placement: q[r] = 0-indexed column of the queen in row r.
+
+    Stored as array('i') (4 bytes per row); dense boards and 1-indexed q-vectors
+    only exist at the edges through the converters below.
+    """
+    __slots__ = ("q",)
+
+    def __init__(self, q: Iterable[int]) -> None:
+        self.q = q if isinstance(q, array) and q.typecode == "i" else array("i", q)
+
+    @property
+    def n(self) -> int:
+        return len(self.q)
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Solution) and self.q == other.q
+
+    def __repr__(self) -> str:
+        head = ", ".join(str(c) for c in self.q[:8])
+        return f"Solution(n={self.n}, q=[{head}{', ...' if self.n > 8 else ''}])"
+
+    @classmethod
+    def from_q1(cls, q1: Iterable[int]) -> "Solution":
+        """From a 1-indexed q-vector (MiniZinc / explicit construction convention)"""
+        return cls(c - 1 for c in q1)
+
+    @classmethod
+    def from_board(cls, x: Any) -> Optional["Solution"]:
+        """From a dense 0/1 board; None unless every row holds exactly one queen"""
+        q = array("i")
+        for row in x:
+            cols = [c for c, v in enumerate(row) if v]
+            if len(cols) != 1:
+                return None
+            q.append(cols[0])
+        return cls(q)
+
+    def is_valid(self) -> bool:
+        return is_valid_q(self.q, base=0)
+
+    def to_list(self) -> List[int]:
+        return self.q.tolist()
+
+    def to_q1(self) -> List[int]:
+        return [c + 1 for c in self.q]
+
+    def to_board(self) -> List[List[int]]:
+        n = self.n
+        x = [[0] * n for _ in range(n)]
+        for r, c in enumerate(self.q):
+            x[r][c] = 1
+        return x
+
+    def to_positions(self) -> List[Tuple[int, int]]:
+        """1-indexed (row, col) pairs as used by is_valid_positions"""
+        return [(r + 1, c + 1) for r, c in enumerate(self.q)]
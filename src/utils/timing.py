@@ -1,7 +1,30 @@
 import time
 from contextlib import contextmanager
+from typing import Dict, Iterator
 
 @contextmanager
 def timer():
     start = time.perf_counter()
-    yield lambda: time.perf_counter() - start
\ No newline at end of file
+    yield lambda: time.perf_counter() - start
+
+
+class PhaseTimer:
+    """Accumulates wall time per named phase: `with phases.phase("validate"): ...`"""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def get(self, name: str) -> float:
+        return self.phases.get(name, 0.0)
+
+    def columns(self, suffix: str = "_time_s") -> Dict[str, float]:
+        """{"<phase>_time_s": seconds} for the result rows"""
+        return {f"{name}{suffix}": t for name, t in self.phases.items()}
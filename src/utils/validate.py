@@ -18,10 +18,26 @@ def is_valid_positions(pos: List[Tuple[int,int]]) -> bool:
     return True
 
 def is_valid_board_x(x: List[List[int]]) -> bool:
-    n = len(x)
-    pos = []
+    # dense boards only at the edges: reduce to a q-vector, then the O(n) check
+    q = []
+    for row in x:
+        cols = [c for c, v in enumerate(row) if v == 1]
+        if len(cols) != 1:
+            return False
+        q.append(cols[0])
+    return is_valid_q(q, base=0)
+
+def is_valid_q(q, base: int = 1) -> bool:
+    """O(n) check of a q-vector (q[r] = column of the queen in row r, columns counted from `base`)"""
+    n = len(q)
+    cols = bytearray(n)
+    diag1 = bytearray(2 * n)
+    diag2 = bytearray(2 * n)
     for r in range(n):
-        for c in range(n):
-            if x[r][c] == 1:
-                pos.append((r+1, c+1))
-    return len(pos) == n and is_valid_positions(pos)
\ No newline at end of file
+        c = q[r] - base
+        if c < 0 or c >= n:
+            return False
+        if cols[c] or diag1[r + c] or diag2[r - c + n]:
+            return False
+        cols[c] = diag1[r + c] = diag2[r - c + n] = 1
+    return True
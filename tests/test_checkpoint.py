@@ -0,0 +1,56 @@
+import pytest
+
+from src.experiments.checkpoint import RunCheckpoint
+
+COLUMNS = ["approach", "solver", "n", "trial", "valid", "time_s"]
+CONFIG = {"qubo_trials": 2, "qubo_seed": 0}
+
+
+def _row(n, trial=0, valid=True):
+    return {"approach": "qubo_local_sa", "solver": "local_sa", "n": n, "trial": trial, "valid": valid, "time_s": 0.1}
+
+
+def test_resume_restores_completed_rows_and_failures(tmp_path):
+    out = tmp_path / "results.csv"
+    ckpt = RunCheckpoint(out, COLUMNS, CONFIG)
+    ckpt.append(_row(4))
+    ckpt.append(_row(5, valid=False))
+    ckpt.close()  # rows are already on disk; no final write needed
+
+    resumed = RunCheckpoint(out, COLUMNS, CONFIG, resume=True)
+    assert resumed.is_done([("qubo_local_sa", "local_sa", 4, 0)])
+    assert not resumed.is_done([("qubo_local_sa", "local_sa", 4, 1)])
+    assert resumed.failed_at == {"qubo_local_sa": 5}
+    assert [r["n"] for r in resumed.previous_rows] == [4, 5]
+    resumed.close()
+
+    with pytest.raises(ValueError):
+        RunCheckpoint(out, COLUMNS, {**CONFIG, "qubo_seed": 1}, resume=True)
+
+
+def test_fresh_run_truncates(tmp_path):
+    out = tmp_path / "results.csv"
+    ckpt = RunCheckpoint(out, COLUMNS, CONFIG)
+    ckpt.append(_row(4))
+    ckpt.close()
+    RunCheckpoint(out, COLUMNS, CONFIG).close()
+    assert out.read_text().count("\n") == 1
+
+
+def test_rows_logged_before_a_crash_are_resumed(tmp_path):
+    out = tmp_path / "results.csv"
+    ckpt = RunCheckpoint(out, COLUMNS, CONFIG)
+    manifest = ckpt.path.read_text()
+    ckpt.append(_row(4))
+    ckpt.append(_row(5, valid=False))
+    assert ckpt.path.read_text() == manifest  # appends only touch the line log
+    with ckpt.log_path.open("a") as f:
+        f.write('["qubo_local_sa", "local_sa", 6')  # torn last line
+    # no close(): the process died here
+
+    resumed = RunCheckpoint(out, COLUMNS, CONFIG, resume=True)
+    assert resumed.is_done([("qubo_local_sa", "local_sa", 4, 0), ("qubo_local_sa", "local_sa", 5, 0)])
+    assert resumed.failed_at == {"qubo_local_sa": 5}
+    assert [r["n"] for r in resumed.previous_rows] == [4, 5]
+    resumed.close()
+    assert not resumed.log_path.exists()
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+# Packages only the subcommand handlers may import
+HEAVY = ("numpy", "pandas", "pyarrow", "matplotlib", "amplify")
+# Import budget of src.cli, relative to a bare interpreter measured in the same test so a loaded
+# CI machine slows both sides: at most this many modules beyond `python -c pass` (56 measured) ...
+MODULE_BUDGET = 80
+# ... and at most this multiple of the bare interpreter's summed import times (about 3x measured)
+TIME_BUDGET_RATIO = 10
+
+
+def _importtime(*args: str) -> Dict[str, int]:
+    """Module -> cumulative import time (us) from `python -X importtime`"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True, cwd=ROOT)
+    assert proc.returncode == 0, proc.stderr
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_is_light():
+    baseline = _importtime("-c", "pass")
+    times = _importtime("-c", "import src.cli")
+    assert not [m for m in times if m.split(".")[0] in HEAVY]
+    assert len(set(times) - set(baseline)) <= MODULE_BUDGET
+    assert times["src.cli"] <= TIME_BUDGET_RATIO * sum(baseline.values())
+
+
+def test_subcommand_help_loads_no_handler_code():
+    for cmd in ("run", "summarize", "plot", "export", "count", "solve", "tune-weights", "encodings", "export-qubo"):
+        times = _importtime("-m", "src.cli", cmd, "--help")
+        assert not [m for m in times if m.split(".")[0] in HEAVY], cmd
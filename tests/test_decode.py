@@ -0,0 +1,15 @@
+import numpy as np
+
+from src.qubo.decode import score_boards
+from src.utils.validate import is_valid_board_x
+
+
+def test_score_boards_matches_scalar_validator():
+    rng = np.random.default_rng(1)
+    boards = rng.integers(0, 2, size=(50, 5, 5))
+    boards[0] = 0
+    boards[0][np.arange(5), [0, 2, 4, 1, 3]] = 1
+    scores = score_boards(boards)
+    assert scores["valid"][0]
+    assert scores["violations"][0] == 0
+    assert list(scores["valid"]) == [is_valid_board_x(b.tolist()) for b in boards]
@@ -0,0 +1,10 @@
+from src.enumerate.bitboard import KNOWN_COUNTS, count_solutions
+
+
+def test_counts_match_known_sequence():
+    for n in range(1, 10):
+        assert count_solutions(n, jobs=1)["solutions"] == KNOWN_COUNTS[n]
+
+
+def test_parallel_count_matches_serial():
+    assert count_solutions(10, jobs=2)["solutions"] == count_solutions(10, jobs=1)["solutions"] == 724
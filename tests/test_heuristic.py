@@ -0,0 +1,26 @@
+from src.heuristic.explicit import explicit_q
+from src.heuristic.min_conflicts import min_conflicts
+from src.qubo.solve_local import solve_with_local_sa
+from src.utils.validate import is_valid_q
+
+
+def test_min_conflicts_finds_valid_placement():
+    for n in (4, 8, 25, 2000):
+        r = min_conflicts(n, seed=0)
+        assert r["ok"] and r["solution"].is_valid()
+
+
+def test_explicit_construction_is_valid():
+    for n in range(4, 200):
+        assert is_valid_q(explicit_q(n)), n
+
+
+def test_local_sa_warm_start_repairs_a_perturbed_hint():
+    for encoding in ("penalty", "pruned"):
+        r = solve_with_local_sa(16, num_reads=8, num_sweeps=0, seed=0, initial_q=explicit_q(16), encoding=encoding)
+        assert r["success_rate"] == 0.0 and r["time_to_first_s"] is None
+
+    r = solve_with_local_sa(8, num_reads=8, num_sweeps=200, seed=0, initial_q=explicit_q(8), encoding="pruned")
+    hits = [t for t in r["time_to_valid_s"] if t is not None]
+    assert len(hits) == round(r["success_rate"] * 8) > 0
+    assert r["time_to_first_s"] == min(hits) > 0
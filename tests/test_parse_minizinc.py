@@ -0,0 +1,21 @@
+from src.cp.parse_minizinc import SolutionStreamParser
+from src.utils.solution import Solution
+
+
+def test_stream_parser_yields_one_solution_per_separator():
+    stdout = "n=4\nq=[2, 4,\n 1, 3]\n----------\nq=[3, 1, 4, 2]\n----------\n==========\n"
+    parser = SolutionStreamParser()
+    sols = [s for s in (parser.feed(line) for line in stdout.splitlines()) if s is not None]
+    assert sols == [Solution([1, 3, 0, 2]), Solution([2, 0, 3, 1])]
+    assert parser.num_solutions == 2
+    assert parser.status == "ALL_SOLUTIONS"
+    assert parser.extra_lines == ["n=4"]
+
+
+def test_stream_parser_collects_statistics():
+    stdout = "q=[2, 4, 1, 3]\n----------\n%%%mzn-stat: nodes=12\n%%%mzn-stat: solveTime=0.004\n%%%mzn-stat-end\n% time elapsed: 0.25 s\n"
+    parser = SolutionStreamParser()
+    for line in stdout.splitlines():
+        parser.feed(line)
+    assert parser.stats == {"nodes": 12, "solveTime": 0.004, "timeElapsed": 0.25}
+    assert parser.extra_lines == []
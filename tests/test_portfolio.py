@@ -0,0 +1,52 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from src.experiments import portfolio
+from src.experiments.portfolio import check_engine, log_race, race, solve_portfolio, win_stats
+
+
+def test_race_returns_a_valid_solution_and_logs_the_win(tmp_path):
+    log = tmp_path / "wins.jsonl"
+    r = solve_portfolio(12, ["explicit", "heuristic"], timeout_s=30, seed=0, log_path=log)
+    assert r["winner"] in ("explicit", "heuristic")
+    assert r["solution"].is_valid() and len(r["solution"]) == 12
+    assert r["engines"][r["winner"]]["status"] == "won"
+
+    log_race({"n": 20, "winner": None, "time_s": 1.0, "engines": {"explicit": {"status": "invalid", "time_s": 1.0}}}, log)
+    stats = win_stats(log, n=12)
+    assert sum(s["wins"] for s in stats.values()) == 1
+    assert all(s["races"] == 1 for s in stats.values())
+    assert win_stats(log)["explicit"]["races"] == 2
+
+
+def test_unknown_engine_is_rejected():
+    check_engine("cp_integer:chuffed")
+    with pytest.raises(ValueError):
+        check_engine("cp_integer")
+    with pytest.raises(ValueError):
+        solve_portfolio(8, ["annealer"], log_path=None)
+
+
+def test_losing_process_engine_is_killed(tmp_path, monkeypatch):
+    pid_file = tmp_path / "slow.pid"
+    solve = portfolio._solve_in_process
+
+    def fake(engine, n, timeout_s, seed):
+        # runs in the forked engine process
+        if engine == "qubo_local_sa":
+            pid_file.write_text(str(os.getpid()))
+            time.sleep(60)
+        deadline = time.monotonic() + 10
+        while not pid_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return solve(engine, n, timeout_s, seed)
+
+    monkeypatch.setattr(portfolio, "_solve_in_process", fake)
+    r = asyncio.run(race(12, ["explicit", "qubo_local_sa"], timeout_s=30))
+    assert r["winner"] == "explicit" and r["time_s"] < 30
+    assert r["engines"]["qubo_local_sa"]["status"] == "cancelled"
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+amplify = pytest.importorskip("amplify")
+
+from src.qubo.build_qubo import build_nqueens_qubo, to_amplify  # noqa: E402
+from src.qubo.encodings import ENCODINGS, build_encoded_matrix, encode_q  # noqa: E402
+from src.qubo.solve_amplify import decode_result, sample_matrix  # noqa: E402
+
+
+def test_amplify_objective_matches_matrix_energy():
+    rng = np.random.default_rng(0)
+    for encoding in ENCODINGS:
+        m = build_encoded_matrix(5, w_row=2.0, w_col=3.0, w_diag=1.5, encoding=encoding)
+        x, objective = to_amplify(m)
+        variables = x.ravel().tolist()
+        for sample in rng.integers(0, 2, (4, m.num_variables)):
+            value = objective.substitute(dict(zip(variables, sample.tolist())))
+            assert value.as_dict().get((), 0.0) == pytest.approx(m.energy(sample)[0]), encoding
+
+
+class _FixedResult:
+    def __init__(self, solutions):
+        self._sols = solutions
+
+    @property
+    def _solutions(self):
+        return [(s, timedelta(0)) for s in self._sols]
+
+    @property
+    def _response_time(self):
+        return timedelta(0)
+
+    @property
+    def _execution_time(self):
+        return timedelta(0)
+
+
+class _FixedClient:
+    """Custom Amplify client answering with the given assignments (indexed by variable id)"""
+
+    parameters = None
+    version = "0"
+
+    def __init__(self, assignments):
+        self.assignments = assignments
+
+    @property
+    def acceptable_degrees(self):
+        return amplify.AcceptableDegrees(objective={"Binary": "Quadratic"})
+
+    def solve(self, objective, constraints, dry_run=False):
+        if dry_run:
+            return None
+        ids = [v.id for v in objective.variables]
+        return _FixedResult([[float(a[i]) for i in ids] for a in self.assignments])
+
+
+def test_decode_result_scores_every_sample():
+    build = build_nqueens_qubo(6)
+    valid = encode_q(build.matrix, [1, 3, 5, 0, 2, 4])
+    result = amplify.solve(build.model, _FixedClient([valid, np.zeros_like(valid)]))
+    assert np.array_equal(sample_matrix(build, list(result))[0], valid)
+    r = decode_result(build, result, 6)
+    assert r["valid"] and r["energy"] == 0.0 and r["success_rate"] == 0.5
+    assert r["solution"].to_list() == [1, 3, 5, 0, 2, 4]
@@ -0,0 +1,71 @@
+import numpy as np
+
+from src.qubo.cache import _POLY_TERM_BYTES, QuboModelCache, cached_matrix
+from src.qubo.matrix import QuboMatrix
+
+
+def _matrix(size):
+    idx = np.arange(size, dtype=np.int32)
+    return QuboMatrix(n=1, rows=idx, cols=idx, data=np.ones(size), offset=0.0, num_variables=size)
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = QuboModelCache(max_entries=2)
+    for k in ("a", "b", "c"):
+        cache.get((k,), lambda: _matrix(4))
+    assert len(cache) == 2
+    _, hit = cache.get(("a",), lambda: _matrix(4))
+    assert not hit
+
+    one = _matrix(10).nbytes  # 160 bytes
+    cache = QuboModelCache(max_bytes=2 * one)
+    cache.get(("a",), lambda: _matrix(10))
+    cache.get(("b",), lambda: _matrix(10))
+    cache.get(("a",), lambda: _matrix(10))  # refresh a; b is now the oldest
+    cache.get(("c",), lambda: _matrix(10))
+    assert cache.stats()["cache_bytes"] == 2 * one
+    assert cache.get(("a",), lambda: _matrix(10))[1] and not cache.get(("b",), lambda: _matrix(10))[1]
+
+
+def test_counters_and_time_saved():
+    cache = QuboModelCache()
+    cached_matrix(cache, 6)
+    for _ in range(2):
+        _, hit = cached_matrix(cache, 6)
+        assert hit
+    stats = cache.stats()
+    assert (stats["cache_hits"], stats["cache_misses"], stats["cache_disk_hits"]) == (2, 1, 0)
+    assert stats["cache_time_saved_s"] > 0
+
+    # a lookup nested in another entry's build (cached_build's matrix) doesn't count
+    cache.get(("inner",), lambda: _matrix(4), count=False)
+    assert cache.stats()["cache_misses"] == 1
+
+
+def test_amplify_entry_is_charged_by_its_polynomial():
+    class Build:
+        matrix = _matrix(1000)
+
+    cache = QuboModelCache()
+    cache.get(("amplify",), Build)
+    assert cache.stats()["cache_bytes"] == 1000 * _POLY_TERM_BYTES
+
+
+def test_disk_round_trip_across_instances(tmp_path):
+    first = QuboModelCache(disk_dir=tmp_path)
+    built, hit = cached_matrix(first, 8, encoding="one_hot")
+    assert not hit
+
+    second = QuboModelCache(disk_dir=tmp_path)
+    loaded, hit = cached_matrix(second, 8, encoding="one_hot")
+    assert hit and second.stats()["cache_disk_hits"] == 1
+    assert loaded.metadata == built.metadata
+    x = np.random.default_rng(0).integers(0, 2, (4, built.num_variables), dtype=np.int8)
+    assert np.array_equal(loaded.energy(x), built.energy(x))
+
+
+def test_nearby_weights_get_their_own_disk_entry(tmp_path):
+    cached_matrix(QuboModelCache(disk_dir=tmp_path), 6, w_row=5.0)
+    m, hit = cached_matrix(QuboModelCache(disk_dir=tmp_path), 6, w_row=5.0000001)
+    assert not hit and m.metadata["w_row"] == 5.0000001
+    assert len(list(tmp_path.glob("*.qubo"))) == 2
@@ -0,0 +1,38 @@
+import itertools
+
+import numpy as np
+
+from src.qubo.decode import score_boards
+from src.qubo.encodings import ENCODINGS, build_encoded_matrix, decode_boards, encode_q
+from src.qubo.solve_local import anneal_one_hot
+
+
+def test_every_encoding_round_trips_a_solution_at_zero_energy():
+    q = [1, 3, 0, 2]
+    for encoding in ENCODINGS:
+        m = build_encoded_matrix(4, encoding=encoding)
+        x = encode_q(m, q)
+        assert m.energy(x)[0] == 0.0
+        assert decode_boards(m, x)[0].argmax(axis=1).tolist() == q
+
+
+def test_domain_wall_ground_states_are_exactly_the_solutions():
+    for n, count in ((4, 2), (5, 10)):
+        m = build_encoded_matrix(n, w_row=2.0, w_col=1.0, w_diag=1.0, encoding="domain_wall")
+        assert m.num_variables == n * (n - 1)
+        x = np.array(list(itertools.product([0, 1], repeat=m.num_variables)), dtype=np.int8)
+        energies = m.energy(x)
+        valid = score_boards(decode_boards(m, x), n=n)["valid"]
+        assert valid.sum() == count
+        assert np.all(energies[valid] == 0.0) and np.all(energies[~valid] > 0.0)
+
+
+def test_one_hot_annealing_keeps_constraints_and_tracks_energy():
+    for encoding in ("one_hot", "pruned"):
+        m = build_encoded_matrix(8, encoding=encoding)
+        out = anneal_one_hot(m, num_reads=8, num_sweeps=20, seed=0)
+        boards = out["samples"].reshape(-1, 8, 8)
+        assert np.all(boards.sum(axis=2) == 1)
+        if encoding == "pruned":
+            assert np.all(boards.sum(axis=1) == 1)
+        assert np.allclose(out["energies"], m.energy(out["samples"]))
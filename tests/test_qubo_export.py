@@ -0,0 +1,32 @@
+import numpy as np
+
+from src.qubo.encodings import build_encoded_matrix, encode_q
+from src.qubo.export import _sections, load_qubo, read_header, load_variable_map, write_coo, write_qbsolv, write_qubo
+
+
+def test_binary_export_memory_maps_back_to_the_same_qubo(tmp_path):
+    for encoding in ("penalty", "domain_wall"):
+        m = build_encoded_matrix(6, w_row=2.0, encoding=encoding)
+        path = write_qubo(m, tmp_path / f"{encoding}.bin")
+        loaded = load_qubo(path)
+        assert isinstance(loaded.data, np.memmap)
+        assert loaded.metadata == m.metadata and loaded.offset == m.offset
+        x = np.random.default_rng(0).integers(0, 2, (8, m.num_variables), dtype=np.int8)
+        assert np.array_equal(loaded.energy(x), m.energy(x))
+        assert loaded.energy(encode_q(loaded, [1, 3, 5, 0, 2, 4]))[0] == 0.0
+
+    h = read_header(tmp_path / "domain_wall.bin")
+    at = _sections({**h, "num_terms": 2 * h["num_terms"] + 1})  # odd term counts too
+    assert at["cols"] % 4 == 0 and at["data"] % 8 == 0 and at["var_map"] % 4 == 0
+    var_map = load_variable_map(tmp_path / "domain_wall.bin")
+    assert var_map.shape == (30, 2) and var_map[6].tolist() == [1, 2]
+
+
+def test_text_exports_list_every_term(tmp_path):
+    m = build_encoded_matrix(4)
+    qbsolv = write_qbsolv(m, tmp_path / "m.qubo").read_text().splitlines()
+    header = next(line for line in qbsolv if line.startswith("p "))
+    diag = int(np.sum(m.rows == m.cols))
+    assert header == f"p qubo 0 16 {diag} {m.num_terms - diag}"
+    coo = write_coo(m, tmp_path / "m.coo").read_text().splitlines()
+    assert coo[0] == "# vartype=BINARY" and len(coo) == 2 + m.num_terms
@@ -0,0 +1,45 @@
+import itertools
+
+import numpy as np
+
+from src.qubo.matrix import build_nqueens_qubo_matrix
+from src.qubo.solve_local import anneal
+
+
+def brute_energy(x, n, w_row, w_col, w_diag):
+    e = 0.0
+    for r in range(n):
+        e += w_row * (sum(x[r][c] for c in range(n)) - 1) ** 2
+    for c in range(n):
+        e += w_col * (sum(x[r][c] for r in range(n)) - 1) ** 2
+    cells = [(r, c) for r in range(n) for c in range(n)]
+    for (r1, c1), (r2, c2) in itertools.combinations(cells, 2):
+        if r1 - c1 == r2 - c2 or r1 + c1 == r2 + c2:
+            e += w_diag * x[r1][c1] * x[r2][c2]
+    return e
+
+
+def test_matrix_energy_matches_penalty_definition():
+    n = 5
+    rng = np.random.default_rng(0)
+    m = build_nqueens_qubo_matrix(n, w_row=3.0, w_col=2.0, w_diag=1.5)
+    assert np.all(m.rows <= m.cols)
+
+    boards = rng.integers(0, 2, size=(20, n, n))
+    expected = [brute_energy(b.tolist(), n, 3.0, 2.0, 1.5) for b in boards]
+    assert np.allclose(m.energy(boards), expected)
+
+
+def test_valid_board_has_zero_energy():
+    # q = [1, 3, 0, 2] is a 4-queens solution
+    board = np.zeros((4, 4), dtype=np.int8)
+    board[np.arange(4), [1, 3, 0, 2]] = 1
+    m = build_nqueens_qubo_matrix(4)
+    assert m.energy(board)[0] == 0.0
+
+
+def test_anneal_stops_mid_sweep_at_the_timeout():
+    m = build_nqueens_qubo_matrix(120)  # one sweep is 14,400 batched updates, far longer than the limit
+    r = anneal(m, num_reads=4, num_sweeps=1000, timeout_s=0.05, seed=0)
+    assert r["sweeps"] == 0 and r["time_s"] < 1.0
+    assert np.allclose(m.energy(r["samples"]), r["energies"])
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from src.qubo.trials import Throttled, run_trials
+
+
+class FakeClient:
+    """Remote solver stand-in: fixed latency, throttles the first `throttle` requests"""
+
+    def __init__(self, latency_s=0.2, throttle=0):
+        self.latency_s = latency_s
+        self.throttle = throttle
+        self.in_flight = self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def solve(self, trial):
+        with self.lock:
+            if self.throttle > 0:
+                self.throttle -= 1
+                raise Throttled("429 Too Many Requests")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency_s)
+        with self.lock:
+            self.in_flight -= 1
+        return trial * 10
+
+
+def test_trials_overlap_and_respect_limit():
+    client = FakeClient()
+    start = time.perf_counter()
+    out = run_trials(10, client.solve, lambda trial, raw: {"valid": True, "raw": raw}, max_in_flight=10)
+    assert time.perf_counter() - start < 3 * client.latency_s
+    assert [r["raw"] for r in out] == [t * 10 for t in range(10)]
+
+    client = FakeClient(latency_s=0.05)
+    run_trials(10, client.solve, lambda trial, raw: {"valid": True}, max_in_flight=3)
+    assert client.max_in_flight <= 3
+
+
+def test_throttled_requests_are_retried():
+    client = FakeClient(latency_s=0.01, throttle=3)
+    out = run_trials(4, client.solve, lambda trial, raw: {"valid": True}, max_in_flight=2, base_delay_s=0.01)
+    assert all(r["valid"] for r in out)
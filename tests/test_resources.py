@@ -0,0 +1,41 @@
+import shutil
+import sys
+
+from src.utils import resources
+from src.utils.resources import combine_usage, hit_memory_limit, run_with_usage, traced_peak
+
+
+def test_capped_child_fails_as_memory_limit(monkeypatch):
+    for which in (shutil.which, lambda name: None):  # prlimit, then the sh ulimit fallback
+        monkeypatch.setattr(resources.shutil, "which", which)
+        cmd = [sys.executable, "-c", "x = bytearray(512 * 1024 ** 2)"]
+        returncode, _, stderr, expired, usage = run_with_usage(cmd, max_memory_mb=256)
+        assert returncode != 0 and not expired
+        assert hit_memory_limit(256, returncode, stderr)
+        assert usage["user_time_s"] >= 0 and usage["ctx_switches_vol"] >= 0
+
+        returncode, _, stderr, _, _ = run_with_usage([sys.executable, "-c", "pass"], max_memory_mb=256)
+        assert returncode == 0 and not hit_memory_limit(256, returncode, stderr)
+
+
+def test_combine_usage_and_traced_peak():
+    a = {"peak_rss_kb": 100, "user_time_s": 1.0, "sys_time_s": 0.5, "ctx_switches_vol": 1, "ctx_switches_invol": 2}
+    b = {"peak_rss_kb": None, "user_time_s": 2.0, "sys_time_s": 0.5, "ctx_switches_vol": 3, "ctx_switches_invol": 4}
+    assert combine_usage(a, b) == {
+        "peak_rss_kb": 100, "user_time_s": 3.0, "sys_time_s": 1.0, "ctx_switches_vol": 4, "ctx_switches_invol": 6,
+    }
+    assert combine_usage({}, {}) == {}
+
+    with traced_peak() as peak:
+        buf = [0] * 1_000_000
+        del buf
+    assert peak() >= 7000
+
+
+def test_child_peak_rss_is_measured_below_the_drivers_own():
+    ballast = b"x" * (192 * 1024 ** 2)  # push this process's high-water mark above the child's
+    cmd = [sys.executable, "-c", "import time; x = b'x' * (64 * 1024 ** 2); time.sleep(0.3)"]
+    returncode, _, _, _, usage = run_with_usage(cmd)
+    del ballast
+    assert returncode == 0
+    assert usage["peak_rss_kb"] is not None and 64 * 1024 <= usage["peak_rss_kb"] < 192 * 1024
@@ -0,0 +1,47 @@
+from src.cp.result_cache import CpResultCache
+from src.utils.solution import Solution
+
+
+def _inputs(tmp_path, n):
+    model, dzn = tmp_path / "m.mzn", tmp_path / f"n{n}.dzn"
+    model.write_text("int: n;")
+    dzn.write_text(f"n = {n};\n")
+    return model, dzn
+
+
+def test_roundtrip_and_uncacheable_runs(tmp_path):
+    cache = CpResultCache(tmp_path / "r.sqlite")
+    key = cache.key(*_inputs(tmp_path, 4), "gecode", 60)
+    assert cache.get(key) is None
+
+    assert cache.put(key, {"ok": True, "time_s": 0.5, "solution": Solution([1, 3, 0, 2]), "timed_out": False})
+    hit = cache.get(key)
+    assert hit["solution"] == Solution([1, 3, 0, 2]) and hit["time_s"] == 0.5
+    assert CpResultCache(tmp_path / "r.sqlite", refresh=True).get(key) is None
+
+    other = cache.key(*_inputs(tmp_path, 5), "gecode", 60)
+    assert other != key
+    assert not cache.put(other, {"ok": False, "solution": None, "timed_out": True})
+    assert cache.get(other) is None
+
+
+def test_runs_stopped_by_the_minizinc_time_limit_are_not_cached(tmp_path):
+    cache = CpResultCache(tmp_path / "r.sqlite")
+    key = cache.key(*_inputs(tmp_path, 30), "gecode", 10)
+    # --time-limit expiry: exit code 0, no Python-side timeout
+    unknown = {"ok": True, "returncode": 0, "status": "UNKNOWN", "solution": None, "timed_out": False, "time_s": 10.1}
+    assert not cache.put(key, unknown, timeout_s=10)
+    assert not cache.put(key, {**unknown, "status": None}, timeout_s=10)
+    assert cache.get(key) is None
+
+    unsat = {**unknown, "status": "UNSATISFIABLE", "time_s": 0.2}
+    assert cache.put(key, unsat, timeout_s=10)
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = CpResultCache(tmp_path / "r.sqlite", max_bytes=200)
+    keys = [cache.key(*_inputs(tmp_path, n), "gecode", 60) for n in (4, 5, 6)]
+    for k in keys:
+        cache.put(k, {"ok": True, "stdout": "x" * 80, "solution": None})
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
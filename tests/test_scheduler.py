@@ -0,0 +1,30 @@
+from src.experiments.scheduler import Unit, run_units, run_units_async
+
+
+def _fake_run(unit):
+    # "a" fails from N=6 on, "b" never fails
+    return {"approach": unit.approach, "n": unit.n, "trial": unit.trial, "valid": unit.approach == "b" or unit.n < 6}
+
+
+def _units():
+    return [Unit(a, n, t) for n in (4, 5, 6, 7, 8) for a in ("a", "b") for t in range(2)]
+
+
+def test_serial_stops_approach_after_first_failure():
+    rows = run_units(_units(), _fake_run, jobs=1)
+    assert max(r["n"] for r in rows if r["approach"] == "a") == 6
+    assert max(r["n"] for r in rows if r["approach"] == "b") == 8
+
+
+def test_parallel_matches_serial_order():
+    assert run_units(_units(), _fake_run, jobs=3) == run_units(_units(), _fake_run, jobs=1)
+
+
+def test_async_matches_serial_order():
+    import asyncio
+
+    async def run(unit):
+        await asyncio.sleep(0.001 * (10 - unit.n))
+        return _fake_run(unit)
+
+    assert asyncio.run(run_units_async(_units(), run)) == run_units(_units(), _fake_run, jobs=1)
@@ -0,0 +1,13 @@
+from src.cp.parse_minizinc import parse_solution_from_stdout
+from src.utils.solution import Solution
+from src.utils.validate import is_valid_positions
+
+
+def test_solution_roundtrip():
+    sol = parse_solution_from_stdout("n=4\nq=[2, 4, 1, 3]\n----------\n")
+    assert sol == Solution([1, 3, 0, 2])
+    assert sol.is_valid()
+    assert sol.to_q1() == [2, 4, 1, 3]
+    assert Solution.from_board(sol.to_board()) == sol
+    assert is_valid_positions(sol.to_positions())
+    assert Solution.from_board([[1, 1], [0, 0]]) is None
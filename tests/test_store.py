@@ -0,0 +1,23 @@
+import math
+
+from src.experiments.store import list_runs, read_results, write_run
+
+
+def test_typed_roundtrip_with_projection_and_partition_pruning(tmp_path):
+    rows = [
+        {"approach": "cp_boolean", "solver": "gecode", "n": 8, "trial": 0, "ok": True, "valid": True, "time_s": 0.1},
+        # as read back from a CSV: strings and NaN for missing values
+        {"approach": "qubo_local_sa", "solver": "local_sa", "n": "8", "trial": 1.0, "ok": "True", "valid": "False",
+         "time_s": "0.5", "energy": float("nan")},
+    ]
+    write_run(rows, "r1", tmp_path)
+    write_run(rows[:1], "r2", tmp_path)
+    assert list_runs(tmp_path) == ["r1", "r2"]
+
+    df = read_results(tmp_path, ["approach", "n", "valid", "energy"], runs=["r1"])
+    assert list(df.columns) == ["approach", "n", "valid", "energy"]
+    assert len(df) == 2
+    q = df[df["approach"] == "qubo_local_sa"].iloc[0]
+    assert q["n"] == 8 and not q["valid"] and math.isnan(q["energy"])
+
+    assert len(read_results(tmp_path, ["n"], approaches=["cp_boolean"])) == 2
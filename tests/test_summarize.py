@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.experiments.sketch import KllSketch
+from src.experiments.store import write_run
+from src.experiments.summarize import SUMMARY_STATE_FILE, summarize_results
+
+
+def _rows(seed, n_rows=40):
+    rng = np.random.default_rng(seed)
+    return [
+        {"approach": "qubo_local_sa", "solver": "local_sa", "n": int(n), "trial": i, "ok": True,
+         "valid": bool(v), "time_s": float(t), "energy": float(e)}
+        for i, (n, v, t, e) in enumerate(zip(rng.choice([8, 10], n_rows), rng.random(n_rows) < 0.7,
+                                             rng.exponential(1.0, n_rows), rng.integers(0, 5, n_rows)))
+    ]
+
+
+def _expected(rows):
+    df = pd.DataFrame(rows)
+    return df.groupby(["approach", "solver", "n"]).agg(
+        runs=("valid", "count"), valid_rate=("valid", "mean"), time_mean=("time_s", "mean"),
+        time_median=("time_s", "median"), time_p90=("time_s", lambda x: x.quantile(0.9)),
+        energy_min=("energy", "min"),
+    ).reset_index()
+
+
+def test_csv_summary_matches_pandas(tmp_path):
+    rows = _rows(0)
+    pd.DataFrame(rows).to_csv(tmp_path / "results.csv", index=False)
+    got = summarize_results(tmp_path / "results.csv", tmp_path / "summary.csv")
+    pd.testing.assert_frame_equal(got[_expected(rows).columns], _expected(rows), check_dtype=False)
+
+
+def test_store_state_folds_only_new_runs(tmp_path):
+    store = tmp_path / "store"
+    write_run(_rows(1), "r1", store)
+    summarize_results(store, tmp_path / "summary.csv")
+    state = json.loads((store / SUMMARY_STATE_FILE).read_text())
+    assert list(state["runs"]) == ["r1"]
+
+    write_run(_rows(2), "r2", store)
+    got = summarize_results(store, tmp_path / "summary.csv")
+    state2 = json.loads((store / SUMMARY_STATE_FILE).read_text())
+    assert state2["runs"]["r1"] == state["runs"]["r1"]
+    expected = _expected(_rows(1) + _rows(2))
+    pd.testing.assert_frame_equal(got[expected.columns], expected, check_dtype=False)
+
+    only_r2 = summarize_results(store, tmp_path / "summary.csv", runs=["r2"])
+    assert only_r2["runs"].sum() == 40
+
+
+def test_kll_sketch_merges_within_rank_error():
+    rng = np.random.default_rng(0)
+    xs = rng.random(50_000)
+    a, b = KllSketch(), KllSketch()
+    a.extend(xs[:30_000])
+    b.extend(xs[30_000:])
+    merged = KllSketch.from_dict(json.loads(json.dumps(a.to_dict()))).merge(b)
+    assert merged.n == len(xs)
+    for q in (0.5, 0.9):
+        assert abs(np.mean(xs <= merged.quantile(q)) - q) < 0.02
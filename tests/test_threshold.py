@@ -0,0 +1,34 @@
+from src.experiments.scheduler import Unit
+from src.experiments.threshold import ThresholdSearch, search_thresholds
+
+
+def test_search_brackets_then_bisects():
+    search, probed = ThresholdSearch(n_min=4, n_max=1000), []
+    while (n := search.next_n()) is not None:
+        probed.append(n)
+        search.record(n, n < 37)
+    assert probed == [4, 8, 16, 32, 64, 48, 40, 36, 38, 37]
+    assert (search.passed, search.failed) == (36, 37)
+
+    capped = ThresholdSearch(n_min=4, n_max=10)
+    while (n := capped.next_n()) is not None:
+        capped.record(n, True)
+    assert (capped.passed, capped.failed) == (10, None)
+
+
+def test_probe_stops_at_first_invalid_trial():
+    limits = {"a": 10, "b": 5}
+    ran = []
+
+    def run(unit):
+        ran.append(unit)
+        # approach b's trial 1 fails from N=5 on
+        valid = unit.n < limits[unit.approach] or (unit.approach == "b" and unit.trial != 1)
+        return {"approach": unit.approach, "n": unit.n, "trial": unit.trial, "valid": valid}
+
+    rows, searches = search_thresholds(
+        ["a", "b"], lambda a, n: [Unit(a, n, t) for t in range(3)], run, n_min=4, n_max=64,
+    )
+    assert searches["a"].failed == 10 and searches["b"].failed == 5
+    assert len(rows) == len(ran)
+    assert Unit("b", 8, 2) not in ran
@@ -0,0 +1,45 @@
+from src.experiments import tune_weights as tw
+
+
+def test_successive_halving_keeps_the_fastest_valid_weights(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_evaluate(n, weights, reads, solver, timeout_s, seed, encoding):
+        calls.append((weights, reads))
+        rate = 1.0 if weights == (2.0, 2.0, 1.0) else 0.25
+        return {"num_samples": reads, "success_rate": rate, "time_s": reads / 100, "energy_mean": 0.0}
+
+    monkeypatch.setattr(tw, "evaluate", fake_evaluate)
+    rungs = []
+    table = tmp_path / "weights.json"
+    tuned = tw.tune_weights([6], solver="local_sa", min_reads=4, eta=3, out=table,
+                            on_rung=lambda n, reads, arms: rungs.append((reads, len(arms))))
+
+    assert rungs == [(4, 48), (12, 16), (36, 5)]
+    assert len(calls) == 48 + 16 + 5
+    assert (tuned[6]["w_row"], tuned[6]["w_col"], tuned[6]["w_diag"]) == (2.0, 2.0, 1.0)
+
+    tw.save_weight_table(table, "local_sa", {20: {"w_row": 3.0, "w_col": 3.0, "w_diag": 1.0}})
+    loaded = tw.load_weight_table(table, "local_sa")
+    default = {"w_row": 5.0, "w_col": 5.0, "w_diag": 1.0}
+    assert tw.weights_for(loaded, 6, default)["w_row"] == 2.0
+    assert tw.weights_for(loaded, 14, default)["w_row"] == 3.0
+    assert tw.load_weight_table(table, "amplify_ae") is None
+    assert tw.weights_for(None, 6, default) == default
+
+
+def test_grid_collapses_to_the_weights_an_encoding_uses(tmp_path, monkeypatch):
+    seen = []
+
+    def fake_evaluate(n, weights, reads, solver, timeout_s, seed, encoding):
+        seen.append(weights)
+        return {"num_samples": reads, "success_rate": 0.5, "time_s": 1.0, "energy_mean": 0.0}
+
+    monkeypatch.setattr(tw, "evaluate", fake_evaluate)
+    for encoding, arms in (("penalty", 48), ("domain_wall", 48), ("one_hot", 12), ("pruned", 3)):
+        seen.clear()
+        rungs = []
+        tw.tune_weights([6], encoding=encoding, out=None, on_rung=lambda n, reads, alive: rungs.append(len(alive)))
+        assert rungs[0] == arms
+        if encoding == "pruned":
+            assert sorted(w[2] for w in seen[:arms]) == list(tw.DEFAULT_DIAG_GRID)
@@ -1,6 +1,13 @@
-from src.utils.validate import is_valid_positions
+from src.utils.validate import is_valid_positions, is_valid_q
 
 def test_valid_4():
     # One known 4-queens solution: (row,col) = (1,2),(2,4),(3,1),(4,3)
     pos = [(1,2),(2,4),(3,1),(4,3)]
-    assert is_valid_positions(pos)
\ No newline at end of file
+    assert is_valid_positions(pos)
+
+def test_is_valid_q():
+    assert is_valid_q([2, 4, 1, 3])
+    assert is_valid_q([1, 3, 0, 2], base=0)
+    assert not is_valid_q([1, 2, 3, 4])
+    assert not is_valid_q([2, 4, 1, 1])
+